@@ -4,7 +4,7 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/4/6 14:21
 # @Desc    : 异步Aiomysql的增删改查封装
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Sequence, Union
 
 import aiomysql
 
@@ -58,6 +58,34 @@ class AsyncMysqlDB:
                 lastrowid = cur.lastrowid
                 return lastrowid
 
+    async def items_to_table_on_duplicate(self, table_name: str, items: List[Dict[str, Any]],
+                                          exclude_update_fields: Sequence[str] = ("add_ts",)) -> int:
+        """
+        多行批量写入，唯一键冲突时更新已有记录（INSERT ... ON DUPLICATE KEY UPDATE），需要表上存在唯一索引
+        :param table_name: 表名
+        :param items: 记录列表，字段相同的记录合并为一条多行 INSERT 语句
+        :param exclude_update_fields: 冲突时不更新的字段，默认保留首次写入的 add_ts
+        :return: 影响的行数
+        """
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for item in items:
+            groups.setdefault(tuple(item.keys()), []).append(item)
+
+        rows = 0
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                for fields, group_items in groups.items():
+                    fieldstr = ','.join([f'`{field}`' for field in fields])
+                    valstr = '(' + ','.join(['%s'] * len(fields)) + ')'
+                    update_fields = [field for field in fields if field not in exclude_update_fields]
+                    updatestr = ','.join([f'`{field}`=VALUES(`{field}`)' for field in update_fields])
+                    sql = "INSERT INTO %s (%s) VALUES %s ON DUPLICATE KEY UPDATE %s" % (
+                        table_name, fieldstr, ','.join([valstr] * len(group_items)), updatestr
+                    )
+                    values = [item[field] for item in group_items for field in fields]
+                    rows += await cur.execute(sql, values)
+        return rows
+
     async def update_table(self, table_name: str, updates: Dict[str, Any], field_where: str,
                            value_where: Union[str, int, float]) -> int:
         """
@@ -81,6 +81,18 @@ class AbstractStore(ABC):
     async def store_creator(self, creator: Dict):
         pass
 
+    async def sync(self):
+        """
+        爬取过程中调用，写出存储实现中缓冲的数据但不结束存储，保存断点记录前调用，默认无缓冲
+        """
+        pass
+
+    async def flush(self):
+        """
+        爬虫结束时调用，写出存储实现中缓冲的数据，默认无缓冲
+        """
+        pass
+
 
 class AbstractStoreImage(ABC):
     # TODO: support all platform
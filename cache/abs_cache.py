@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
 
 
 class AbstractCache(ABC):
@@ -24,3 +24,21 @@ class AbstractCache(ABC):
     async def exists(self, key: str) -> bool:
         """检查key是否存在"""
         pass
+
+    @abstractmethod
+    async def keys(self, pattern: str = "*") -> List[str]:
+        """获取匹配 pattern（glob 风格）的所有未过期 key"""
+        pass
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """批量获取缓存值，返回值与 keys 一一对应"""
+        return [await self.get(key) for key in keys]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int = 0) -> None:
+        """批量设置缓存值"""
+        for key, value in mapping.items():
+            await self.set(key, value, expire_time)
+
+    async def close(self) -> None:
+        """释放缓存占用的连接等资源"""
+        pass
@@ -11,8 +11,8 @@ class CacheFactory:
         """创建缓存实例
         
         Args:
-            cache_type: 缓存类型 ("local" 或 "redis")
-            **kwargs: 缓存初始化参数
+            cache_type: 缓存类型 ("local"/"memory" 或 "redis")
+            **kwargs: 缓存初始化参数，本地缓存支持 cron_interval、max_size
             
         Returns:
             AbstractCache: 缓存实例
@@ -20,4 +20,4 @@ class CacheFactory:
         if cache_type.lower() == "redis":
             return RedisCache(**kwargs)
         else:
-            return ExpiringLocalCache()
+            return ExpiringLocalCache(**kwargs)
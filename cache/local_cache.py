@@ -1,46 +1,134 @@
+import asyncio
+import fnmatch
 import time
-from typing import Any, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import config
+
 from .abs_cache import AbstractCache
 
 
+class _CacheEntry:
+    """缓存项，使用 __slots__ 减少大量小对象的内存占用"""
+
+    __slots__ = ("value", "expire_at")
+
+    def __init__(self, value: Any, expire_at: float):
+        self.value = value
+        self.expire_at = expire_at
+
+    def is_expired(self, now: float) -> bool:
+        return self.expire_at != 0 and now > self.expire_at
+
+
 class ExpiringLocalCache(AbstractCache):
-    """带过期时间的本地内存缓存"""
-    
-    def __init__(self):
-        self._cache = {}
-        self._expire_times = {}
+    """
+    带过期时间和容量上限的本地内存缓存：
+    1. 超过 max_size 时按 LRU 淘汰最久未访问的 key
+    2. 后台定时任务每 cron_interval 秒清理一次过期的 key，不依赖再次读取
+    3. stats 记录命中、未命中、淘汰、过期清理的次数
+    """
     
-    def _is_expired(self, key: str) -> bool:
-        """检查key是否过期"""
-        if key not in self._expire_times:
-            return False
-        return time.time() > self._expire_times[key]
+    def __init__(self, cron_interval: Optional[int] = None, max_size: Optional[int] = None):
+        """
+        Args:
+            cron_interval: 清理过期 key 的间隔，单位秒，默认为 LOCAL_CACHE_CRON_INTERVAL
+            max_size: 最多缓存的 key 数量，默认为 LOCAL_CACHE_MAX_SIZE
+        """
+        self._cron_interval = cron_interval or config.LOCAL_CACHE_CRON_INTERVAL
+        self._max_size = max_size or config.LOCAL_CACHE_MAX_SIZE
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._sweep_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _ensure_sweeper(self):
+        """第一次写入时在当前事件循环中启动清理任务"""
+        if self._sweep_task is not None and not self._sweep_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._sweep_task = loop.create_task(self._sweep_periodically())
+
+    async def _sweep_periodically(self):
+        while True:
+            await asyncio.sleep(self._cron_interval)
+            self.sweep()
+
+    def sweep(self) -> int:
+        """
+        清理所有过期的 key
+        Returns: 清理的数量
+
+        """
+        now = time.time()
+        expired_keys = [key for key, entry in self._cache.items() if entry.is_expired(now)]
+        for key in expired_keys:
+            del self._cache[key]
+        self.expirations += len(expired_keys)
+        return len(expired_keys)
+
+    def _get_entry(self, key: str) -> Optional[_CacheEntry]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry.is_expired(time.time()):
+            del self._cache[key]
+            self.expirations += 1
+            return None
+        return entry
     
     async def get(self, key: str) -> Optional[Any]:
-        if key not in self._cache:
-            return None
-        
-        if self._is_expired(key):
-            await self.delete(key)
+        entry = self._get_entry(key)
+        if entry is None:
+            self.misses += 1
             return None
-            
-        return self._cache[key]
+        self.hits += 1
+        self._cache.move_to_end(key)
+        return entry.value
     
     async def set(self, key: str, value: Any, expire_time: int = 0) -> None:
-        self._cache[key] = value
-        if expire_time > 0:
-            self._expire_times[key] = time.time() + expire_time
+        self._ensure_sweeper()
+        expire_at = time.time() + expire_time if expire_time > 0 else 0
+        self._cache[key] = _CacheEntry(value, expire_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
+            self.evictions += 1
     
     async def delete(self, key: str) -> None:
         self._cache.pop(key, None)
-        self._expire_times.pop(key, None)
     
     async def exists(self, key: str) -> bool:
-        if key not in self._cache:
-            return False
-        
-        if self._is_expired(key):
-            await self.delete(key)
-            return False
-            
-        return True
+        return self._get_entry(key) is not None
+
+    async def keys(self, pattern: str = "*") -> List[str]:
+        return [
+            key for key in list(self._cache)
+            if fnmatch.fnmatchcase(key, pattern) and self._get_entry(key) is not None
+        ]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._cache),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    async def close(self) -> None:
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            await asyncio.gather(self._sweep_task, return_exceptions=True)
+            self._sweep_task = None
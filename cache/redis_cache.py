@@ -1,38 +1,84 @@
-import redis
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
+
+from redis.asyncio import ConnectionPool, Redis
+
+import config
+
 from .abs_cache import AbstractCache
 
 
 class RedisCache(AbstractCache):
-    """Redis缓存实现"""
+    """Redis缓存实现，基于 redis.asyncio，所有操作都不会阻塞事件循环"""
     
-    def __init__(self, host='localhost', port=6379, db=0, **kwargs):
-        self.redis_client = redis.Redis(host=host, port=port, db=db, **kwargs)
+    def __init__(self, host=None, port=None, db=None, password=None, max_connections: int = 20, **kwargs):
+        self._pool = ConnectionPool(
+            host=host or config.REDIS_DB_HOST,
+            port=int(port or config.REDIS_DB_PORT),
+            db=int(db if db is not None else config.REDIS_DB_NUM),
+            password=password if password is not None else config.REDIS_DB_PWD,
+            max_connections=max_connections,
+            decode_responses=True,
+            **kwargs,
+        )
+        self.redis_client = Redis(connection_pool=self._pool)
     
     async def get(self, key: str) -> Optional[Any]:
         try:
-            value = self.redis_client.get(key)
-            return value.decode('utf-8') if value else None
+            return await self.redis_client.get(key)
         except Exception:
             return None
     
     async def set(self, key: str, value: Any, expire_time: int = 0) -> None:
         try:
             if expire_time > 0:
-                self.redis_client.setex(key, expire_time, str(value))
+                await self.redis_client.setex(key, expire_time, str(value))
             else:
-                self.redis_client.set(key, str(value))
+                await self.redis_client.set(key, str(value))
         except Exception:
             pass
     
     async def delete(self, key: str) -> None:
         try:
-            self.redis_client.delete(key)
+            await self.redis_client.delete(key)
         except Exception:
             pass
     
     async def exists(self, key: str) -> bool:
         try:
-            return bool(self.redis_client.exists(key))
+            return bool(await self.redis_client.exists(key))
         except Exception:
             return False
+
+    async def keys(self, pattern: str = "*") -> List[str]:
+        """使用 SCAN 分批遍历，不会像 KEYS 命令一样长时间阻塞 redis 服务"""
+        try:
+            return [key async for key in self.redis_client.scan_iter(match=pattern, count=500)]
+        except Exception:
+            return []
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        if not keys:
+            return []
+        try:
+            return await self.redis_client.mget(keys)
+        except Exception:
+            return [None] * len(keys)
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int = 0) -> None:
+        """通过 pipeline 一次往返写入多个 key"""
+        if not mapping:
+            return
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    if expire_time > 0:
+                        pipe.setex(key, expire_time, str(value))
+                    else:
+                        pipe.set(key, str(value))
+                await pipe.execute()
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        await self.redis_client.close()
+        await self._pool.disconnect()
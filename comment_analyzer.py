@@ -7,6 +7,7 @@ import json
 from datetime import datetime
 from typing import List, Dict, Any
 from config.db_config import *
+from tools.comment_tree import CommentTree
 
 class CommentTreeAnalyzer:
     """评论树形结构分析器"""
@@ -86,7 +87,7 @@ class CommentTreeAnalyzer:
     def _build_comment_tree(self, comments_data: List) -> List[Dict[str, Any]]:
         """构建评论树形结构"""
         # 转换为字典格式
-        comments_dict = {}
+        comments = []
         for comment in comments_data:
             comment_id, note_id, content, nickname, like_count, create_time, \
             sub_comment_count, parent_comment_id, avatar, ip_location, user_id = comment
@@ -106,23 +107,11 @@ class CommentTreeAnalyzer:
                 },
                 "create_time": datetime.fromtimestamp(create_time / 1000).strftime("%Y-%m-%d %H:%M:%S"),
                 "parent_comment_id": parent_comment_id if parent_comment_id and parent_comment_id != '0' else None,
-                "replies": []
             }
-            comments_dict[comment_id] = comment_obj
+            comments.append(comment_obj)
         
         # 构建树形结构
-        root_comments = []
-        for comment_id, comment in comments_dict.items():
-            if comment["parent_comment_id"]:
-                # 这是一个回复
-                parent_id = comment["parent_comment_id"]
-                if parent_id in comments_dict:
-                    comments_dict[parent_id]["replies"].append(comment)
-            else:
-                # 这是一个根评论
-                root_comments.append(comment)
-        
-        return root_comments
+        return CommentTree.build(comments).to_dicts("replies")
     
     async def get_hot_comments(self, note_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """获取热门评论（按点赞数排序）"""
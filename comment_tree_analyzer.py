@@ -5,8 +5,8 @@ import asyncio
 import aiomysql
 import json
 from datetime import datetime
-from collections import defaultdict
 from config.db_config import *
+from tools.comment_tree import CommentTree
 
 class CommentTreeAnalyzer:
     """评论树结构分析器"""
@@ -61,33 +61,21 @@ class CommentTreeAnalyzer:
     
     def build_comment_tree(self, comments):
         """构建评论树结构"""
-        # 按parent_comment_id分组
-        comments_by_parent = defaultdict(list)
-        comment_map = {}
-        
-        for comment in comments:
-            comment_map[comment['comment_id']] = comment
-            parent_id = comment['parent_comment_id']
-            comments_by_parent[parent_id].append(comment)
-        
-        # 构建树结构
-        def build_tree_recursive(parent_id=None):
-            tree = []
-            for comment in comments_by_parent[parent_id]:
-                comment_node = comment.copy()
-                comment_node['replies'] = build_tree_recursive(comment['comment_id'])
-                comment_node['reply_count'] = len(comment_node['replies'])
-                tree.append(comment_node)
-            return tree
-        
-        return build_tree_recursive()
+        return self._tree_to_dicts(CommentTree.build(comments))
+    
+    @staticmethod
+    def _tree_to_dicts(tree):
+        """评论树转换为嵌套字典，reply_count 为直接回复数"""
+        return tree.to_dicts('replies', extra=lambda node: {'reply_count': len(node.children)})
     
     def format_comment_tree_text(self, tree, indent=0):
         """格式化评论树为文本显示"""
         result = []
+        stack = [(comment, indent) for comment in reversed(tree)]
         
-        for comment in tree:
-            prefix = "  " * indent + ("└─ " if indent > 0 else "")
+        while stack:
+            comment, level = stack.pop()
+            prefix = "  " * level + ("└─ " if level > 0 else "")
             
             # 格式化时间
             create_time = comment['create_time']
@@ -102,9 +90,8 @@ class CommentTreeAnalyzer:
             result.append(f"{prefix}❤️ {comment['like_count']} 👥 {comment['reply_count']} ⏰ {time_str}")
             result.append("")
             
-            # 递归显示回复
-            if comment['replies']:
-                result.extend(self.format_comment_tree_text(comment['replies'], indent + 1))
+            # 回复紧跟在评论后显示
+            stack.extend((reply, level + 1) for reply in reversed(comment['replies']))
         
         return result
     
@@ -120,23 +107,16 @@ class CommentTreeAnalyzer:
             return None
         
         # 构建评论树
-        comment_tree = self.build_comment_tree(comments)
+        tree = CommentTree.build(comments)
+        comment_tree = self._tree_to_dicts(tree)
         
         # 统计信息
         total_comments = len(comments)
-        top_level_comments = len(comment_tree)
+        top_level_comments = len(tree.roots)
         reply_comments = total_comments - top_level_comments
         
         # 计算各层级评论数量
-        level_counts = defaultdict(int)
-        
-        def count_levels(tree, level=0):
-            level_counts[level] += len(tree)
-            for comment in tree:
-                if comment['replies']:
-                    count_levels(comment['replies'], level + 1)
-        
-        count_levels(comment_tree)
+        level_counts = tree.level_counts()
         
         # 生成分析报告
         analysis = {
@@ -149,7 +149,7 @@ class CommentTreeVisualizer:
                 COUNT(c2.comment_id) as reply_count,
                 SUM(CAST(COALESCE(c2.like_count, '0') AS UNSIGNED)) as total_reply_likes
             FROM xhs_note_comment c1
-            LEFT JOIN xhs_note_comment c2 ON c1.comment_id = c2.parent_comment_id
+            LEFT JOIN xhs_note_comment c2 ON c2.note_id = c1.note_id AND c2.parent_comment_id = c1.comment_id
             WHERE c1.note_id = %s 
             AND (c1.parent_comment_id IS NULL OR c1.parent_comment_id = '0')
             GROUP BY c1.comment_id, c1.content, c1.nickname, c1.like_count
@@ -176,10 +176,10 @@ class CommentTreeVisualizer:
                 await cursor.execute("""
                     SELECT content, nickname, like_count
                     FROM xhs_note_comment
-                    WHERE parent_comment_id = %s
+                    WHERE note_id = %s AND parent_comment_id = %s
                     ORDER BY CAST(COALESCE(like_count, '0') AS UNSIGNED) DESC
                     LIMIT 3
-                """, (comment_id,))
+                """, (note_id, comment_id))
                 
                 replies = await cursor.fetchall()
                 
@@ -5,8 +5,8 @@ import asyncio
 import aiomysql
 import json
 from datetime import datetime
-from collections import defaultdict
 from config.db_config import *
+from tools.comment_tree import CommentTree
 
 class CommentVisualization:
     """评论可视化展示工具"""
@@ -30,7 +30,7 @@ class CommentVisualization:
         if self.conn:
             await self.conn.ensure_closed()
     
-    def create_html_visualization(self, comment_tree, note_info):
+    def create_html_visualization(self, comment_tree: CommentTree, note_info):
         """创建HTML可视化"""
         html_template = """
 <!DOCTYPE html>
@@ -40,92 +40,92 @@ class CommentVisualization:
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>小红书评论树可视化</title>
     <style>
-        body {
+        body {{
             font-family: 'Microsoft YaHei', Arial, sans-serif;
             background: #f5f5f5;
             margin: 0;
             padding: 20px;
-        }
-        .container {
+        }}
+        .container {{
             max-width: 1200px;
             margin: 0 auto;
             background: white;
             border-radius: 10px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
             overflow: hidden;
-        }
-        .header {
+        }}
+        .header {{
             background: linear-gradient(135deg, #ff6b6b, #feca57);
             color: white;
             padding: 30px;
             text-align: center;
-        }
-        .note-title {
+        }}
+        .note-title {{
             font-size: 24px;
             font-weight: bold;
             margin-bottom: 10px;
-        }
-        .note-stats {
+        }}
+        .note-stats {{
             font-size: 14px;
             opacity: 0.9;
-        }
-        .content {
+        }}
+        .content {{
             padding: 30px;
-        }
-        .comment {
+        }}
+        .comment {{
             border: 1px solid #e0e0e0;
             border-radius: 8px;
             margin-bottom: 15px;
             overflow: hidden;
             transition: box-shadow 0.3s;
-        }
-        .comment:hover {
+        }}
+        .comment:hover {{
             box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        }
-        .comment-header {
+        }}
+        .comment-header {{
             background: #f8f9fa;
             padding: 15px;
             border-bottom: 1px solid #e0e0e0;
-        }
-        .comment-author {
+        }}
+        .comment-author {{
             font-weight: bold;
             color: #333;
             margin-bottom: 5px;
-        }
-        .comment-meta {
+        }}
+        .comment-meta {{
             font-size: 12px;
             color: #666;
-        }
-        .comment-content {
+        }}
+        .comment-content {{
             padding: 15px;
             line-height: 1.6;
-        }
-        .comment-actions {
+        }}
+        .comment-actions {{
             background: #f8f9fa;
             padding: 10px 15px;
             font-size: 12px;
             color: #666;
             border-top: 1px solid #e0e0e0;
-        }
-        .reply {
+        }}
+        .reply {{
             margin-left: 40px;
             margin-top: 10px;
             border-left: 3px solid #feca57;
             background: #fffbf0;
-        }
-        .reply .comment-header {
+        }}
+        .reply .comment-header {{
             background: #fff8e1;
-        }
-        .like-count {
+        }}
+        .like-count {{
             color: #ff6b6b;
             font-weight: bold;
-        }
-        .reply-indicator {
+        }}
+        .reply-indicator {{
             color: #feca57;
             font-weight: bold;
             margin-right: 5px;
-        }
-        .stats-bar {
+        }}
+        .stats-bar {{
             background: #f0f0f0;
             padding: 20px;
             margin-bottom: 20px;
@@ -133,20 +133,20 @@ class CommentVisualization:
             display: flex;
             justify-content: space-around;
             text-align: center;
-        }
-        .stat-item {
+        }}
+        .stat-item {{
             flex: 1;
-        }
-        .stat-number {
+        }}
+        .stat-number {{
             font-size: 24px;
             font-weight: bold;
             color: #333;
-        }
-        .stat-label {
+        }}
+        .stat-label {{
             font-size: 12px;
             color: #666;
             margin-top: 5px;
-        }
+        }}
     </style>
 </head>
 <body>
@@ -189,14 +189,20 @@ class CommentVisualization:
                 return datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d %H:%M')
             return str(timestamp)
         
-        def build_comment_html(comments, is_reply=False):
-            """构建评论HTML"""
-            html = ""
-            for comment in comments:
+        def build_comment_html(tree):
+            """构建评论HTML，回复嵌套在被回复评论的 div 中"""
+            parts = []
+            open_depth = 0
+            for node in tree.walk():
+                # 关闭上一条评论及其已经结束的回复
+                parts.append("</div>" * (open_depth - node.depth))
+                open_depth = node.depth + 1
+                comment = node.data
+                is_reply = node.depth > 0
                 reply_class = "reply" if is_reply else ""
                 reply_indicator = '<span class="reply-indicator">└─</span>' if is_reply else ""
                 
-                html += f"""
+                parts.append(f"""
                 <div class="comment {reply_class}">
                     <div class="comment-header">
                         <div class="comment-author">
@@ -211,32 +217,17 @@ class CommentVisualization:
                     </div>
                     <div class="comment-actions">
                         <span class="like-count">❤️ {comment.get('like_count', 0)}</span>
-                        <span style="margin-left: 20px;">💬 {len(comment.get('replies', []))}</span>
+                        <span style="margin-left: 20px;">💬 {len(node.children)}</span>
                     </div>
-                    {build_comment_html(comment.get('replies', []), True)}
-                </div>
-                """
-            return html
+                """)
+            parts.append("</div>" * open_depth)
+            return "".join(parts)
         
         # 计算统计信息
-        def count_comments(tree):
-            total = len(tree)
-            replies = 0
-            max_d = 0
-            
-            def count_recursive(comments, depth=0):
-                nonlocal replies, max_d
-                max_d = max(max_d, depth)
-                for comment in comments:
-                    if depth > 0:
-                        replies += 1
-                    if comment.get('replies'):
-                        count_recursive(comment['replies'], depth + 1)
-            
-            count_recursive(tree)
-            return total, total - replies, replies, max_d
-        
-        total, top_level, reply_level, max_depth = count_comments(comment_tree)
+        total = len(comment_tree)
+        top_level = len(comment_tree.roots)
+        reply_level = total - top_level
+        max_depth = comment_tree.max_depth
         
         comments_html = build_comment_html(comment_tree)
         
@@ -316,21 +307,7 @@ class CommentVisualization:
     
     def _build_comment_tree(self, comments):
         """构建评论树"""
-        comments_by_parent = defaultdict(list)
-        
-        for comment in comments:
-            parent_id = comment['parent_comment_id']
-            comments_by_parent[parent_id].append(comment)
-        
-        def build_tree_recursive(parent_id=None):
-            tree = []
-            for comment in comments_by_parent[parent_id]:
-                comment_node = comment.copy()
-                comment_node['replies'] = build_tree_recursive(comment['comment_id'])
-                tree.append(comment_node)
-            return tree
-        
-        return build_tree_recursive()
+        return CommentTree.build(comments)
 
 async def main():
     """主函数"""
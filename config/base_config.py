@@ -21,12 +21,37 @@ ENABLE_IP_PROXY = False
 # 未启用代理时的最大爬取间隔，单位秒（暂时仅对XHS有效）- 增加间隔避免被限制
 CRAWLER_MAX_SLEEP_SEC = 10
 
+# 按接口类型划分的请求速率（每秒允许的请求数，令牌桶实现，<=0 表示不限速），等待期间不阻塞其他协程（暂时仅对XHS有效）
+# search: 关键词搜索 | note_detail: 笔记详情 | comments: 一级评论 | sub_comments: 二级评论 | creator_notes: 博主主页及笔记列表
+CRAWLER_RATE_LIMITS = {
+    "search": 0.2,
+    "note_detail": 0.5,
+    "comments": 0.5,
+    "sub_comments": 0.5,
+    "creator_notes": 0.3,
+}
+
+# 开启IP代理时每次请求前附加的随机等待上限，单位秒；未开启代理时使用 CRAWLER_MAX_SLEEP_SEC
+CRAWLER_PROXY_JITTER_SEC = 1
+
+# 请求签名所需的 localStorage b1 值的缓存刷新间隔，单位秒（暂时仅对XHS有效）
+XHS_SIGN_B1_REFRESH_INTERVAL = 600
+
+# 请求签名页面池大小，同一浏览器上下文中的多个页面并行签名（暂时仅对XHS有效），0 表示使用爬虫的并发上限（开启自适应并发时为 ADAPTIVE_CONCURRENCY_MAX_NUM）
+XHS_SIGN_PAGE_POOL_SIZE = 0
+
 # 代理IP池数量
 IP_PROXY_POOL_COUNT = 2
 
-# 代理IP提供商名称
+# 代理IP提供商名称，kuaidaili | localstub(本地固定代理，地址从环境变量 local_stub_proxy_addrs 读取，可用于离线测试)
 IP_PROXY_PROVIDER_NAME = "kuaidaili"
 
+# 代理IP后台校验间隔，单位秒，校验失败次数过多或即将过期的代理会被移出并自动补充
+IP_PROXY_VALIDATE_INTERVAL = 60
+
+# 代理IP过期前多少秒开始补充新的代理，单位秒
+IP_PROXY_PREFETCH_BEFORE_EXPIRE = 30
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -64,8 +89,16 @@ BROWSER_LAUNCH_TIMEOUT = 120
 # 设置为False可以保持浏览器运行，便于调试
 AUTO_CLOSE_BROWSER = True
 
-# 数据保存类型选项配置,支持三种类型：csv、db、json, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "db"  # csv or db or json
+# 数据保存类型选项配置,支持四种类型：csv、db、json、jsonl, 最好保存到DB，有排重的功能。
+# jsonl 为追加写入的 JSON Lines 格式（暂时仅对XHS有效），适合评论数量很大的场景
+SAVE_DATA_OPTION = "db"  # csv or db or json or jsonl
+
+# csv 存储批量写入配置：每个文件保持一个打开的句柄，缓冲的行数达到条数阈值或距上次写入超过时间阈值（秒）时批量写入
+CSV_BATCH_SIZE = 100
+CSV_FLUSH_INTERVAL = 5
+
+# jsonl 存储在爬虫结束时是否整理导出一份 json 存储的数组格式文件（data/xhs/json 目录）
+JSONL_EXPORT_JSON_ON_FINISH = True
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -79,20 +112,108 @@ CRAWLER_MAX_NOTES_COUNT = 10
 # 并发爬虫数量控制 - 保持单线程，避免过快触发限制
 MAX_CONCURRENCY_NUM = 1
 
+# 自适应并发配置（暂时仅对XHS有效）：整个爬虫共享一个并发上限，从 MAX_CONCURRENCY_NUM 开始，
+# 请求又快又成功时逐步增加，请求变慢、接口连续报错时下调，IP被封或出现验证码(461/471)时减半并暂停增加；
+# 默认关闭，并发保持 MAX_CONCURRENCY_NUM，开启前请确认账号和代理能承受更高的请求频率
+ENABLE_ADAPTIVE_CONCURRENCY = False
+# 自适应并发的下限和上限
+ADAPTIVE_CONCURRENCY_MIN_NUM = 1
+ADAPTIVE_CONCURRENCY_MAX_NUM = 4
+# 单个请求耗时超过该值（秒）视为拥塞，小幅下调并发
+ADAPTIVE_CONCURRENCY_LATENCY_THRESHOLD = 5
+# IP被封或出现验证码后暂停增加并发的时间，单位秒
+ADAPTIVE_CONCURRENCY_COOLDOWN_SEC = 120
+
+# 关键词搜索流水线配置（暂时仅对XHS有效）：搜索分页、笔记详情、存储、评论四个阶段通过有界队列衔接，
+# 翻页与前面笔记的详情、评论爬取同时进行，队列满时上游阶段等待
+# 每个阶段之间队列的最大长度
+SEARCH_PIPELINE_QUEUE_SIZE = 40
+# 笔记详情阶段的并发数，0 表示使用爬虫的并发上限（开启自适应并发时为 ADAPTIVE_CONCURRENCY_MAX_NUM）
+SEARCH_PIPELINE_DETAIL_CONCURRENCY = 0
+# 评论阶段的并发数，0 表示使用爬虫的并发上限（开启自适应并发时为 ADAPTIVE_CONCURRENCY_MAX_NUM）
+SEARCH_PIPELINE_COMMENT_CONCURRENCY = 0
+
+# 断点续爬配置（暂时仅对XHS有效）：记录已完成的搜索页、创作者笔记游标、每篇笔记的评论游标，
+# 爬虫中途退出（验证码、崩溃等）后重新运行会跳过已完成的部分，从上次的游标继续
+ENABLE_CRAWL_CHECKPOINT = True
+# 断点记录的保存目录，%s 会被替换为平台名称，每种爬取类型(search/detail/creator)一个 SQLite 文件
+CRAWL_CHECKPOINT_DIR = "data/%s/checkpoint"
+# 完整爬取结束后是否清空断点记录，设置为False则下次运行继续跳过已完成的部分
+CLEAR_CRAWL_CHECKPOINT_ON_FINISH = True
+# 断点记录和去重记录的提交间隔，单位秒：先写出存储中缓冲的数据再提交这些记录，进程中断时最多重爬这段时间内的进度
+CRAWL_PROGRESS_COMMIT_INTERVAL = 10
+
+# 去重配置（暂时仅对XHS有效）：记录每个笔记详情、笔记评论、单条评论最近一次的爬取时间，
+# 同一笔记出现在多个关键词/创作者下或重复运行时，在重新爬取间隔内不再重复请求
+# 重新爬取间隔，单位秒，超过该时间的笔记和评论会重新爬取
+SEEN_INDEX_RECRAWL_TTL = 24 * 3600
+# 是否持久化去重记录，设置为False则只在本次运行内去重；
+# 开启后重新爬取间隔内再次运行会跳过已爬过的笔记和评论，csv/json 等按次保存的结果文件中不会再包含这些数据
+ENABLE_SEEN_INDEX_PERSIST = False
+# 去重记录的保存路径，%s 会被替换为平台名称
+SEEN_INDEX_PATH = "data/%s/seen_index.db"
+# 内存布隆过滤器预计容纳的记录数，超出后误判率上升（误判只会多查一次本地存储，不会漏爬）
+SEEN_INDEX_BLOOM_CAPACITY = 1000000
+
+# HTTP响应缓存配置（暂时仅对XHS有效）：把笔记详情页、创作者主页的HTML压缩保存到本地，
+# 重试或重复运行相同的笔记/创作者时直接读取，主要用于开发调试和离线测试解析、存储逻辑
+ENABLE_HTTP_RESPONSE_CACHE = False
+# 响应缓存的保存目录，%s 会被替换为平台名称
+HTTP_RESPONSE_CACHE_DIR = "data/%s/http_cache"
+# 响应缓存的有效期，单位秒，<=0 表示永不过期
+HTTP_RESPONSE_CACHE_TTL = 24 * 3600
+# 回放模式：只从缓存读取网页，不发起网络请求，未缓存的网页视为请求失败（需要同时开启 ENABLE_HTTP_RESPONSE_CACHE）
+# 回放只覆盖网页请求，搜索、评论等API接口仍然会请求网络，离线回放时建议使用 detail 模式并关闭评论爬取
+HTTP_RESPONSE_CACHE_REPLAY = False
+
+# ==================== HTTP 连接池配置（暂时仅对XHS有效） ====================
+# API客户端在整个爬取过程中复用同一个连接池，避免每次请求都重新建立TCP连接和TLS握手
+# 是否启用HTTP/2，需要额外安装 h2 依赖（pip install httpx[http2]），未安装时自动回退到HTTP/1.1
+ENABLE_HTTP2 = False
+
+# 连接池最大连接数
+HTTP_MAX_CONNECTIONS = 20
+
+# 连接池最大保活连接数
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+
+# 保活连接的空闲过期时间，单位秒
+HTTP_KEEPALIVE_EXPIRY = 30
+
+# 单个域名同时进行的最大请求数（API域名、网页域名、图片CDN域名分别计算）
+HTTP_MAX_CONNECTIONS_PER_HOST = 10
+
 # 是否开启爬图片模式, 默认不开启爬图片
 ENABLE_GET_IMAGES = False
 
+# 图片/视频后台下载的并发数，下载以流式写入磁盘并支持断点续传，不阻塞笔记和评论的爬取
+MEDIA_DOWNLOAD_CONCURRENCY = 4
+
+# 等待下载的图片/视频任务数上限，队列满时提交任务会等待
+MEDIA_DOWNLOAD_QUEUE_SIZE = 100
+
 # 是否开启爬评论模式, 默认开启爬评论
 ENABLE_GET_COMMENTS = True
 
 # 爬取一级评论的数量控制(单视频/帖子) - 减少数量，先测试基本功能
 CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = 20
 
+# 是否开启增量爬取评论模式（暂时仅对XHS有效），会记录每篇笔记已保存的最新一级评论，
+# 再次爬取时只保存更新的评论，翻到已爬过的评论就停止，适合定时重复爬取热门笔记；已爬过的评论下新增的二级评论不会再爬取
+# 最新评论记录保存在去重记录文件（SEEN_INDEX_PATH）中，未开启 ENABLE_SEEN_INDEX_PERSIST 时也会保存，跨运行生效
+ENABLE_INCREMENTAL_COMMENTS = False
+
 # 是否开启爬二级评论模式, 默认不开启爬二级评论
 # 老版本项目使用了 db, 则需参考 schema/tables.sql line 287 增加表字段
 # 暂时关闭二级评论，先确保一级评论正常工作
 ENABLE_GET_SUB_COMMENTS = False
 
+# 同一篇笔记下同时展开二级评论的一级评论数量，请求节奏仍受 CRAWLER_RATE_LIMITS["sub_comments"] 限制
+SUB_COMMENTS_CONCURRENCY_NUM = 4
+
+# 爬取二级评论的数量控制(单视频/帖子)，按一级评论的回复数从多到少优先爬取，0 表示不限制
+CRAWLER_MAX_SUB_COMMENTS_COUNT_SINGLENOTES = 0
+
 # 已废弃⚠️⚠️⚠️指定小红书需要爬虫的笔记ID列表
 # 已废弃⚠️⚠️⚠️ 指定笔记ID笔记列表会因为缺少xsec_token和xsec_source参数导致爬取失败
 # XHS_SPECIFIED_ID_LIST = [
@@ -119,6 +240,9 @@ XHS_CREATOR_ID_LIST = [
 # 词云相关
 # 是否开启生成评论词云图
 ENABLE_GET_WORDCLOUD = True
+# 词频文件和词云图的最短重新生成间隔，单位秒（暂时仅对XHS有效），0 表示只在爬虫结束时生成一次
+# 词频本身按新增评论增量累计，不会重复对已保存的评论分词
+WORDCLOUD_RENDER_INTERVAL = 0
 # 自定义词语及其分组
 # 添加规则：xx:yy 其中xx为自定义添加的词组，yy为将xx该词组分到的组名。
 CUSTOM_WORDS = {
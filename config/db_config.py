@@ -9,6 +9,11 @@ RELATION_DB_HOST = os.getenv("RELATION_DB_HOST", "localhost")
 RELATION_DB_PORT = os.getenv("RELATION_DB_PORT", 3306)
 RELATION_DB_NAME = os.getenv("RELATION_DB_NAME", "media_crawler")
 
+# 批量写入配置（暂时仅对XHS有效）：记录先进入内存缓冲区，达到条数阈值或时间阈值（秒）时
+# 以多行 INSERT ... ON DUPLICATE KEY UPDATE 写入，爬虫结束时会写入剩余数据
+DB_BATCH_SIZE = 200
+DB_BATCH_FLUSH_INTERVAL = 5
+
 
 # redis config
 REDIS_DB_HOST = "127.0.0.1"  # your redis host
@@ -18,4 +23,9 @@ REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
 
 # cache type
 CACHE_TYPE_REDIS = "redis"
-CACHE_TYPE_MEMORY = "memory"
\ No newline at end of file
+CACHE_TYPE_MEMORY = "memory"
+
+# 本地内存缓存最多保存的 key 数量，超出后淘汰最久未访问的 key（LRU）
+LOCAL_CACHE_MAX_SIZE = 10000
+# 本地内存缓存后台清理过期 key 的间隔，单位秒
+LOCAL_CACHE_CRON_INTERVAL = 10
\ No newline at end of file
@@ -7,6 +7,7 @@ import json
 from datetime import datetime
 from collections import defaultdict
 from config.db_config import *
+from tools.comment_tree import CommentTree
 
 class DatabaseStructureOptimizer:
     """数据库结构优化和展示工具"""
@@ -115,7 +116,7 @@ class DatabaseStructureOptimizer:
                     c2.nickname as parent_nickname,
                     c2.content as parent_content
                 FROM xhs_note_comment c1
-                LEFT JOIN xhs_note_comment c2 ON c1.parent_comment_id = c2.comment_id
+                LEFT JOIN xhs_note_comment c2 ON c2.note_id = c1.note_id AND c2.comment_id = c1.parent_comment_id
                 ORDER BY c1.note_id, c1.create_time
             """)
             
@@ -270,23 +271,7 @@ class DatabaseStructureOptimizer:
     
     def _build_comment_tree(self, comments):
         """构建评论树"""
-        # 按parent_comment_id分组
-        comments_by_parent = defaultdict(list)
-        
-        for comment in comments:
-            parent_id = comment['parent_comment_id']
-            comments_by_parent[parent_id].append(comment)
-        
-        # 构建树结构
-        def build_tree_recursive(parent_id=None):
-            tree = []
-            for comment in comments_by_parent[parent_id]:
-                comment_node = comment.copy()
-                comment_node['replies'] = build_tree_recursive(comment['comment_id'])
-                tree.append(comment_node)
-            return tree
-        
-        return build_tree_recursive()
+        return CommentTree.build(comments).to_dicts('replies')
 
 async def main():
     """主函数"""
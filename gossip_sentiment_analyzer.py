@@ -9,6 +9,7 @@
 4. 数据可视化
 """
 
+import argparse
 import pandas as pd
 import jieba
 import jieba.analyse
@@ -19,12 +20,17 @@ from collections import Counter
 import re
 import json
 import asyncio
+import hashlib
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import numpy as np
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
 import torch
 import warnings
+
+from tools.keyword_matcher import KeywordMatch, KeywordMatcher
+from tools.text_frame import (StageTimer, count_values, counts_to_dict, non_null_texts, read_csv_columns,
+                              text_column)
 warnings.filterwarnings('ignore')
 
 # 设置中文字体
@@ -34,7 +40,22 @@ plt.rcParams['axes.unicode_minus'] = False
 class GossipSentimentAnalyzer:
     """娱乐八卦负面舆情分析器"""
     
-    def __init__(self):
+    # 分析用到的列，导出文件中的其他列不读取
+    NOTE_COLUMNS = ['note_id', 'title', 'desc', 'nickname', 'liked_count', 'comment_count', 'time']
+    COMMENT_COLUMNS = ['comment_id', 'note_id', 'content', 'nickname', 'like_count']
+    
+    def __init__(self, batch_size: int = 32, quantize: bool = False):
+        """
+        Args:
+            batch_size: 情感模型每批推理的文本数
+            quantize: CPU 推理时是否使用动态量化（int8）模型，速度更快，精度略有下降
+        """
+        self.batch_size = batch_size
+        self.quantize = quantize
+        # 各阶段的耗时和处理行数，基准模式下输出
+        self.stage_timer = StageTimer()
+        # 情感分析结果缓存，key 为文本的哈希，重复的评论只推理一次
+        self.sentiment_cache: Dict[str, str] = {}
         self.setup_jieba()
         self.load_data()
         self.build_keywords()
@@ -58,27 +79,23 @@ class GossipSentimentAnalyzer:
         """加载数据"""
         try:
             # 加载帖子数据
-            self.notes_df = pd.read_csv('data/xhs_notes.csv')
+            with self.stage_timer.stage('加载帖子') as stage:
+                self.notes_df = read_csv_columns('data/xhs_notes.csv', self.NOTE_COLUMNS, text_columns=['title', 'desc'])
+                stage['rows'] = len(self.notes_df)
             print(f"加载帖子数据: {len(self.notes_df)} 条")
             
             # 加载评论数据
-            self.comments_df = pd.read_csv('data/xhs_comments.csv')
+            with self.stage_timer.stage('加载评论') as stage:
+                self.comments_df = read_csv_columns('data/xhs_comments.csv', self.COMMENT_COLUMNS, text_columns=['content'])
+                stage['rows'] = len(self.comments_df)
             print(f"加载评论数据: {len(self.comments_df)} 条")
             
-            # 合并所有文本内容
-            self.all_texts = []
-            
-            # 添加帖子标题和描述
-            for _, row in self.notes_df.iterrows():
-                if pd.notna(row['title']):
-                    self.all_texts.append(str(row['title']))
-                if pd.notna(row['desc']):
-                    self.all_texts.append(str(row['desc']))
-            
-            # 添加评论内容
-            for _, row in self.comments_df.iterrows():
-                if pd.notna(row['content']):
-                    self.all_texts.append(str(row['content']))
+            # 合并所有文本内容：帖子标题和描述（按帖子顺序交替）、评论内容，去掉空值
+            with self.stage_timer.stage('合并文本', len(self.notes_df) + len(self.comments_df)):
+                self.all_texts = pd.concat([
+                    non_null_texts(self.notes_df, ['title', 'desc']),
+                    non_null_texts(self.comments_df, ['content']),
+                ], ignore_index=True).tolist()
                     
             print(f"总文本数量: {len(self.all_texts)}")
             
@@ -126,6 +143,23 @@ class GossipSentimentAnalyzer:
         self.all_keywords = []
         for category, words in self.gossip_keywords.items():
             self.all_keywords.extend(words)
+        
+        # 规则情感分析使用的情感词表
+        self.sentiment_words = {
+            'negative': [
+                '恶心', '讨厌', '垃圾', '差劲', '失望', '愤怒', '气愤', '无语',
+                '鄙视', '恶心', '作呕', '反感', '厌恶', '痛恨', '憎恨', '恶心',
+                '不爽', '郁闷', '烦躁', '烦人', '恶心', '太差', '很烂', '垃圾',
+                '塌房', '翻车', '黑料', '丑闻', '争议', '抄袭', '造假', '恶心'
+            ],
+            'positive': [
+                '好', '棒', '赞', '喜欢', '爱', '支持', '加油', '优秀', '厉害',
+                '完美', '太好了', '很棒', '很好', '不错', '满意', '开心', '高兴'
+            ],
+        }
+        
+        # 八卦关键词和情感词编译为一个自动机，每条文本只需扫描一次
+        self.keyword_matcher = KeywordMatcher({**self.gossip_keywords, **self.sentiment_words})
             
         print(f"构建娱乐八卦关键词表完成，共 {len(self.all_keywords)} 个关键词")
         
@@ -138,13 +172,20 @@ class GossipSentimentAnalyzer:
         try:
             # 使用中文情感分析模型
             model_name = "uer/roberta-base-finetuned-chinanews-chinese"
+            use_cuda = torch.cuda.is_available()
+            model = AutoModelForSequenceClassification.from_pretrained(model_name)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            if self.quantize and not use_cuda:
+                # 动态量化只支持 CPU，把全连接层的权重转换为 int8
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            model.eval()
             self.sentiment_analyzer = pipeline(
                 "text-classification",
-                model=model_name,
-                tokenizer=model_name,
-                device=0 if torch.cuda.is_available() else -1
+                model=model,
+                tokenizer=tokenizer,
+                device=0 if use_cuda else -1
             )
-            print("情感分析模型加载成功")
+            print(f"情感分析模型加载成功 (batch_size={self.batch_size}, int8量化={self.quantize and not use_cuda})")
         except Exception as e:
             print(f"情感分析模型加载失败，使用规则方法: {e}")
             self.sentiment_analyzer = None
@@ -207,37 +248,27 @@ class GossipSentimentAnalyzer:
             
         return word_freq
     
-    def keyword_matching(self, text: str) -> Tuple[bool, List[str], str]:
+    def keyword_matching(self, text: str, match: Optional[KeywordMatch] = None) -> Tuple[bool, List[str], str]:
         """关键词匹配检测"""
+        match = match or self.keyword_matcher.match(text)
         matched_keywords = []
         matched_category = ""
         
-        for category, keywords in self.gossip_keywords.items():
-            for keyword in keywords:
-                if keyword in text:
-                    matched_keywords.append(keyword)
-                    if not matched_category:
-                        matched_category = category
+        for category in self.gossip_keywords:
+            keywords = match.by_label.get(category)
+            if keywords:
+                matched_keywords.extend(keywords)
+                if not matched_category:
+                    matched_category = category
         
         is_gossip = len(matched_keywords) > 0
         return is_gossip, matched_keywords, matched_category
     
-    def rule_based_sentiment(self, text: str) -> str:
+    def rule_based_sentiment(self, text: str, match: Optional[KeywordMatch] = None) -> str:
         """基于规则的情感分析"""
-        negative_words = [
-            '恶心', '讨厌', '垃圾', '差劲', '失望', '愤怒', '气愤', '无语',
-            '鄙视', '恶心', '作呕', '反感', '厌恶', '痛恨', '憎恨', '恶心',
-            '不爽', '郁闷', '烦躁', '烦人', '恶心', '太差', '很烂', '垃圾',
-            '塌房', '翻车', '黑料', '丑闻', '争议', '抄袭', '造假', '恶心'
-        ]
-        
-        positive_words = [
-            '好', '棒', '赞', '喜欢', '爱', '支持', '加油', '优秀', '厉害',
-            '完美', '太好了', '很棒', '很好', '不错', '满意', '开心', '高兴'
-        ]
-        
-        negative_count = sum(1 for word in negative_words if word in text)
-        positive_count = sum(1 for word in positive_words if word in text)
+        match = match or self.keyword_matcher.match(text)
+        negative_count = match.count('negative')
+        positive_count = match.count('positive')
         
         if negative_count > positive_count:
             return 'NEGATIVE'
@@ -246,92 +277,140 @@ class GossipSentimentAnalyzer:
         else:
             return 'NEUTRAL'
     
+    @staticmethod
+    def map_sentiment_label(result: Dict) -> str:
+        """根据模型输出映射情感"""
+        label = result['label']
+        confidence = result['score']
+        if 'NEG' in label.upper() or confidence < 0.4:
+            return 'NEGATIVE'
+        elif 'POS' in label.upper():
+            return 'POSITIVE'
+        else:
+            return 'NEUTRAL'
+    
     def sentiment_analysis(self, text: str) -> str:
         """情感分析"""
-        if self.sentiment_analyzer:
-            try:
-                # 截断过长文本
-                text = text[:512]
-                result = self.sentiment_analyzer(text)[0]
-                label = result['label']
-                confidence = result['score']
-                
-                # 根据模型输出映射情感
-                if 'NEG' in label.upper() or confidence < 0.4:
-                    return 'NEGATIVE'
-                elif 'POS' in label.upper():
-                    return 'POSITIVE'
-                else:
-                    return 'NEUTRAL'
-            except Exception as e:
-                print(f"模型情感分析失败，使用规则方法: {e}")
-                return self.rule_based_sentiment(text)
+        return self.sentiment_analysis_batch([text])[0]
+    
+    def sentiment_analysis_batch(self, texts: List[str]) -> List[str]:
+        """
+        批量情感分析：相同文本只推理一次，按长度排序后分批推理，减少同一批内的 padding
+        Args:
+            texts: 文本列表
+
+        Returns: 与 texts 一一对应的情感标签
+        """
+        # 截断过长文本
+        texts = [text[:512] for text in texts]
+        keys = [hashlib.md5(text.encode('utf-8')).hexdigest() for text in texts]
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in self.sentiment_cache:
+                pending[key] = text
+        
+        if pending and self.sentiment_analyzer:
+            items = sorted(pending.items(), key=lambda item: len(item[1]))
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                batch_texts = [text for _, text in batch]
+                try:
+                    with torch.inference_mode():
+                        outputs = self.sentiment_analyzer(
+                            batch_texts, batch_size=len(batch_texts), truncation=True, max_length=512
+                        )
+                    labels = [self.map_sentiment_label(output) for output in outputs]
+                except Exception as e:
+                    print(f"模型情感分析失败，使用规则方法: {e}")
+                    labels = [self.rule_based_sentiment(text) for text in batch_texts]
+                for (key, _), label in zip(batch, labels):
+                    self.sentiment_cache[key] = label
+                if len(items) > self.batch_size and (start // self.batch_size) % 50 == 0:
+                    print(f"情感分析进度: {min(start + self.batch_size, len(items))}/{len(items)}")
         else:
-            return self.rule_based_sentiment(text)
+            for key, text in pending.items():
+                self.sentiment_cache[key] = self.rule_based_sentiment(text)
+        
+        return [self.sentiment_cache[key] for key in keys]
+    
+    def match_texts(self, texts: pd.Series) -> pd.DataFrame:
+        """
+        整列做关键词匹配
+        Args:
+            texts: 文本列
+
+        Returns: 与 texts 索引对齐的 is_gossip、keywords、category 列
+        """
+        rows = [self.keyword_matching(text) for text in texts]
+        return pd.DataFrame(rows, index=texts.index, columns=['is_gossip', 'keywords', 'category'])
     
-    def detect_negative_gossip(self):
-        """检测负面八卦舆情"""
+    def sentiment_series(self, texts: pd.Series) -> pd.Series:
+        """整列批量情感分析，返回与 texts 索引对齐的情感标签"""
+        return pd.Series(self.sentiment_analysis_batch(texts.tolist()), index=texts.index, dtype=object)
+    
+    def detect_negative_gossip(self, save: bool = True):
+        """
+        检测负面八卦舆情：先整列做关键词匹配，命中的文本再统一批量做情感分析
+        Args:
+            save: 是否保存检测结果，基准模式下不保存
+
+        Returns: 检测结果，negative_posts 和 negative_comments 为 DataFrame
+        """
         print("\\n=== 负面舆情检测 ===")
         
-        negative_posts = []
-        negative_comments = []
-        
         # 检测帖子
         print("正在分析帖子...")
-        for idx, row in self.notes_df.iterrows():
-            title = str(row['title']) if pd.notna(row['title']) else ""
-            desc = str(row['desc']) if pd.notna(row['desc']) else ""
+        notes = self.notes_df
+        with self.stage_timer.stage('帖子关键词匹配', len(notes)):
+            title = text_column(notes, 'title')
+            desc = text_column(notes, 'desc')
             full_text = title + " " + desc
-            
-            # 关键词匹配
-            is_gossip, keywords, category = self.keyword_matching(full_text)
-            
-            if is_gossip:
-                # 情感分析
-                sentiment = self.sentiment_analysis(full_text)
-                
-                if sentiment == 'NEGATIVE':
-                    negative_posts.append({
-                        'note_id': row['note_id'],
-                        'title': title,
-                        'desc': desc,
-                        'nickname': row['nickname'],
-                        'liked_count': row['liked_count'],
-                        'comment_count': row['comment_count'],
-                        'keywords': keywords,
-                        'category': category,
-                        'sentiment': sentiment,
-                        'content': full_text[:200] + "..." if len(full_text) > 200 else full_text
-                    })
-        
-        # 检测评论
+            matched = self.match_texts(full_text)
+        
+        # 情感分析
+        candidates = full_text[matched['is_gossip']]
+        with self.stage_timer.stage('帖子情感分析', len(candidates)):
+            sentiments = self.sentiment_series(candidates)
+        
+        with self.stage_timer.stage('组装负面帖子', len(notes)):
+            negative_index = sentiments.index[sentiments == 'NEGATIVE']
+            negative_text = full_text[negative_index]
+            negative_posts = notes.loc[negative_index].reindex(
+                columns=['note_id', 'nickname', 'liked_count', 'comment_count']
+            ).assign(
+                title=title[negative_index],
+                desc=desc[negative_index],
+                keywords=matched.loc[negative_index, 'keywords'],
+                category=matched.loc[negative_index, 'category'],
+                sentiment=sentiments[negative_index],
+                content=negative_text.where(negative_text.str.len() <= 200, negative_text.str[:200] + "..."),
+            )[['note_id', 'title', 'desc', 'nickname', 'liked_count', 'comment_count',
+               'keywords', 'category', 'sentiment', 'content']]
+        
+        # 检测评论，过滤太短的评论
         print("正在分析评论...")
-        for idx, row in self.comments_df.iterrows():
-            content = str(row['content']) if pd.notna(row['content']) else ""
-            
-            if len(content) < 5:  # 过滤太短的评论
-                continue
-                
-            # 关键词匹配
-            is_gossip, keywords, category = self.keyword_matching(content)
-            
-            if is_gossip:
-                # 情感分析
-                sentiment = self.sentiment_analysis(content)
-                
-                if sentiment == 'NEGATIVE':
-                    negative_comments.append({
-                        'comment_id': row['comment_id'],
-                        'note_id': row['note_id'],
-                        'content': content,
-                        'nickname': row['nickname'],
-                        'like_count': row['like_count'],
-                        'keywords': keywords,
-                        'category': category,
-                        'sentiment': sentiment
-                    })
+        comments = self.comments_df
+        with self.stage_timer.stage('评论关键词匹配', len(comments)):
+            content = text_column(comments, 'content')
+            content = content[content.str.len() >= 5]
+            matched = self.match_texts(content)
+        
+        # 情感分析
+        candidates = content[matched['is_gossip']]
+        with self.stage_timer.stage('评论情感分析', len(candidates)):
+            sentiments = self.sentiment_series(candidates)
+        
+        with self.stage_timer.stage('组装负面评论', len(comments)):
+            negative_index = sentiments.index[sentiments == 'NEGATIVE']
+            negative_comments = comments.loc[negative_index].reindex(
+                columns=['comment_id', 'note_id', 'nickname', 'like_count']
+            ).assign(
+                content=content[negative_index],
+                keywords=matched.loc[negative_index, 'keywords'],
+                category=matched.loc[negative_index, 'category'],
+                sentiment=sentiments[negative_index],
+            )[['comment_id', 'note_id', 'content', 'nickname', 'like_count', 'keywords', 'category', 'sentiment']]
         
-        # 保存检测结果
         results = {
             'detection_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'total_posts': len(self.notes_df),
@@ -342,8 +421,14 @@ class GossipSentimentAnalyzer:
             'negative_comments': negative_comments
         }
         
-        with open('data/negative_gossip_detection.json', 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        # 保存检测结果
+        if save:
+            with open('data/negative_gossip_detection.json', 'w', encoding='utf-8') as f:
+                json.dump({
+                    **results,
+                    'negative_posts': negative_posts.to_dict('records'),
+                    'negative_comments': negative_comments.to_dict('records'),
+                }, f, ensure_ascii=False, indent=2)
         
         print(f"检测完成！")
         print(f"总帖子数: {len(self.notes_df)}")
@@ -357,23 +442,19 @@ class GossipSentimentAnalyzer:
         """统计分析"""
         print("\\n=== 统计分析 ===")
         
-        # 1. 负面内容分类统计
-        post_categories = [item['category'] for item in results['negative_posts']]
-        comment_categories = [item['category'] for item in results['negative_comments']]
-        all_categories = post_categories + comment_categories
+        negative_items = pd.concat([
+            results['negative_posts'][['category', 'keywords']],
+            results['negative_comments'][['category', 'keywords']],
+        ], ignore_index=True)
         
-        category_counts = Counter(all_categories)
+        # 1. 负面内容分类统计
+        category_counts = count_values(negative_items['category'])
         
         # 2. 关键词频率统计
-        all_keywords = []
-        for item in results['negative_posts'] + results['negative_comments']:
-            all_keywords.extend(item['keywords'])
-        
-        keyword_counts = Counter(all_keywords)
+        keyword_counts = count_values(negative_items['keywords'])
         
         # 3. 时间分布分析（基于帖子数据）
-        negative_note_ids = {item['note_id'] for item in results['negative_posts']}
-        negative_notes_df = self.notes_df[self.notes_df['note_id'].isin(negative_note_ids)]
+        negative_notes_df = self.notes_df[self.notes_df['note_id'].isin(results['negative_posts']['note_id'])]
         
         if not negative_notes_df.empty and 'time' in negative_notes_df.columns:
             negative_notes_df['datetime'] = pd.to_datetime(negative_notes_df['time'], unit='ms')
@@ -384,18 +465,18 @@ class GossipSentimentAnalyzer:
         
         # 输出统计结果
         print("\\n负面内容分类统计:")
-        for category, count in category_counts.most_common():
+        for category, count in category_counts.items():
             print(f"{category}: {count}")
         
         print("\\n高频负面关键词 Top 10:")
-        for keyword, count in keyword_counts.most_common(10):
+        for keyword, count in keyword_counts.head(10).items():
             print(f"{keyword}: {count}")
         
         # 保存统计结果
         stats = {
-            'category_distribution': dict(category_counts),
-            'keyword_frequency': dict(keyword_counts.most_common(20)),
-            'time_distribution': dict(time_distribution) if not time_distribution.empty else {},
+            'category_distribution': counts_to_dict(category_counts),
+            'keyword_frequency': counts_to_dict(keyword_counts, top=20),
+            'time_distribution': counts_to_dict(time_distribution) if not time_distribution.empty else {},
             'negative_ratio': {
                 'posts': len(results['negative_posts']) / len(self.notes_df) * 100,
                 'comments': len(results['negative_comments']) / len(self.comments_df) * 100
@@ -531,7 +612,7 @@ class GossipSentimentAnalyzer:
 ### 负面帖子示例:
 """
         
-        for i, post in enumerate(results['negative_posts'][:3], 1):
+        for i, post in enumerate(results['negative_posts'].head(3).to_dict('records'), 1):
             report += f"""
 {i}. 标题: {post['title']}
    用户: {post['nickname']}
@@ -543,7 +624,7 @@ class GossipSentimentAnalyzer:
 ### 负面评论示例:
 """
         
-        for i, comment in enumerate(results['negative_comments'][:5], 1):
+        for i, comment in enumerate(results['negative_comments'].head(5).to_dict('records'), 1):
             report += f"""
 {i}. 用户: {comment['nickname']}
    匹配关键词: {', '.join(comment['keywords'][:3])}
@@ -614,7 +695,19 @@ class GossipSentimentAnalyzer:
 
 def main():
     """主函数"""
-    analyzer = GossipSentimentAnalyzer()
+    parser = argparse.ArgumentParser(description="娱乐八卦负面舆情检测")
+    parser.add_argument("--batch_size", type=int, default=32, help="情感模型每批推理的文本数")
+    parser.add_argument("--quantize", action="store_true", help="CPU 推理时使用动态量化（int8）模型")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="基准模式：只加载数据和检测负面舆情，不保存结果，输出各阶段每秒处理的行数")
+    args = parser.parse_args()
+    
+    analyzer = GossipSentimentAnalyzer(batch_size=args.batch_size, quantize=args.quantize)
+    if args.benchmark:
+        analyzer.detect_negative_gossip(save=False)
+        print("\\n=== 各阶段处理速度 ===")
+        print(analyzer.stage_timer.summary().to_string(index=False))
+        return
     analyzer.run_analysis()
 
 if __name__ == "__main__":
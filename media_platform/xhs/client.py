@@ -2,22 +2,32 @@
 
 import asyncio
 import json
+import os
 import re
+import time
+from contextlib import AsyncExitStack
 from typing import Any, Callable, Dict, List, Optional, Union
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
 
+import aiofiles
 import httpx
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 
 import config
 from base.base_crawler import AbstractApiClient
+from proxy.proxy_manager import ProxyManager
+from proxy.types import IpInfoModel
 from tools import utils
+from tools.adaptive_limiter import AdaptiveConcurrencyLimiter
+from tools.rate_limiter import AsyncRateLimiter
+from tools.response_cache import DiskResponseCache, ResponseCacheMiss
 from html import unescape
 
-from .exception import DataFetchError, IPBlockError
+from .exception import CaptchaError, DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
-from .help import get_search_id, sign
+from .help import get_search_id, parse_note_detail_from_html, sign
+from .signer import XhsSignerPool
 
 
 class XiaoHongShuClient(AbstractApiClient):
@@ -41,6 +51,176 @@ class XiaoHongShuClient(AbstractApiClient):
         self.NOTE_ABNORMAL_CODE = -510001
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self.signer = XhsSignerPool(playwright_page)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # 切换代理后被替换下来的连接池，上面可能还有进行中的请求，关闭客户端时统一关闭
+        self._retired_http_clients: List[httpx.AsyncClient] = []
+        self.proxy_manager: Optional[ProxyManager] = None
+        self.current_proxy: Optional[IpInfoModel] = None
+        self._rotate_lock = asyncio.Lock()
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._conn_stats: Dict[str, int] = {"requests": 0, "new_connections": 0}
+        # 未开启代理时，加大请求前的随机等待
+        self.rate_limiter = AsyncRateLimiter(
+            rates=config.CRAWLER_RATE_LIMITS,
+            jitter=(
+                config.CRAWLER_PROXY_JITTER_SEC
+                if config.ENABLE_IP_PROXY
+                else config.CRAWLER_MAX_SLEEP_SEC
+            ),
+        )
+        # 整个爬虫共享的并发控制，未开启自适应时固定为 MAX_CONCURRENCY_NUM
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=config.MAX_CONCURRENCY_NUM,
+            min_limit=config.ADAPTIVE_CONCURRENCY_MIN_NUM if config.ENABLE_ADAPTIVE_CONCURRENCY else config.MAX_CONCURRENCY_NUM,
+            max_limit=config.ADAPTIVE_CONCURRENCY_MAX_NUM if config.ENABLE_ADAPTIVE_CONCURRENCY else config.MAX_CONCURRENCY_NUM,
+            latency_threshold=config.ADAPTIVE_CONCURRENCY_LATENCY_THRESHOLD,
+            cooldown=config.ADAPTIVE_CONCURRENCY_COOLDOWN_SEC,
+            severe_error_types=(IPBlockError, CaptchaError),
+            error_types=(DataFetchError,),
+        )
+        # 网页HTML的本地缓存，仅在开发调试、离线回放时开启
+        self.response_cache: Optional[DiskResponseCache] = None
+        if config.ENABLE_HTTP_RESPONSE_CACHE:
+            self.response_cache = DiskResponseCache(
+                config.HTTP_RESPONSE_CACHE_DIR % config.PLATFORM,
+                ttl=config.HTTP_RESPONSE_CACHE_TTL,
+                replay=config.HTTP_RESPONSE_CACHE_REPLAY,
+            )
+
+    async def open(self):
+        """
+        创建整个爬取过程复用的httpx连接池（keep-alive，可选HTTP/2）
+        Returns:
+
+        """
+        if self._http_client is not None and not self._http_client.is_closed:
+            return
+        http2 = config.ENABLE_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                utils.logger.warning(
+                    "[XiaoHongShuClient.open] h2 is not installed, fallback to HTTP/1.1"
+                )
+                http2 = False
+        limits = httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        )
+        self._http_client = httpx.AsyncClient(
+            proxies=self.proxies, http2=http2, limits=limits, timeout=self.timeout
+        )
+        utils.logger.info(
+            f"[XiaoHongShuClient.open] http client opened, http2: {http2}, limits: {limits}"
+        )
+
+    async def close(self):
+        """
+        关闭连接池
+        Returns:
+
+        """
+        if self.response_cache:
+            utils.logger.info(
+                f"[XiaoHongShuClient.close] response cache hits: {self.response_cache.hits}, misses: {self.response_cache.misses}"
+            )
+        http_client, self._http_client = self._http_client, None
+        retired_http_clients, self._retired_http_clients = self._retired_http_clients, []
+        # 每个连接池都会被关闭，即使前面的关闭抛出了异常
+        async with AsyncExitStack() as exit_stack:
+            if http_client is not None:
+                exit_stack.push_async_callback(http_client.aclose)
+            for retired_http_client in retired_http_clients:
+                exit_stack.push_async_callback(retired_http_client.aclose)
+        if http_client is not None:
+            utils.logger.info(
+                f"[XiaoHongShuClient.close] http client closed, connection stats: {self.connection_stats}"
+            )
+
+    @property
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        连接复用统计：请求总数、新建连接数、复用连接的请求数
+        Returns:
+
+        """
+        stats = dict(self._conn_stats)
+        stats["reused_connections"] = max(stats["requests"] - stats["new_connections"], 0)
+        return stats
+
+    def set_proxy_manager(self, proxy_manager: ProxyManager, current_proxy: IpInfoModel):
+        """
+        设置代理管理器，请求结果会上报给它，IP被封时自动切换代理
+        Args:
+            proxy_manager: 代理管理器
+            current_proxy: 当前使用的代理
+
+        Returns:
+
+        """
+        self.proxy_manager = proxy_manager
+        self.current_proxy = current_proxy
+
+    async def rotate_proxy(self, blocked_proxy: Optional[IpInfoModel]):
+        """
+        IP被封后切换到代理管理器中的下一个代理，并发请求同时被封时只切换一次
+        Args:
+            blocked_proxy: 被封时正在使用的代理
+
+        Returns:
+
+        """
+        if self.proxy_manager is None:
+            return
+        async with self._rotate_lock:
+            if blocked_proxy is not self.current_proxy:
+                return
+            new_proxy = await self.proxy_manager.rotate(blocked_proxy)
+            self.current_proxy = new_proxy
+            _, self.proxies = utils.format_proxy_info(new_proxy)
+            if self._http_client is not None:
+                self._retired_http_clients.append(self._http_client)
+                self._http_client = None
+            await self.open()
+
+    def _report_proxy(self, proxy: Optional[IpInfoModel], success: bool, latency: Optional[float] = None):
+        if self.proxy_manager is not None and proxy is not None:
+            self.proxy_manager.report(proxy, success, latency)
+
+    async def _trace(self, event_name: str, info: Dict):
+        """httpcore trace 回调，每新建一个TCP连接计数一次"""
+        if event_name == "connection.connect_tcp.complete":
+            self._conn_stats["new_connections"] += 1
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        通过共享连接池发送请求，并按域名限制同时进行的请求数
+        Args:
+            method: 请求方法
+            url: 请求的URL
+            **kwargs: 其他请求参数
+
+        Returns:
+
+        """
+        if self._http_client is None or self._http_client.is_closed:
+            await self.open()
+        async with self._get_host_semaphore(url):
+            self._conn_stats["requests"] += 1
+            return await self._http_client.request(
+                method, url, extensions={"trace": self._trace}, **kwargs
+            )
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(config.HTTP_MAX_CONNECTIONS_PER_HOST)
+            self._host_semaphores[host] = semaphore
+        return semaphore
 
     async def _pre_headers(self, url: str, data=None) -> Dict:
         """
@@ -52,25 +232,23 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        encrypt_params = await self.playwright_page.evaluate(
-            "([url, data]) => window._webmsxyw(url,data)", [url, data]
-        )
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
+        encrypt_params, b1 = await self.signer.sign(url, data)
         signs = sign(
             a1=self.cookie_dict.get("a1", ""),
-            b1=local_storage.get("b1", ""),
+            b1=b1,
             x_s=encrypt_params.get("X-s", ""),
             x_t=str(encrypt_params.get("X-t", "")),
         )
 
+        # 每个请求使用独立的请求头，并发请求之间不会互相覆盖签名
         headers = {
+            **self.headers,
             "X-S": signs["x-s"],
             "X-T": signs["x-t"],
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
         }
-        self.headers.update(headers)
-        return self.headers
+        return headers
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -87,26 +265,65 @@ class XiaoHongShuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop("return_response", False)
 
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        async with self.concurrency_limiter.slot():
+            proxy = self.current_proxy
+            started_at = time.monotonic()
+            try:
+                response = await self._send(method, url, **kwargs)
+            except httpx.TransportError:
+                self._report_proxy(proxy, success=False)
+                raise
+            self._report_proxy(proxy, success=True, latency=time.monotonic() - started_at)
+
+            if response.status_code == 471 or response.status_code == 461:
+                # someday someone maybe will bypass captcha
+                verify_type = response.headers["Verifytype"]
+                verify_uuid = response.headers["Verifyuuid"]
+                raise CaptchaError(
+                    f"出现验证码，请求失败，Verifytype: {verify_type}，Verifyuuid: {verify_uuid}, Response: {response}"
+                )
 
-        if response.status_code == 471 or response.status_code == 461:
-            # someday someone maybe will bypass captcha
-            verify_type = response.headers["Verifytype"]
-            verify_uuid = response.headers["Verifyuuid"]
-            raise Exception(
-                f"出现验证码，请求失败，Verifytype: {verify_type}，Verifyuuid: {verify_uuid}, Response: {response}"
-            )
+            if return_response:
+                return response.text
+            data: Dict = response.json()
+            if data["success"]:
+                return data.get("data", data.get("success", {}))
+            elif data["code"] == self.IP_ERROR_CODE:
+                # 切换代理后由 retry 重新发起请求
+                await self.rotate_proxy(proxy)
+                raise IPBlockError(self.IP_ERROR_STR)
+            else:
+                raise DataFetchError(data.get("msg", None))
 
-        if return_response:
-            return response.text
-        data: Dict = response.json()
-        if data["success"]:
-            return data.get("data", data.get("success", {}))
-        elif data["code"] == self.IP_ERROR_CODE:
-            raise IPBlockError(self.IP_ERROR_STR)
-        else:
-            raise DataFetchError(data.get("msg", None))
+    async def get_html(self, url: str, headers: Dict, endpoint: str, cache_url: str = "") -> str:
+        """
+        请求网页HTML，开启响应缓存时优先读取本地缓存，回放模式下不发起网络请求
+        Args:
+            url: 请求的URL
+            headers: 请求头，是否携带Cookie会影响返回的内容，作为缓存key的一部分
+            endpoint: 限流使用的接口类型
+            cache_url: 缓存使用的URL，用于去掉xsec_token这类每次都会变化的参数，默认使用url
+
+        Returns: 网页内容，回放模式下未缓存时返回空字符串
+
+        """
+        cache_url = cache_url or url
+        vary = "cookie" if headers.get("Cookie") else "anonymous"
+        if self.response_cache:
+            try:
+                html = await self.response_cache.get(cache_url, vary)
+            except ResponseCacheMiss as e:
+                utils.logger.warning(f"[XiaoHongShuClient.get_html] Replay mode: {e}")
+                return ""
+            if html is not None:
+                return html
+
+        await self.rate_limiter.wait(endpoint)
+        html = await self.request(method="GET", url=url, return_response=True, headers=headers)
+        # 只缓存正常的页面，验证码、风控等页面不缓存
+        if self.response_cache and "window.__INITIAL_STATE__" in html:
+            await self.response_cache.set(cache_url, html, vary)
+        return html
 
     async def get(self, uri: str, params=None) -> Dict:
         """
@@ -146,16 +363,65 @@ class XiaoHongShuClient(AbstractApiClient):
             **kwargs,
         )
 
-    async def get_note_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(
-                    f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
-                )
-                return None
-            else:
-                return response.content
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    async def download_note_media(self, url: str, file_path: str) -> bool:
+        """
+        流式下载图片/视频，边下载边写入磁盘，不在内存中保留完整内容
+        下载过程中写入 file_path.part，中断后重试或再次下载时通过 HTTP Range 断点续传
+        已存在的文件同样按大小发起 Range 请求确认是否完整：之前被截断的文件续传，与服务端大小不一致的文件重新下载
+        Args:
+            url: 媒体地址
+            file_path: 保存路径
+
+        Returns: 是否下载成功
+
+        """
+        part_file_path = f"{file_path}.part"
+        local_file_path = file_path if os.path.exists(file_path) else part_file_path
+        downloaded_size = os.path.getsize(local_file_path) if os.path.exists(local_file_path) else 0
+        headers = {"Range": f"bytes={downloaded_size}-"} if downloaded_size else {}
+
+        if self._http_client is None or self._http_client.is_closed:
+            await self.open()
+        async with self._get_host_semaphore(url):
+            self._conn_stats["requests"] += 1
+            async with self._http_client.stream(
+                "GET", url, headers=headers, extensions={"trace": self._trace}
+            ) as response:
+                if response.status_code == 416 and downloaded_size:
+                    # 请求的起点已经超出文件大小，Content-Range 为 bytes */总大小
+                    total_size = response.headers.get("Content-Range", "").rpartition("/")[2]
+                    if total_size.isdigit() and int(total_size) != downloaded_size:
+                        # 本地文件比服务端的大，说明服务端的文件已被替换，删除后由重试从头下载
+                        os.remove(local_file_path)
+                        raise Exception(
+                            f"[XiaoHongShuClient.download_note_media] local size {downloaded_size} of {file_path} "
+                            f"does not match remote size {total_size}"
+                        )
+                    os.replace(local_file_path, file_path)
+                    return True
+                if response.status_code not in (200, 206):
+                    utils.logger.error(
+                        f"[XiaoHongShuClient.download_note_media] request {url} err, status: {response.status_code}"
+                    )
+                    return False
+                if (
+                    response.status_code == 200
+                    and downloaded_size
+                    and response.headers.get("Content-Length") == str(downloaded_size)
+                ):
+                    # 服务端不支持 Range，但本地文件大小与服务端一致，不再重复下载
+                    os.replace(local_file_path, file_path)
+                    return True
+                # 服务端不支持 Range 时返回 200，需要从头写入；续传已存在的文件时先转为 .part 文件
+                mode = "ab" if response.status_code == 206 else "wb"
+                if mode == "ab" and local_file_path != part_file_path:
+                    os.replace(local_file_path, part_file_path)
+                async with aiofiles.open(part_file_path, mode) as f:
+                    async for chunk in response.aiter_bytes():
+                        await f.write(chunk)
+        os.replace(part_file_path, file_path)
+        return True
 
     async def pong(self) -> bool:
         """
@@ -189,6 +455,7 @@ class XiaoHongShuClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self.signer.invalidate_b1()
 
     async def get_note_by_keyword(
         self,
@@ -220,6 +487,7 @@ class XiaoHongShuClient(AbstractApiClient):
             "sort": sort.value,
             "note_type": note_type.value,
         }
+        await self.rate_limiter.wait("search")
         return await self.post(uri, data)
 
     async def get_note_by_id(
@@ -246,6 +514,10 @@ class XiaoHongShuClient(AbstractApiClient):
             "xsec_token": xsec_token,
         }
         uri = "/api/sns/web/v1/feed"
+        if self.response_cache and self.response_cache.replay:
+            # 回放模式只回放网页，API接口不发起请求
+            return dict()
+        await self.rate_limiter.wait("note_detail")
         res = await self.post(uri, data)
         if res and res.get("items"):
             res_dict: Dict = res["items"][0]["note_card"]
@@ -277,6 +549,7 @@ class XiaoHongShuClient(AbstractApiClient):
             "image_formats": "jpg,webp,avif",
             "xsec_token": xsec_token,
         }
+        await self.rate_limiter.wait("comments")
         return await self.get(uri, params)
 
     async def get_note_sub_comments(
@@ -309,30 +582,40 @@ class XiaoHongShuClient(AbstractApiClient):
             "top_comment_id": "",
             "xsec_token": xsec_token,
         }
+        await self.rate_limiter.wait("sub_comments")
         return await self.get(uri, params)
 
     async def get_note_all_comments(
         self,
         note_id: str,
         xsec_token: str,
-        crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: str = "",
+        cursor_callback: Optional[Callable] = None,
+        since_create_time: int = 0,
+        since_comment_id: str = "",
     ) -> List[Dict]:
         """
         获取指定笔记下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
+        传入上次爬到的最新评论(since_create_time/since_comment_id)时为增量模式，只保存更新的评论，
+        某一页没有更新的评论或者遇到了上次的最新评论就停止翻页
         Args:
             note_id: 笔记ID
             xsec_token: 验证token
-            crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
             max_count: 一次笔记爬取的最大评论数量
+            cursor: 开始爬取的评论游标，断点续爬时传入上次保存的游标
+            cursor_callback: 每页评论保存后的回调，参数为 (note_id, 下一页游标, 是否还有更多, 本次已爬取数量)
+            since_create_time: 已保存的最新一级评论的创建时间（毫秒），0 表示全量爬取
+            since_comment_id: 已保存的最新一级评论ID
         Returns:
 
         """
         result = []
         comments_has_more = True
-        comments_cursor = ""
+        comments_cursor = cursor
+        sub_comments_total = 0
         while comments_has_more and len(result) < max_count:
             comments_res = await self.get_note_comments(
                 note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
@@ -345,35 +628,55 @@ class XiaoHongShuClient(AbstractApiClient):
                 )
                 break
             comments = comments_res["comments"]
+            if since_create_time or since_comment_id:
+                reached_known = any(comment.get("id") == since_comment_id for comment in comments)
+                comments = [
+                    comment
+                    for comment in comments
+                    if comment.get("create_time", 0) > since_create_time and comment.get("id") != since_comment_id
+                ]
+                if reached_known or not comments:
+                    utils.logger.info(
+                        f"[XiaoHongShuClient.get_note_all_comments] Reached the comments crawled before, note_id: {note_id}"
+                    )
+                    comments_has_more = False
             if len(result) + len(comments) > max_count:
                 comments = comments[: max_count - len(result)]
-            if callback:
+            if callback and comments:
                 await callback(note_id, comments)
-            await asyncio.sleep(crawl_interval)
             result.extend(comments)
-            sub_comments = await self.get_comments_all_sub_comments(
-                comments=comments,
-                xsec_token=xsec_token,
-                crawl_interval=crawl_interval,
-                callback=callback,
-            )
-            result.extend(sub_comments)
+            sub_comments_remaining = config.CRAWLER_MAX_SUB_COMMENTS_COUNT_SINGLENOTES - sub_comments_total
+            if config.CRAWLER_MAX_SUB_COMMENTS_COUNT_SINGLENOTES <= 0 or sub_comments_remaining > 0:
+                sub_comments = await self.get_comments_all_sub_comments(
+                    comments=comments,
+                    xsec_token=xsec_token,
+                    callback=callback,
+                    max_count=max(sub_comments_remaining, 0),
+                )
+                sub_comments_total += len(sub_comments)
+                result.extend(sub_comments)
+            if cursor_callback:
+                await cursor_callback(note_id, comments_cursor, comments_has_more, len(result))
         return result
 
     async def get_comments_all_sub_comments(
         self,
         comments: List[Dict],
         xsec_token: str,
-        crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        max_count: Optional[int] = None,
+        concurrency: Optional[int] = None,
     ) -> List[Dict]:
         """
         获取指定一级评论下的所有二级评论, 该方法会一直查找一级评论下的所有二级评论信息
+        多个一级评论的二级评论并发展开（请求节奏仍由 rate_limiter 控制），按 sub_comment_count 从多到少优先展开，
+        设置了数量上限时优先保存回复最多的评论串
         Args:
             comments: 评论列表
             xsec_token: 验证token
-            crawl_interval: 爬取一次评论的延迟单位（秒）
             callback: 一次评论爬取结束后
+            max_count: 一次笔记最多爬取的二级评论数量，默认为 CRAWLER_MAX_SUB_COMMENTS_COUNT_SINGLENOTES，<=0 表示不限制
+            concurrency: 同时展开的一级评论数，默认为 SUB_COMMENTS_CONCURRENCY_NUM
 
         Returns:
 
@@ -384,46 +687,80 @@ class XiaoHongShuClient(AbstractApiClient):
             )
             return []
 
+        if max_count is None:
+            max_count = config.CRAWLER_MAX_SUB_COMMENTS_COUNT_SINGLENOTES
+        budget = max_count if max_count > 0 else float("inf")
         result = []
-        for comment in comments:
-            note_id = comment.get("note_id")
-            sub_comments = comment.get("sub_comments")
+
+        def take(sub_comments: List[Dict], root_comment_id: str) -> List[Dict]:
+            nonlocal budget
+            if budget <= 0:
+                return []
+            if len(sub_comments) > budget:
+                sub_comments = sub_comments[: int(budget)]
+            budget -= len(sub_comments)
+            # 记录所属的一级评论，保存时据此计算评论树的 root_id 和 depth
+            for sub_comment in sub_comments:
+                sub_comment.setdefault("root_comment_id", root_comment_id)
+            result.extend(sub_comments)
+            return sub_comments
+
+        def sub_comment_count(comment: Dict) -> int:
+            try:
+                return int(comment.get("sub_comment_count") or 0)
+            except (TypeError, ValueError):
+                return 0
+
+        root_comments = sorted(comments, key=sub_comment_count, reverse=True)
+        # 一级评论接口中附带的前几条二级评论无需请求，直接保存
+        for comment in root_comments:
+            sub_comments = take(comment.get("sub_comments") or [], comment.get("id"))
             if sub_comments and callback:
-                await callback(note_id, sub_comments)
+                await callback(comment.get("note_id"), sub_comments)
 
-            sub_comment_has_more = comment.get("sub_comment_has_more")
-            if not sub_comment_has_more:
-                continue
+        semaphore = asyncio.Semaphore(concurrency or config.SUB_COMMENTS_CONCURRENCY_NUM)
 
+        async def expand(comment: Dict):
+            note_id = comment.get("note_id")
             root_comment_id = comment.get("id")
             sub_comment_cursor = comment.get("sub_comment_cursor")
-
-            while sub_comment_has_more:
-                comments_res = await self.get_note_sub_comments(
-                    note_id=note_id,
-                    root_comment_id=root_comment_id,
-                    xsec_token=xsec_token,
-                    num=10,
-                    cursor=sub_comment_cursor,
-                )
-                
-                if comments_res is None:
-                    utils.logger.info(
-                        f"[XiaoHongShuClient.get_comments_all_sub_comments] No response found for note_id: {note_id}"
+            sub_comment_has_more = True
+            async with semaphore:
+                while sub_comment_has_more and budget > 0:
+                    comments_res = await self.get_note_sub_comments(
+                        note_id=note_id,
+                        root_comment_id=root_comment_id,
+                        xsec_token=xsec_token,
+                        num=10,
+                        cursor=sub_comment_cursor,
                     )
-                    continue
-                sub_comment_has_more = comments_res.get("has_more", False)
-                sub_comment_cursor = comments_res.get("cursor", "")
-                if "comments" not in comments_res:
-                    utils.logger.info(
-                        f"[XiaoHongShuClient.get_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
-                    )
-                    break
-                comments = comments_res["comments"]
-                if callback:
-                    await callback(note_id, comments)
-                await asyncio.sleep(crawl_interval)
-                result.extend(comments)
+                    if comments_res is None:
+                        utils.logger.info(
+                            f"[XiaoHongShuClient.get_comments_all_sub_comments] No response found for note_id: {note_id}"
+                        )
+                        break
+                    sub_comment_has_more = comments_res.get("has_more", False)
+                    sub_comment_cursor = comments_res.get("cursor", "")
+                    if "comments" not in comments_res:
+                        utils.logger.info(
+                            f"[XiaoHongShuClient.get_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
+                        )
+                        break
+                    sub_comments = take(comments_res["comments"], root_comment_id)
+                    if sub_comments and callback:
+                        await callback(note_id, sub_comments)
+
+        # 任务按优先级顺序创建，信号量先到先得，回复多的评论串先展开
+        tasks = [
+            asyncio.create_task(expand(comment))
+            for comment in root_comments
+            if comment.get("sub_comment_has_more")
+        ]
+        for res in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(res, Exception):
+                utils.logger.error(
+                    f"[XiaoHongShuClient.get_comments_all_sub_comments] Expand sub comments error: {res}"
+                )
         return result
 
     async def get_creator_info(self, user_id: str) -> Dict:
@@ -433,8 +770,8 @@ class XiaoHongShuClient(AbstractApiClient):
         eg: https://www.xiaohongshu.com/user/profile/59d8cb33de5fb4696bf17217
         """
         uri = f"/user/profile/{user_id}"
-        html_content = await self.request(
-            "GET", self._domain + uri, return_response=True, headers=self.headers
+        html_content = await self.get_html(
+            self._domain + uri, headers=self.headers, endpoint="creator_notes"
         )
         match = re.search(
             r"<script>window.__INITIAL_STATE__=(.+)<\/script>", html_content, re.M
@@ -468,28 +805,35 @@ class XiaoHongShuClient(AbstractApiClient):
             "num": page_size,
             "image_formats": "jpg,webp,avif",
         }
+        await self.rate_limiter.wait("creator_notes")
         return await self.get(uri, data)
 
     async def get_all_notes_by_creator(
         self,
         user_id: str,
-        crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        cursor: str = "",
+        cursor_callback: Optional[Callable] = None,
+        max_count: Optional[int] = None,
     ) -> List[Dict]:
         """
         获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
         Args:
             user_id: 用户ID
-            crawl_interval: 爬取一次的延迟单位（秒）
             callback: 一次分页爬取结束后的更新回调函数
+            cursor: 开始爬取的笔记游标，断点续爬时传入上次保存的游标
+            cursor_callback: 每页笔记处理后的回调，参数为 (user_id, 下一页游标, 是否还有更多, 本次已爬取数量)
+            max_count: 最多爬取的笔记数量，默认为 CRAWLER_MAX_NOTES_COUNT
 
         Returns:
 
         """
+        if max_count is None:
+            max_count = config.CRAWLER_MAX_NOTES_COUNT
         result = []
         notes_has_more = True
-        notes_cursor = ""
-        while notes_has_more and len(result) < config.CRAWLER_MAX_NOTES_COUNT:
+        notes_cursor = cursor
+        while notes_has_more and len(result) < max_count:
             notes_res = await self.get_notes_by_creator(user_id, notes_cursor)
             if not notes_res:
                 utils.logger.error(
@@ -510,7 +854,7 @@ class XiaoHongShuClient(AbstractApiClient):
                 f"[XiaoHongShuClient.get_all_notes_by_creator] got user_id:{user_id} notes len : {len(notes)}"
             )
 
-            remaining = config.CRAWLER_MAX_NOTES_COUNT - len(result)
+            remaining = max_count - len(result)
             if remaining <= 0:
                 break
 
@@ -519,7 +863,8 @@ class XiaoHongShuClient(AbstractApiClient):
                 await callback(notes_to_add)
 
             result.extend(notes_to_add)
-            await asyncio.sleep(crawl_interval)
+            if cursor_callback:
+                await cursor_callback(user_id, notes_cursor, notes_has_more, len(result))
 
         utils.logger.info(
             f"[XiaoHongShuClient.get_all_notes_by_creator] Finished getting notes for user {user_id}, total: {len(result)}"
@@ -561,31 +906,6 @@ class XiaoHongShuClient(AbstractApiClient):
 
         """
 
-        def camel_to_underscore(key):
-            return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
-
-        def transform_json_keys(json_data):
-            data_dict = json.loads(json_data)
-            dict_new = {}
-            for key, value in data_dict.items():
-                new_key = camel_to_underscore(key)
-                if not value:
-                    dict_new[new_key] = value
-                elif isinstance(value, dict):
-                    dict_new[new_key] = transform_json_keys(json.dumps(value))
-                elif isinstance(value, list):
-                    dict_new[new_key] = [
-                        (
-                            transform_json_keys(json.dumps(item))
-                            if (item and isinstance(item, dict))
-                            else item
-                        )
-                        for item in value
-                    ]
-                else:
-                    dict_new[new_key] = value
-            return dict_new
-
         url = (
             "https://www.xiaohongshu.com/explore/"
             + note_id
@@ -595,21 +915,14 @@ class XiaoHongShuClient(AbstractApiClient):
         if not enable_cookie:
             del copy_headers["Cookie"]
 
-        html = await self.request(
-            method="GET", url=url, return_response=True, headers=copy_headers
+        html = await self.get_html(
+            url,
+            headers=copy_headers,
+            endpoint="note_detail",
+            cache_url="https://www.xiaohongshu.com/explore/" + note_id,
         )
 
-        def get_note_dict(html):
-            state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[
-                0
-            ].replace("undefined", '""')
-
-            if state != "{}":
-                note_dict = transform_json_keys(state)
-                return note_dict["note"]["note_detail_map"][note_id]["note"]
-            return {}
-
         try:
-            return get_note_dict(html)
+            return parse_note_detail_from_html(html, note_id)
         except:
             return None
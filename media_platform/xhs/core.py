@@ -2,9 +2,8 @@
 
 import asyncio
 import os
-import random
-import time
 from asyncio import Task
+from contextlib import AsyncExitStack
 from typing import Dict, List, Optional, Tuple
 
 from playwright.async_api import BrowserContext, BrowserType, Page, Playwright, async_playwright
@@ -14,16 +13,20 @@ import config
 from base.base_crawler import AbstractCrawler
 from config import CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
 from model.m_xiaohongshu import NoteUrlInfo
-from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
+from proxy.proxy_ip_pool import IpInfoModel
+from proxy.proxy_manager import ProxyManager, create_proxy_manager
 from store import xhs as xhs_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.checkpoint import CrawlCheckpoint
+from tools.media_downloader import AsyncMediaDownloader
+from tools.seen_index import SeenIndex
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
 from .exception import DataFetchError
 from .field import SearchSortType
-from .help import parse_note_info_from_note_url, get_search_id
+from .help import get_newest_first_level_comment, get_search_id, parse_note_info_from_note_url
 from .login import XiaoHongShuLogin
 
 
@@ -32,25 +35,45 @@ class XiaoHongShuCrawler(AbstractCrawler):
     xhs_client: XiaoHongShuClient
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
+    media_downloader: AsyncMediaDownloader
+    checkpoint: CrawlCheckpoint
+    seen_index: SeenIndex
 
     def __init__(self) -> None:
         self.index_url = "https://www.xiaohongshu.com"
         # self.user_agent = utils.get_user_agent()
         self.user_agent = config.UA if config.UA else "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
         self.cdp_manager = None
+        self.proxy_manager: Optional[ProxyManager] = None
+        # (keyword, page) -> [unfinished note count, whether any note failed]
+        self.search_page_progress: Dict[Tuple[str, int], List] = {}
+
+    @property
+    def max_concurrency_num(self) -> int:
+        """
+        Upper bound of the crawling tasks, the requests actually in flight are limited by the
+        client's shared (adaptive) concurrency limiter
+        """
+        if config.ENABLE_ADAPTIVE_CONCURRENCY:
+            return max(config.ADAPTIVE_CONCURRENCY_MAX_NUM, config.MAX_CONCURRENCY_NUM)
+        return config.MAX_CONCURRENCY_NUM
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
-        if config.ENABLE_IP_PROXY:
-            ip_proxy_pool = await create_ip_pool(
-                config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
-            )
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
-            playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
-                ip_proxy_info
-            )
+        ip_proxy_info: Optional[IpInfoModel] = None
+        # Every resource registers its close right after it is opened, the closes run in reverse order
+        # and each one still runs when an earlier one raised, so the pooled connections are always released
+        async with AsyncExitStack() as exit_stack:
+            if config.ENABLE_IP_PROXY:
+                # proxies are validated and replenished in the background, the api client rotates them on IPBlockError
+                self.proxy_manager = await create_proxy_manager(config.IP_PROXY_POOL_COUNT)
+                exit_stack.push_async_callback(self.proxy_manager.close)
+                ip_proxy_info = await self.proxy_manager.get_proxy()
+                playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(
+                    ip_proxy_info
+                )
 
-        async with async_playwright() as playwright:
+            playwright = await exit_stack.enter_async_context(async_playwright())
             # 根据配置选择启动模式
             if config.ENABLE_CDP_MODE:
                 utils.logger.info("[XiaoHongShuCrawler] 使用CDP模式启动浏览器")
@@ -83,6 +106,16 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
             # Create a client to interact with the xiaohongshu website.
             self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
+            if self.proxy_manager:
+                self.xhs_client.set_proxy_manager(self.proxy_manager, ip_proxy_info)
+            await self.xhs_client.open()
+            exit_stack.push_async_callback(self.xhs_client.close)
+            self.media_downloader = AsyncMediaDownloader(
+                self.xhs_client.download_note_media,
+                concurrency=config.MEDIA_DOWNLOAD_CONCURRENCY,
+                queue_size=config.MEDIA_DOWNLOAD_QUEUE_SIZE,
+            )
+            exit_stack.push_async_callback(self.media_downloader.close)
             if not await self.xhs_client.pong():
                 login_obj = XiaoHongShuLogin(
                     login_type=config.LOGIN_TYPE,
@@ -96,7 +129,21 @@ class XiaoHongShuCrawler(AbstractCrawler):
                     browser_context=self.browser_context
                 )
 
+            # More sign pages let request signing scale with the concurrency setting
+            await self.xhs_client.signer.add_pages(
+                self.browser_context,
+                pool_size=config.XHS_SIGN_PAGE_POOL_SIZE or self.max_concurrency_num,
+                url=self.index_url,
+            )
+
             crawler_type_var.set(config.CRAWLER_TYPE)
+            self.seen_index = self.create_seen_index()
+            exit_stack.callback(self.close_seen_index)
+            self.checkpoint = self.create_checkpoint()
+            exit_stack.callback(self.checkpoint.close)
+            # the progress is committed only after the store wrote out the rows it covers
+            exit_stack.push_async_callback(self.flush_store_and_commit)
+            exit_stack.push_async_callback(self.cancel_task, asyncio.create_task(self.commit_progress_periodically()))
             if config.CRAWLER_TYPE == "search":
                 # Search for notes and retrieve their comment information.
                 await self.search()
@@ -108,83 +155,271 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 await self.get_creators_and_notes()
             else:
                 pass
+            if config.CLEAR_CRAWL_CHECKPOINT_ON_FINISH:
+                # the crawl finished normally, the next run starts from scratch
+                self.checkpoint.clear()
+
+            utils.logger.info(
+                f"[XiaoHongShuCrawler.start] Xhs Crawler finished ..., concurrency stats: {self.xhs_client.concurrency_limiter.stats}"
+            )
+
+    async def commit_progress(self) -> None:
+        """
+        Commit the checkpoint records and seen marks saved so far, after the store wrote out its buffered rows,
+        so a record is never committed while the rows it covers can still be lost
+        """
+        checkpoint_rows, seen_rows = self.checkpoint.pending_rows(), self.seen_index.pending_rows()
+        await xhs_store.sync_store()
+        self.checkpoint.commit(checkpoint_rows)
+        self.seen_index.commit(seen_rows)
+
+    async def commit_progress_periodically(self) -> None:
+        """Commit the progress every CRAWL_PROGRESS_COMMIT_INTERVAL seconds until cancelled"""
+        while True:
+            await asyncio.sleep(config.CRAWL_PROGRESS_COMMIT_INTERVAL)
+            commit = asyncio.ensure_future(self.commit_progress())
+            try:
+                # shield: cancelling the task at shutdown must not interrupt a store write
+                await asyncio.shield(commit)
+            except asyncio.CancelledError:
+                await asyncio.gather(commit, return_exceptions=True)
+                raise
+            except Exception as e:
+                utils.logger.error(f"[XiaoHongShuCrawler.commit_progress_periodically] commit crawl progress error: {e}")
 
-            utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
+    @staticmethod
+    async def cancel_task(task: Task) -> None:
+        """Cancel a background task and wait until it exits"""
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def flush_store_and_commit(self) -> None:
+        """Write out the store at shutdown, then commit the rest of the progress"""
+        checkpoint_rows, seen_rows = self.checkpoint.pending_rows(), self.seen_index.pending_rows()
+        await xhs_store.flush_store()
+        self.checkpoint.commit(checkpoint_rows)
+        self.seen_index.commit(seen_rows)
+
+    def close_seen_index(self) -> None:
+        """Log how many items the seen index skipped, then close it"""
+        utils.logger.info(
+            f"[XiaoHongShuCrawler.close_seen_index] Skipped items crawled within {config.SEEN_INDEX_RECRAWL_TTL}s: {self.seen_index.skipped_counts}"
+        )
+        self.seen_index.close()
 
     async def search(self) -> None:
-        """Search for notes and retrieve their comment information."""
+        """
+        Search for notes and retrieve their comment information.
+        The crawl is a pipeline: search pages -> note detail -> store -> comments, the stages are joined
+        by bounded queues, so the next search page is fetched while the comments of earlier notes are crawled
+        """
         utils.logger.info(
             "[XiaoHongShuCrawler.search] Begin search xiaohongshu keywords"
         )
+        queue_size = config.SEARCH_PIPELINE_QUEUE_SIZE
+        note_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        store_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        comment_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+        detail_concurrency = config.SEARCH_PIPELINE_DETAIL_CONCURRENCY or self.max_concurrency_num
+        comment_concurrency = config.SEARCH_PIPELINE_COMMENT_CONCURRENCY or self.max_concurrency_num
+        detail_semaphore = asyncio.Semaphore(detail_concurrency)
+        comment_semaphore = asyncio.Semaphore(comment_concurrency)
+        workers: List[Task] = [
+            asyncio.create_task(self.note_detail_worker(note_queue, store_queue, comment_queue, detail_semaphore))
+            for _ in range(detail_concurrency)
+        ]
+        workers.append(asyncio.create_task(self.note_store_worker(store_queue, comment_queue)))
+        workers.extend(
+            asyncio.create_task(self.note_comment_worker(comment_queue, comment_semaphore))
+            for _ in range(comment_concurrency)
+        )
+        try:
+            for keyword in config.KEYWORDS.split(","):
+                await self.search_keyword_notes(keyword, note_queue)
+            # each stage puts its result into the next queue before task_done, so join them in order
+            await note_queue.join()
+            await store_queue.join()
+            await comment_queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def search_keyword_notes(self, keyword: str, note_queue: asyncio.Queue) -> None:
+        """
+        Search pagination stage, put the searched notes into the note queue (wait when the queue is full)
+        Args:
+            keyword: search keyword
+            note_queue: queue of (keyword, page, note_id, xsec_source, xsec_token)
+
+        Returns:
+
+        """
         xhs_limit_count = 20  # xhs limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(
-                f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}"
-            )
-            page = 1
-            search_id = get_search_id()
-            while (
-                page - start_page + 1
-            ) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
+        source_keyword_var.set(keyword)
+        utils.logger.info(
+            f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}"
+        )
+        page = 1
+        search_id = get_search_id()
+        while (
+            page - start_page + 1
+        ) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+            if page < start_page:
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
+                page += 1
+                continue
+            if self.checkpoint.is_done("search_page", f"{keyword}:{page}"):
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.search] Skip page {page}, it has been crawled before (checkpoint)"
+                )
+                page += 1
+                continue
 
-                try:
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] search xhs keyword: {keyword}, page: {page}"
-                    )
-                    note_ids: List[str] = []
-                    xsec_tokens: List[str] = []
-                    notes_res = await self.xhs_client.get_note_by_keyword(
-                        keyword=keyword,
-                        search_id=search_id,
-                        page=page,
-                        sort=(
-                            SearchSortType(config.SORT_TYPE)
-                            if config.SORT_TYPE != ""
-                            else SearchSortType.GENERAL
-                        ),
-                    )
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Search notes res:{notes_res}"
-                    )
-                    if not notes_res or not notes_res.get("has_more", False):
-                        utils.logger.info("No more content!")
-                        break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = [
-                        self.get_note_detail_async_task(
-                            note_id=post_item.get("id"),
-                            xsec_source=post_item.get("xsec_source"),
-                            xsec_token=post_item.get("xsec_token"),
-                            semaphore=semaphore,
+            try:
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.search] search xhs keyword: {keyword}, page: {page}"
+                )
+                notes_res = await self.xhs_client.get_note_by_keyword(
+                    keyword=keyword,
+                    search_id=search_id,
+                    page=page,
+                    sort=(
+                        SearchSortType(config.SORT_TYPE)
+                        if config.SORT_TYPE != ""
+                        else SearchSortType.GENERAL
+                    ),
+                )
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.search] Search notes res:{notes_res}"
+                )
+                if not notes_res or not notes_res.get("has_more", False):
+                    utils.logger.info("No more content!")
+                    break
+                post_items = [
+                    post_item
+                    for post_item in notes_res.get("items", {})
+                    if post_item.get("model_type") not in ("rec_query", "hot_query")
+                    and not self.checkpoint.is_done("search_note", f"{keyword}:{post_item.get('id')}")
+                ]
+                self.search_page_progress[(keyword, page)] = [len(post_items), False]
+                if not post_items:
+                    self.finish_search_page(keyword, page)
+                for post_item in post_items:
+                    await note_queue.put(
+                        (
+                            keyword,
+                            page,
+                            post_item.get("id"),
+                            post_item.get("xsec_source"),
+                            post_item.get("xsec_token"),
                         )
-                        for post_item in notes_res.get("items", {})
-                        if post_item.get("model_type") not in ("rec_query", "hot_query")
-                    ]
-                    note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
-                        if note_detail:
-                            await xhs_store.update_xhs_note(note_detail)
-                            await self.get_notice_media(note_detail)
-                            note_ids.append(note_detail.get("note_id"))
-                            xsec_tokens.append(note_detail.get("xsec_token"))
-                    page += 1
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Note details: {note_details}"
                     )
-                    await self.batch_get_note_comments(note_ids, xsec_tokens)
-                except DataFetchError:
-                    utils.logger.error(
-                        "[XiaoHongShuCrawler.search] Get note detail error"
+                page += 1
+            except DataFetchError:
+                utils.logger.error(
+                    "[XiaoHongShuCrawler.search] Get note detail error"
+                )
+                break
+
+    async def note_detail_worker(
+        self,
+        note_queue: asyncio.Queue,
+        store_queue: asyncio.Queue,
+        comment_queue: asyncio.Queue,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Note detail stage: fetch the note detail and pass it to the store stage"""
+        while True:
+            keyword, page, note_id, xsec_source, xsec_token = await note_queue.get()
+            try:
+                if self.seen_index.is_fresh("note", note_id):
+                    # the detail was crawled recently (maybe under another keyword), only the comments may be needed
+                    utils.logger.info(f"[XiaoHongShuCrawler.note_detail_worker] Skip fresh note detail, note_id: {note_id}")
+                    if config.ENABLE_GET_COMMENTS:
+                        await comment_queue.put((keyword, page, note_id, xsec_token))
+                    else:
+                        self.finish_search_note(keyword, page, note_id, success=True)
+                    continue
+                note_detail = await self.get_note_detail_async_task(
+                    note_id=note_id,
+                    xsec_source=xsec_source,
+                    xsec_token=xsec_token,
+                    semaphore=semaphore,
+                )
+                if note_detail:
+                    await store_queue.put((keyword, page, note_detail))
+                else:
+                    self.finish_search_note(keyword, page, note_id, success=False)
+            except Exception as ex:
+                utils.logger.error(
+                    f"[XiaoHongShuCrawler.note_detail_worker] Get note detail error, note_id: {note_id}, err: {ex}"
+                )
+                self.finish_search_note(keyword, page, note_id, success=False)
+            finally:
+                note_queue.task_done()
+
+    async def note_store_worker(self, store_queue: asyncio.Queue, comment_queue: asyncio.Queue) -> None:
+        """Store stage: save the note, submit its media and pass it to the comment stage"""
+        while True:
+            keyword, page, note_detail = await store_queue.get()
+            note_id = note_detail.get("note_id")
+            try:
+                source_keyword_var.set(keyword)
+                await self.save_note(note_detail)
+                await self.get_notice_media(note_detail)
+                if config.ENABLE_GET_COMMENTS:
+                    await comment_queue.put(
+                        (keyword, page, note_id, note_detail.get("xsec_token"))
                     )
-                    break
+                else:
+                    self.finish_search_note(keyword, page, note_id, success=True)
+            except Exception as ex:
+                utils.logger.error(
+                    f"[XiaoHongShuCrawler.note_store_worker] Store note error, note_id: {note_id}, err: {ex}"
+                )
+                self.finish_search_note(keyword, page, note_id, success=False)
+            finally:
+                store_queue.task_done()
+
+    async def note_comment_worker(self, comment_queue: asyncio.Queue, semaphore: asyncio.Semaphore) -> None:
+        """Comment stage: crawl the comments of one note at a time"""
+        while True:
+            keyword, page, note_id, xsec_token = await comment_queue.get()
+            try:
+                await self.get_comments(note_id=note_id, xsec_token=xsec_token, semaphore=semaphore)
+                self.finish_search_note(keyword, page, note_id, success=True)
+            except Exception as ex:
+                utils.logger.error(
+                    f"[XiaoHongShuCrawler.note_comment_worker] Get note comments error, note_id: {note_id}, err: {ex}"
+                )
+                self.finish_search_note(keyword, page, note_id, success=False)
+            finally:
+                comment_queue.task_done()
+
+    def finish_search_note(self, keyword: str, page: int, note_id: str, success: bool) -> None:
+        """
+        Record that a searched note has gone through the pipeline,
+        a search page is checkpointed only after all of its notes succeeded
+        """
+        if success:
+            self.checkpoint.save("search_note", f"{keyword}:{note_id}", done=True)
+        progress = self.search_page_progress.get((keyword, page))
+        if progress is None:
+            return
+        progress[0] -= 1
+        progress[1] = progress[1] or not success
+        if progress[0] <= 0:
+            self.finish_search_page(keyword, page)
+
+    def finish_search_page(self, keyword: str, page: int) -> None:
+        _, has_failed = self.search_page_progress.pop((keyword, page), (0, False))
+        if not has_failed:
+            self.checkpoint.save("search_page", f"{keyword}:{page}", done=True)
 
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
@@ -192,6 +427,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
             "[XiaoHongShuCrawler.get_creators_and_notes] Begin get xiaohongshu creators"
         )
         for user_id in config.XHS_CREATOR_ID_LIST:
+            if self.checkpoint.is_done("creator", user_id):
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.get_creators_and_notes] Skip creator {user_id}, it has been crawled before (checkpoint)"
+                )
+                continue
             # get creator detail info from web html content
             createor_info: Dict = await self.xhs_client.get_creator_info(
                 user_id=user_id
@@ -199,30 +439,50 @@ class XiaoHongShuCrawler(AbstractCrawler):
             if createor_info:
                 await xhs_store.save_creator(user_id, creator=createor_info)
 
-            # When proxy is not enabled, increase the crawling interval
-            if config.ENABLE_IP_PROXY:
-                crawl_interval = random.random()
-            else:
-                crawl_interval = random.uniform(1, config.CRAWLER_MAX_SLEEP_SEC)
-            # Get all note information of the creator
-            all_notes_list = await self.xhs_client.get_all_notes_by_creator(
-                user_id=user_id,
-                crawl_interval=crawl_interval,
-                callback=self.fetch_creator_notes_detail,
-            )
+            # Get all note information of the creator, continue from the saved cursor
+            notes_checkpoint = self.checkpoint.get("creator_notes", user_id)
+            if not (notes_checkpoint and notes_checkpoint.done):
+                fetched_count = notes_checkpoint.count if notes_checkpoint else 0
+
+                async def save_creator_notes(note_list: List[Dict]):
+                    await self.fetch_creator_notes_detail(note_list)
+                    for note_item in note_list:
+                        self.checkpoint.save(
+                            "creator_note",
+                            f"{user_id}:{note_item.get('note_id')}",
+                            extra={"xsec_token": note_item.get("xsec_token")},
+                        )
+
+                async def save_notes_cursor(_user_id: str, cursor: str, has_more: bool, count: int):
+                    self.checkpoint.save(
+                        "creator_notes", _user_id, cursor=cursor, count=fetched_count + count, done=not has_more
+                    )
+
+                await self.xhs_client.get_all_notes_by_creator(
+                    user_id=user_id,
+                    callback=save_creator_notes,
+                    cursor=notes_checkpoint.cursor if notes_checkpoint else "",
+                    cursor_callback=save_notes_cursor,
+                    max_count=config.CRAWLER_MAX_NOTES_COUNT - fetched_count,
+                )
+                self.checkpoint.save(
+                    "creator_notes", user_id, count=len(self.checkpoint.list("creator_note", f"{user_id}:")), done=True
+                )
 
+            # the notes listed in previous runs are included, notes whose comments are done are skipped
             note_ids = []
             xsec_tokens = []
-            for note_item in all_notes_list:
-                note_ids.append(note_item.get("note_id"))
-                xsec_tokens.append(note_item.get("xsec_token"))
+            for note_record in self.checkpoint.list("creator_note", f"{user_id}:"):
+                note_ids.append(note_record.key.split(":", 1)[1])
+                xsec_tokens.append(note_record.extra.get("xsec_token"))
             await self.batch_get_note_comments(note_ids, xsec_tokens)
+            self.checkpoint.save("creator", user_id, done=True)
 
     async def fetch_creator_notes_detail(self, note_list: List[Dict]):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = asyncio.Semaphore(self.max_concurrency_num)
         task_list = [
             self.get_note_detail_async_task(
                 note_id=post_item.get("note_id"),
@@ -236,7 +496,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         note_details = await asyncio.gather(*task_list)
         for note_detail in note_details:
             if note_detail:
-                await xhs_store.update_xhs_note(note_detail)
+                await self.save_note(note_detail)
 
     async def get_specified_notes(self):
         """
@@ -246,27 +506,36 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         """
         get_note_detail_task_list = []
+        semaphore = asyncio.Semaphore(self.max_concurrency_num)
+        need_get_comment_note_ids = []
+        xsec_tokens = []
         for full_note_url in config.XHS_SPECIFIED_NOTE_URL_LIST:
             note_url_info: NoteUrlInfo = parse_note_info_from_note_url(full_note_url)
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_specified_notes] Parse note url info: {note_url_info}"
             )
+            if self.checkpoint.is_done("note_detail", note_url_info.note_id) or self.seen_index.is_fresh(
+                "note", note_url_info.note_id
+            ):
+                # the detail was saved before the interruption or crawled recently, only the comments may be left
+                need_get_comment_note_ids.append(note_url_info.note_id)
+                xsec_tokens.append(note_url_info.xsec_token)
+                continue
             crawler_task = self.get_note_detail_async_task(
                 note_id=note_url_info.note_id,
                 xsec_source=note_url_info.xsec_source,
                 xsec_token=note_url_info.xsec_token,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
+                semaphore=semaphore,
             )
             get_note_detail_task_list.append(crawler_task)
 
-        need_get_comment_note_ids = []
-        xsec_tokens = []
         note_details = await asyncio.gather(*get_note_detail_task_list)
         for note_detail in note_details:
             if note_detail:
                 need_get_comment_note_ids.append(note_detail.get("note_id", ""))
                 xsec_tokens.append(note_detail.get("xsec_token", ""))
-                await xhs_store.update_xhs_note(note_detail)
+                await self.save_note(note_detail)
+                self.checkpoint.save("note_detail", note_detail.get("note_id", ""), done=True)
         await self.batch_get_note_comments(need_get_comment_note_ids, xsec_tokens)
 
     async def get_note_detail_async_task(
@@ -287,13 +556,13 @@ class XiaoHongShuCrawler(AbstractCrawler):
         Returns:
             Dict: note detail
         """
+        if self.seen_index.is_fresh("note", note_id):
+            utils.logger.info(
+                f"[XiaoHongShuCrawler.get_note_detail_async_task] Skip note {note_id}, it was crawled within {config.SEEN_INDEX_RECRAWL_TTL}s"
+            )
+            return None
         note_detail_from_html, note_detail_from_api = None, None
         async with semaphore:
-            # When proxy is not enabled, increase the crawling interval
-            if config.ENABLE_IP_PROXY:
-                crawl_interval = random.random()
-            else:
-                crawl_interval = random.uniform(1, config.CRAWLER_MAX_SLEEP_SEC)
             try:
                 utils.logger.info(f"[get_note_detail_async_task] Begin get note detail, note_id: {note_id}")
                 # 尝试直接获取网页版笔记详情，携带cookie
@@ -302,7 +571,6 @@ class XiaoHongShuCrawler(AbstractCrawler):
                         note_id, xsec_source, xsec_token, enable_cookie=True
                     )
                 )
-                time.sleep(crawl_interval)
                 if not note_detail_from_html:
                     # 如果网页版笔记详情获取失败，则尝试不使用cookie获取
                     note_detail_from_html = (
@@ -350,7 +618,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         utils.logger.info(
             f"[XiaoHongShuCrawler.batch_get_note_comments] Begin batch get note comments, note list: {note_list}"
         )
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = asyncio.Semaphore(self.max_concurrency_num)
         task_list: List[Task] = []
         for index, note_id in enumerate(note_list):
             task = asyncio.create_task(
@@ -366,37 +634,88 @@ class XiaoHongShuCrawler(AbstractCrawler):
         self, note_id: str, xsec_token: str, semaphore: asyncio.Semaphore
     ):
         """Get note comments with keyword filtering and quantity limitation"""
+        if self.seen_index.is_fresh("note_comments", note_id):
+            utils.logger.info(
+                f"[XiaoHongShuCrawler.get_comments] Skip note {note_id}, its comments were crawled within {config.SEEN_INDEX_RECRAWL_TTL}s"
+            )
+            return
+        comments_checkpoint = self.checkpoint.get("note_comments", note_id)
+        if comments_checkpoint and comments_checkpoint.done:
+            utils.logger.info(
+                f"[XiaoHongShuCrawler.get_comments] Skip note {note_id}, its comments have been crawled before (checkpoint)"
+            )
+            return
+        fetched_count = comments_checkpoint.count if comments_checkpoint else 0
+        watermark = self.seen_index.get_comment_watermark(note_id) if config.ENABLE_INCREMENTAL_COMMENTS else None
+        since_create_time, since_comment_id = watermark or (0, "")
+
+        async def save_comments_cursor(_note_id: str, cursor: str, has_more: bool, count: int):
+            self.checkpoint.save(
+                "note_comments", _note_id, cursor=cursor, count=fetched_count + count, done=not has_more
+            )
+
         async with semaphore:
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}"
             )
-            # When proxy is not enabled, increase the crawling interval
-            if config.ENABLE_IP_PROXY:
-                crawl_interval = random.random()
-            else:
-                crawl_interval = random.uniform(1, config.CRAWLER_MAX_SLEEP_SEC)
-            await self.xhs_client.get_note_all_comments(
+            comments = await self.xhs_client.get_note_all_comments(
                 note_id=note_id,
                 xsec_token=xsec_token,
-                crawl_interval=crawl_interval,
-                callback=xhs_store.batch_update_xhs_note_comments,
-                max_count=CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                callback=self.save_unseen_comments,
+                max_count=CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES - fetched_count,
+                cursor=comments_checkpoint.cursor if comments_checkpoint else "",
+                cursor_callback=save_comments_cursor,
+                since_create_time=since_create_time,
+                since_comment_id=since_comment_id,
             )
+            # the watermark only follows the first level comments, replies may be newer than them
+            newest_comment = get_newest_first_level_comment(comments)
+            if newest_comment:
+                self.seen_index.save_comment_watermark(
+                    note_id, newest_comment.get("create_time", 0), newest_comment.get("id", "")
+                )
+            self.checkpoint.save("note_comments", note_id, count=fetched_count + len(comments), done=True)
+            self.seen_index.mark("note_comments", [note_id])
+
+    async def save_note(self, note_detail: Dict):
+        """Save the note, it is marked as seen only after it has been handed to the store"""
+        await xhs_store.update_xhs_note(note_detail)
+        self.seen_index.mark("note", [note_detail.get("note_id")])
+
+    async def save_unseen_comments(self, note_id: str, comments: List[Dict]):
+        """Save the comments that were not crawled within the recrawl ttl, e.g. the same note found by several keywords"""
+        stale_ids = self.seen_index.filter_stale("comment", [comment.get("id") for comment in comments])
+        unseen_comments = [comment for comment in comments if comment.get("id") in stale_ids]
+        if not unseen_comments:
+            return
+        await xhs_store.batch_update_xhs_note_comments(note_id, unseen_comments)
+        self.seen_index.mark("comment", [comment.get("id") for comment in unseen_comments])
+
+    @staticmethod
+    def create_checkpoint() -> CrawlCheckpoint:
+        """Create the checkpoint store of the current crawler type, it only lives in memory when disabled"""
+        if not config.ENABLE_CRAWL_CHECKPOINT:
+            return CrawlCheckpoint()
+        db_path = os.path.join(
+            config.CRAWL_CHECKPOINT_DIR % config.PLATFORM, f"{config.CRAWLER_TYPE}.db"
+        )
+        utils.logger.info(f"[XiaoHongShuCrawler.create_checkpoint] Crawl checkpoint file: {db_path}")
+        return CrawlCheckpoint(db_path)
 
     @staticmethod
-    def format_proxy_info(
-        ip_proxy_info: IpInfoModel,
-    ) -> Tuple[Optional[Dict], Optional[Dict]]:
-        """format proxy info for playwright and httpx"""
-        playwright_proxy = {
-            "server": f"{ip_proxy_info.protocol}{ip_proxy_info.ip}:{ip_proxy_info.port}",
-            "username": ip_proxy_info.user,
-            "password": ip_proxy_info.password,
-        }
-        httpx_proxy = {
-            f"{ip_proxy_info.protocol}": f"http://{ip_proxy_info.user}:{ip_proxy_info.password}@{ip_proxy_info.ip}:{ip_proxy_info.port}"
-        }
-        return playwright_proxy, httpx_proxy
+    def create_seen_index() -> SeenIndex:
+        """
+        Create the dedup index of crawled notes and comments, it only lives in memory when persistence is disabled,
+        the comment watermarks are always persisted in incremental mode so that it works across runs
+        """
+        persist_path = config.SEEN_INDEX_PATH % config.PLATFORM
+        db_path = persist_path if config.ENABLE_SEEN_INDEX_PERSIST else ":memory:"
+        return SeenIndex(
+            db_path,
+            recrawl_ttl=config.SEEN_INDEX_RECRAWL_TTL,
+            bloom_capacity=config.SEEN_INDEX_BLOOM_CAPACITY,
+            watermark_db_path=persist_path if config.ENABLE_INCREMENTAL_COMMENTS else None,
+        )
 
     async def create_xhs_client(self, httpx_proxy: Optional[str]) -> XiaoHongShuClient:
         """Create xhs client"""
@@ -480,7 +799,8 @@ class XiaoHongShuCrawler(AbstractCrawler):
             return await self.launch_browser(chromium, playwright_proxy, user_agent, headless)
 
     async def close(self):
-        """Close browser context"""
+        """Close http connection pool and browser context"""
+        await self.xhs_client.close()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
@@ -490,6 +810,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
         utils.logger.info("[XiaoHongShuCrawler.close] Browser context closed ...")
 
     async def get_notice_media(self, note_detail: Dict):
+        """
+        submit note images and videos to the background media downloader, downloads run off the crawling path
+        :param note_detail:
+        :return:
+        """
         if not config.ENABLE_GET_IMAGES:
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_notice_media] Crawling image mode is not enabled"
@@ -520,12 +845,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.xhs_client.get_note_media(url)
-            if content is None:
-                continue
             extension_file_name = f"{picNum}.jpg"
             picNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+            await self.media_downloader.submit(
+                url, xhs_store.get_xhs_note_media_file_path(note_id, extension_file_name)
+            )
 
     async def get_notice_video(self, note_item: Dict):
         """
@@ -543,9 +867,8 @@ class XiaoHongShuCrawler(AbstractCrawler):
             return
         videoNum = 0
         for url in videos:
-            content = await self.xhs_client.get_note_media(url)
-            if content is None:
-                continue
             extension_file_name = f"{videoNum}.mp4"
             videoNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+            await self.media_downloader.submit(
+                url, xhs_store.get_xhs_note_media_file_path(note_id, extension_file_name)
+            )
@@ -9,3 +9,11 @@ class DataFetchError(RequestError):
 
 class IPBlockError(RequestError):
     """fetch so fast that the server block us ip"""
+
+
+class SignError(RequestError):
+    """sign request params in browser failed"""
+
+
+class CaptchaError(RequestError):
+    """the server asks for a captcha verification (http status 461/471)"""
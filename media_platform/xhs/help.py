@@ -1,10 +1,13 @@
 
 
 import ctypes
+import functools
 import json
 import random
+import re
 import time
 import urllib.parse
+from typing import Dict, List, Optional
 
 from model.m_xiaohongshu import NoteUrlInfo
 from tools.crawler_util import extract_url_params_to_dict
@@ -297,6 +300,74 @@ def parse_note_info_from_note_url(url: str) -> NoteUrlInfo:
     return NoteUrlInfo(note_id=note_id, xsec_token=xsec_token, xsec_source=xsec_source)
 
 
+def is_first_level_comment(comment: Dict) -> bool:
+    """
+    是否为一级评论：二级评论在爬取时会记录所属的一级评论（root_comment_id），回复其他评论的还带有 target_comment，
+    一级评论接口中附带的二级评论没有 target_comment，不能只靠 target_comment 判断
+    Args:
+        comment: 评论
+
+    Returns:
+
+    """
+    return not comment.get("root_comment_id") and not (comment.get("target_comment") or {}).get("id")
+
+
+def get_newest_first_level_comment(comments: List[Dict]) -> Optional[Dict]:
+    """
+    获取最新的一级评论，作为增量爬取评论的位置
+    Args:
+        comments: 评论列表，可以包含二级评论
+
+    Returns: 没有一级评论时返回 None
+
+    """
+    first_level_comments = [comment for comment in comments if is_first_level_comment(comment)]
+    if not first_level_comments:
+        return None
+    return max(first_level_comments, key=lambda comment: comment.get("create_time", 0))
+
+
+_INITIAL_STATE_PREFIX = "window.__INITIAL_STATE__="
+_NOTE_DETAIL_MAP_KEY = '"noteDetailMap":'
+# 页面状态中作为值出现的 JS undefined，字符串内部的 undefined 不做替换
+_UNDEFINED_VALUE_PATTERN = re.compile(r'(?<=[:\[,])undefined(?=[,}\]])')
+_JSON_DECODER = json.JSONDecoder(object_pairs_hook=lambda pairs: {camel_to_underscore(k): v for k, v in pairs})
+
+
+@functools.lru_cache(maxsize=4096)
+def camel_to_underscore(key: str) -> str:
+    """驼峰转下划线，页面状态里的 key 种类有限，结果做缓存"""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
+
+
+def parse_note_detail_from_html(html: str, note_id: str) -> Dict:
+    """
+    从笔记详情页HTML的 window.__INITIAL_STATE__ 中解析笔记详情
+    只截取 noteDetailMap 子树，解析的同时把 key 转为下划线格式，整个过程只解析一次JSON
+    Args:
+        html: 笔记详情页HTML
+        note_id: 笔记ID
+
+    Returns: 笔记详情，页面状态为空时返回 {}
+
+    """
+    start = html.index(_INITIAL_STATE_PREFIX) + len(_INITIAL_STATE_PREFIX)
+    end = html.index("</script>", start)
+    state = html[start:end].rstrip()
+    if state == "{}":
+        return {}
+
+    map_index = state.find(_NOTE_DETAIL_MAP_KEY)
+    if map_index == -1:
+        note_dict = _JSON_DECODER.decode(_UNDEFINED_VALUE_PATTERN.sub('""', state))
+        return note_dict["note"]["note_detail_map"][note_id]["note"]
+
+    sub_state = _UNDEFINED_VALUE_PATTERN.sub('""', state[map_index + len(_NOTE_DETAIL_MAP_KEY):].lstrip())
+    note_detail_map, _ = _JSON_DECODER.raw_decode(sub_state)
+    return note_detail_map[note_id]["note"]
+
+
 if __name__ == '__main__':
     _img_url = "https://sns-img-bd.xhscdn.com/7a3abfaf-90c1-a828-5de7-022c80b92aa3"
     # 获取一个图片地址在多个cdn下的url地址
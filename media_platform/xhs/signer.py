@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 小红书请求签名桥接，合并同一时刻等待签名的请求，一次 page.evaluate 完成签名
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from playwright.async_api import BrowserContext, Page
+
+import config
+from tools import utils
+
+from .exception import SignError
+
+# 批量调用 window._webmsxyw，按需同时读取 localStorage 中的 b1
+BATCH_SIGN_JS = """
+({items, needB1}) => ({
+    signs: items.map(([url, data]) => {
+        try {
+            return window._webmsxyw(url, data);
+        } catch (e) {
+            return {error: String(e)};
+        }
+    }),
+    b1: needB1 ? window.localStorage.getItem("b1") : null,
+})
+"""
+
+
+class XhsSigner:
+    """
+    请求签名器：
+    1. localStorage 中的 b1 很少变化，缓存后按 XHS_SIGN_B1_REFRESH_INTERVAL 定期刷新
+    2. 某次 evaluate 进行期间到达的签名请求会合并到下一次 evaluate 中，一次浏览器往返完成多个签名
+    """
+
+    def __init__(self, playwright_page: Page, b1_refresh_interval: Optional[float] = None):
+        self.playwright_page = playwright_page
+        self.b1_refresh_interval = (
+            b1_refresh_interval
+            if b1_refresh_interval is not None
+            else config.XHS_SIGN_B1_REFRESH_INTERVAL
+        )
+        self._b1: Optional[str] = None
+        self._b1_expire_at = 0.0
+        self._pending: List[Tuple[str, Any, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.healthy = True
+        self.in_flight = 0
+
+    def invalidate_b1(self):
+        """登录态变化后调用，下一次签名时重新读取 b1"""
+        self._b1 = None
+
+    async def sign(self, url: str, data: Any = None) -> Tuple[Dict, str]:
+        """
+        获取请求的 X-s、X-t 加密参数和 b1
+        Args:
+            url: 请求的uri（GET请求包含查询参数）
+            data: POST请求体
+
+        Returns: (encrypt_params, b1)
+
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((url, data, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending())
+        self.in_flight += 1
+        try:
+            return await future
+        finally:
+            self.in_flight -= 1
+
+    async def check_health(self) -> bool:
+        """
+        检查页面上的签名函数是否可用，不可用时重新加载页面
+        Returns: 页面是否可用
+
+        """
+        check_js = "() => typeof window._webmsxyw === 'function'"
+        try:
+            healthy = await self.playwright_page.evaluate(check_js)
+            if not healthy:
+                await self.playwright_page.reload()
+                healthy = await self.playwright_page.evaluate(check_js)
+        except Exception as e:
+            utils.logger.error(f"[XhsSigner.check_health] sign page is not available: {e}")
+            healthy = False
+        self.healthy = bool(healthy)
+        if self.healthy:
+            self.invalidate_b1()
+        return self.healthy
+
+    async def _flush_pending(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            need_b1 = self._b1 is None or time.monotonic() >= self._b1_expire_at
+            try:
+                result = await self.playwright_page.evaluate(
+                    BATCH_SIGN_JS,
+                    {"items": [[url, data] for url, data, _ in batch], "needB1": need_b1},
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            if need_b1:
+                self._b1 = result.get("b1") or ""
+                self._b1_expire_at = time.monotonic() + self.b1_refresh_interval
+            if len(batch) > 1:
+                utils.logger.info(f"[XhsSigner] signed {len(batch)} requests in one evaluate")
+            for (url, _, future), encrypt_params in zip(batch, result.get("signs", [])):
+                if future.done():
+                    continue
+                if not encrypt_params or "error" in encrypt_params:
+                    future.set_exception(SignError(f"sign {url} error: {encrypt_params}"))
+                else:
+                    future.set_result((encrypt_params, self._b1))
+            for url, _, future in batch:
+                if not future.done():
+                    future.set_exception(SignError(f"sign {url} error: no sign result"))
+
+
+class XhsSignerPool:
+    """
+    签名页面池：同一个浏览器上下文中的多个页面各自负责签名，按正在签名的请求数选择最空闲的页面，
+    请求数相同时轮流分配；某个页面签名失败时做健康检查，并把该请求交给其他页面重试一次
+    """
+
+    def __init__(self, playwright_page: Page):
+        self.signers: List[XhsSigner] = [XhsSigner(playwright_page)]
+        self._next_index = 0
+
+    async def add_pages(self, browser_context: BrowserContext, pool_size: int, url: str):
+        """
+        在浏览器上下文中新建签名页面，直到页面数达到 pool_size
+        Args:
+            browser_context: 浏览器上下文
+            pool_size: 签名页面数量
+            url: 签名页面打开的地址，需要加载出 window._webmsxyw
+
+        Returns:
+
+        """
+        while len(self.signers) < pool_size:
+            page = await browser_context.new_page()
+            await page.goto(url)
+            self.signers.append(XhsSigner(page))
+        utils.logger.info(f"[XhsSignerPool.add_pages] sign page pool size: {len(self.signers)}")
+
+    def _pick(self, exclude: Optional[XhsSigner] = None) -> XhsSigner:
+        candidates = [signer for signer in self.signers if signer.healthy and signer is not exclude]
+        if not candidates:
+            candidates = self.signers
+        start = self._next_index % len(candidates)
+        self._next_index += 1
+        rotated = candidates[start:] + candidates[:start]
+        return min(rotated, key=lambda signer: signer.in_flight)
+
+    def invalidate_b1(self):
+        for signer in self.signers:
+            signer.invalidate_b1()
+
+    async def sign(self, url: str, data: Any = None) -> Tuple[Dict, str]:
+        """
+        获取请求的 X-s、X-t 加密参数和 b1
+        Args:
+            url: 请求的uri（GET请求包含查询参数）
+            data: POST请求体
+
+        Returns: (encrypt_params, b1)
+
+        """
+        signer = self._pick()
+        try:
+            return await signer.sign(url, data)
+        except Exception as e:
+            utils.logger.warning(f"[XhsSignerPool.sign] sign {url} failed, check page health and retry: {e}")
+            await signer.check_health()
+            return await self._pick(exclude=signer).sign(url, data)
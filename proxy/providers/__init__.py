@@ -5,4 +5,5 @@
 # @Time    : 2024/4/5 10:13
 # @Desc    :
 from .jishu_http_proxy import new_jisu_http_proxy
-from .kuaidl_proxy import new_kuai_daili_proxy
\ No newline at end of file
+from .kuaidl_proxy import new_kuai_daili_proxy
+from .local_stub_proxy import new_local_stub_proxy
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 本地代理IP实现，不请求任何代理商接口，用于离线测试或使用本机/内网固定的代理（例如 mitmproxy、squid）
+import itertools
+import os
+from typing import List
+
+from proxy import IpInfoModel, ProxyProvider
+from proxy.types import ProviderNameEnum
+from tools import utils
+
+
+class LocalStubProxy(ProxyProvider):
+    def __init__(self, addresses: List[str], ttl: int = 600, user: str = "", password: str = ""):
+        """
+
+        Args:
+            addresses: 代理地址列表，格式为 ip:port
+            ttl: 每次提取的IP的有效期，单位秒
+            user: 代理认证的用户名
+            password: 代理认证的密码
+        """
+        self.proxy_brand_name = ProviderNameEnum.LOCAL_STUB_PROVIDER.value
+        self.addresses = addresses
+        self.ttl = ttl
+        self.user = user
+        self.password = password
+        self._address_cycle = itertools.cycle(addresses)
+
+    async def get_proxies(self, num: int) -> List[IpInfoModel]:
+        """
+        按顺序循环提取本地代理地址
+        Args:
+            num:
+
+        Returns:
+
+        """
+        ip_infos: List[IpInfoModel] = []
+        expired_time_ts = utils.get_unix_timestamp() + self.ttl
+        for _ in range(min(num, len(self.addresses))):
+            ip, port = next(self._address_cycle).rsplit(":", 1)
+            ip_infos.append(
+                IpInfoModel(
+                    ip=ip,
+                    port=int(port),
+                    user=self.user,
+                    password=self.password,
+                    protocol="http://",
+                    expired_time_ts=expired_time_ts,
+                )
+            )
+        return ip_infos
+
+
+def new_local_stub_proxy() -> LocalStubProxy:
+    """
+    构造本地代理实例，代理地址从环境变量 local_stub_proxy_addrs 读取，多个地址以英文逗号分隔
+    Returns:
+
+    """
+    addresses = os.getenv("local_stub_proxy_addrs", "127.0.0.1:8080")
+    return LocalStubProxy(
+        addresses=[address.strip() for address in addresses.split(",") if address.strip()],
+        ttl=int(os.getenv("local_stub_proxy_ttl", "600")),
+        user=os.getenv("local_stub_proxy_user", ""),
+        password=os.getenv("local_stub_proxy_pwd", ""),
+    )
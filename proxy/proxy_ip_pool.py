@@ -11,7 +11,7 @@ import httpx
 from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
-from proxy.providers import new_jisu_http_proxy, new_kuai_daili_proxy
+from proxy.providers import new_jisu_http_proxy, new_kuai_daili_proxy, new_local_stub_proxy
 from tools import utils
 
 from .base_proxy import ProxyProvider
@@ -89,7 +89,8 @@ class ProxyIpPool:
 
 IpProxyProvider: Dict[str, ProxyProvider] = {
     ProviderNameEnum.JISHU_HTTP_PROVIDER.value: new_jisu_http_proxy(),
-    ProviderNameEnum.KUAI_DAILI_PROVIDER.value: new_kuai_daili_proxy()
+    ProviderNameEnum.KUAI_DAILI_PROVIDER.value: new_kuai_daili_proxy(),
+    ProviderNameEnum.LOCAL_STUB_PROVIDER.value: new_local_stub_proxy(),
 }
 
 
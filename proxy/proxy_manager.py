@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 代理IP管理：后台校验、按延迟和失败次数打分、过期前预先补充、被封时切换
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import httpx
+
+import config
+from tools import utils
+
+from .base_proxy import ProxyProvider
+from .proxy_ip_pool import IpProxyProvider
+from .types import IpInfoModel
+
+# 代理商返回的过期时间有的是时间戳、有的是剩余秒数，小于该值的按剩余秒数处理
+_RELATIVE_EXPIRE_MAX = 10 ** 9
+
+
+class ProxyState:
+    """单个代理IP的健康状态"""
+
+    __slots__ = ("proxy", "expire_at", "latency", "success_count", "failure_count", "blocked")
+
+    def __init__(self, proxy: IpInfoModel, fetched_at: float):
+        self.proxy = proxy
+        expired_time_ts = proxy.expired_time_ts or 0
+        if not expired_time_ts:
+            self.expire_at = float("inf")
+        elif expired_time_ts < _RELATIVE_EXPIRE_MAX:
+            self.expire_at = fetched_at + expired_time_ts
+        else:
+            self.expire_at = float(expired_time_ts)
+        self.latency: Optional[float] = None
+        self.success_count = 0
+        self.failure_count = 0
+        self.blocked = False
+
+    @property
+    def key(self) -> str:
+        return f"{self.proxy.ip}:{self.proxy.port}"
+
+    @property
+    def score(self) -> float:
+        """分数越低越好：平均延迟 + 失败率惩罚"""
+        total = self.success_count + self.failure_count
+        failure_rate = self.failure_count / total if total else 0.0
+        latency = self.latency if self.latency is not None else 1.0
+        return latency + failure_rate * 10
+
+    def record(self, success: bool, latency: Optional[float] = None):
+        if success:
+            self.success_count += 1
+            if latency is not None:
+                # 指数移动平均，最近的请求权重更大
+                self.latency = latency if self.latency is None else self.latency * 0.7 + latency * 0.3
+        else:
+            self.failure_count += 1
+
+
+class ProxyManager:
+    """
+    代理IP池管理：
+    1. 后台定时校验池中的代理，记录延迟，连续失败或即将过期的代理会被移出
+    2. 可用代理不足时提前从代理商补充，过期前 prefetch_before_expire 秒就开始补充
+    3. 爬虫按分数选择最优代理，遇到 IP 被封时调用 rotate 切换到下一个
+    """
+
+    def __init__(
+        self,
+        ip_provider: ProxyProvider,
+        pool_size: int,
+        validate_interval: float = 60,
+        prefetch_before_expire: float = 30,
+        max_failures: int = 3,
+        validate_url: str = "https://httpbin.org/ip",
+        validator: Optional[Callable[[IpInfoModel], Awaitable[bool]]] = None,
+    ):
+        """
+        Args:
+            ip_provider: 代理商实现
+            pool_size: 池中保持的可用代理数量
+            validate_interval: 后台校验的间隔，单位秒
+            prefetch_before_expire: 代理过期前多少秒开始补充新代理
+            max_failures: 失败多少次后移出代理
+            validate_url: 校验代理可用性的地址
+            validator: 自定义校验函数，返回代理是否可用，默认请求 validate_url
+        """
+        self.ip_provider = ip_provider
+        self.pool_size = pool_size
+        self.validate_interval = validate_interval
+        self.prefetch_before_expire = prefetch_before_expire
+        self.max_failures = max_failures
+        self.validate_url = validate_url
+        self.validator = validator or self._validate_by_request
+        self.states: Dict[str, ProxyState] = {}
+        self._refill_lock = asyncio.Lock()
+        self._validate_task: Optional[asyncio.Task] = None
+        # 后台补充任务，保留引用避免任务在运行中被回收
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    async def start(self):
+        """加载并校验代理，启动后台校验任务"""
+        await self.refill()
+        if self._validate_task is None:
+            self._validate_task = asyncio.create_task(self._validate_periodically())
+
+    async def close(self):
+        tasks = list(self._background_tasks)
+        if self._validate_task:
+            tasks.append(self._validate_task)
+            self._validate_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _usable_states(self) -> List[ProxyState]:
+        deadline = time.time() + self.prefetch_before_expire
+        return [
+            state for state in self.states.values()
+            if not state.blocked and state.failure_count < self.max_failures and state.expire_at > deadline
+        ]
+
+    async def get_proxy(self) -> IpInfoModel:
+        """
+        获取分数最好的代理，没有可用代理时先补充
+        Returns:
+
+        """
+        states = self._usable_states()
+        if not states:
+            await self.refill()
+            states = self._usable_states()
+        if not states:
+            raise Exception("[ProxyManager.get_proxy] no available proxy")
+        return min(states, key=lambda state: state.score).proxy
+
+    async def rotate(self, blocked_proxy: Optional[IpInfoModel] = None) -> IpInfoModel:
+        """
+        当前代理被封后切换到下一个代理
+        Args:
+            blocked_proxy: 被封的代理
+
+        Returns: 新的代理
+
+        """
+        if blocked_proxy is not None:
+            state = self.states.get(f"{blocked_proxy.ip}:{blocked_proxy.port}")
+            if state:
+                state.blocked = True
+                utils.logger.warning(f"[ProxyManager.rotate] proxy {state.key} is blocked")
+        proxy = await self.get_proxy()
+        utils.logger.info(f"[ProxyManager.rotate] rotate to proxy {proxy.ip}:{proxy.port}")
+        # 后台补充被封掉的名额
+        task = asyncio.create_task(self.refill())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+        return proxy
+
+    def _on_background_task_done(self, task: asyncio.Task):
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            utils.logger.error(f"[ProxyManager] background refill error: {task.exception()}")
+
+    def report(self, proxy: IpInfoModel, success: bool, latency: Optional[float] = None):
+        """爬虫请求结束后上报代理的使用结果"""
+        state = self.states.get(f"{proxy.ip}:{proxy.port}")
+        if state:
+            state.record(success, latency)
+
+    async def refill(self):
+        """移出不可用的代理，数量不足时从代理商补充并校验"""
+        async with self._refill_lock:
+            usable = {state.key for state in self._usable_states()}
+            for key in list(self.states):
+                if key not in usable:
+                    self.states.pop(key)
+            need_count = self.pool_size - len(self.states)
+            if need_count <= 0:
+                return
+            try:
+                proxies = await self.ip_provider.get_proxies(need_count)
+            except Exception as e:
+                utils.logger.error(f"[ProxyManager.refill] get proxies from provider error: {e}")
+                return
+            fetched_at = time.time()
+            new_states = [ProxyState(proxy, fetched_at) for proxy in proxies]
+            new_states = [state for state in new_states if state.key not in self.states]
+            await asyncio.gather(*[self._validate(state) for state in new_states])
+            for state in new_states:
+                if state.failure_count == 0:
+                    self.states[state.key] = state
+            utils.logger.info(f"[ProxyManager.refill] available proxies: {len(self._usable_states())}")
+
+    async def _validate(self, state: ProxyState):
+        started_at = time.monotonic()
+        try:
+            valid = await self.validator(state.proxy)
+        except Exception as e:
+            utils.logger.info(f"[ProxyManager._validate] testing {state.key} err: {e}")
+            valid = False
+        state.record(valid, time.monotonic() - started_at)
+
+    async def _validate_by_request(self, proxy: IpInfoModel) -> bool:
+        _, httpx_proxy = utils.format_proxy_info(proxy)
+        async with httpx.AsyncClient(proxies=httpx_proxy, timeout=10) as client:
+            response = await client.get(self.validate_url)
+        return response.status_code == 200
+
+    async def _validate_periodically(self):
+        while True:
+            await asyncio.sleep(self.validate_interval)
+            await asyncio.gather(*[self._validate(state) for state in list(self.states.values())])
+            await self.refill()
+
+
+async def create_proxy_manager(pool_size: int) -> ProxyManager:
+    """
+    创建代理IP管理器并完成首次加载
+    :param pool_size: 池中保持的可用代理数量
+    :return:
+    """
+    manager = ProxyManager(
+        ip_provider=IpProxyProvider.get(config.IP_PROXY_PROVIDER_NAME),
+        pool_size=pool_size,
+        validate_interval=config.IP_PROXY_VALIDATE_INTERVAL,
+        prefetch_before_expire=config.IP_PROXY_PREFETCH_BEFORE_EXPIRE,
+    )
+    await manager.start()
+    return manager
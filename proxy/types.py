@@ -13,6 +13,7 @@ from pydantic import BaseModel, Field
 class ProviderNameEnum(Enum):
     JISHU_HTTP_PROVIDER: str = "jishuhttp"
     KUAI_DAILI_PROVIDER: str = "kuaidaili"
+    LOCAL_STUB_PROVIDER: str = "localstub"
 
 
 class IpInfoModel(BaseModel):
@@ -14,7 +14,7 @@ from tools import utils
 
 app = FastAPI()
 
-cache_client : AbstractCache = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_MEMORY)
+cache_client : AbstractCache = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_REDIS)
 
 
 class SmsNotification(BaseModel):
@@ -35,7 +35,7 @@ def extract_verification_code(message: str) -> str:
 
 
 @app.post("/")
-def receive_sms_notification(sms: SmsNotification):
+async def receive_sms_notification(sms: SmsNotification):
     """
     Receive SMS notification and send it to Redis.
     Args:
@@ -56,7 +56,7 @@ def receive_sms_notification(sms: SmsNotification):
     if sms_code:
         # Save the verification code in Redis and set the expiration time to 3 minutes.
         key = f"{sms.platform}_{sms.current_number}"
-        cache_client.set(key, sms_code, expire_time=60 * 3)
+        await cache_client.set(key, sms_code, expire_time=60 * 3)
 
     return {"status": "ok"}
 
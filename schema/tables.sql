@@ -592,4 +592,35 @@ alter table douyin_aweme_comment add column `like_count` varchar(255) NOT NULL D
 
 alter table xhs_note add column xsec_token varchar(50) default null comment '签名算法';
 alter table douyin_aweme_comment add column `pictures` varchar(500) NOT NULL DEFAULT '' COMMENT '评论图片列表';
-alter table bilibili_video_comment add column `like_count` varchar(255) NOT NULL DEFAULT '0' COMMENT '点赞数';
\ No newline at end of file
+alter table bilibili_video_comment add column `like_count` varchar(255) NOT NULL DEFAULT '0' COMMENT '点赞数';
+-- xhs 表增加唯一索引，支持批量写入时使用 INSERT ... ON DUPLICATE KEY UPDATE
+-- 已有数据的库执行前需先清理重复的 note_id / comment_id / user_id 记录
+alter table xhs_note add unique key `uk_xhs_note_note_id` (`note_id`);
+alter table xhs_note_comment add unique key `uk_xhs_note_comment_comment_id` (`comment_id`);
+alter table xhs_creator add unique key `uk_xhs_creator_user_id` (`user_id`);
+
+-- xhs_note_comment 增加评论树字段和按笔记查询的联合索引
+-- root_id: 所属一级评论ID（一级评论为自身），depth: 评论层级（一级评论为0），保存评论时计算写入
+-- 按 note_id 查询评论、按 (note_id, parent_comment_id) 自关联、按 (note_id, root_id) 读取整条评论串都可以走索引
+alter table xhs_note_comment
+    add column `root_id` varchar(64) DEFAULT NULL COMMENT '所属一级评论ID',
+    add column `depth`   int         NOT NULL DEFAULT 0 COMMENT '评论层级，一级评论为0',
+    add key `idx_xhs_note_comment_note_id_create_time` (`note_id`, `create_time`),
+    add key `idx_xhs_note_comment_note_id_parent_id` (`note_id`, `parent_comment_id`),
+    add key `idx_xhs_note_comment_note_id_root_id` (`note_id`, `root_id`, `depth`);
+
+-- 回填已有评论的 root_id 和 depth（MySQL 8.0+）
+update xhs_note_comment c
+    join (with recursive comment_tree as (select comment_id, note_id, comment_id as root_id, 0 as depth
+                                          from xhs_note_comment
+                                          where parent_comment_id is null or parent_comment_id = '0'
+                                          union all
+                                          select child.comment_id, child.note_id, tree.root_id, tree.depth + 1
+                                          from xhs_note_comment child
+                                                   join comment_tree tree
+                                                        on child.note_id = tree.note_id and child.parent_comment_id = tree.comment_id)
+          select comment_id, root_id, depth
+          from comment_tree) t on c.comment_id = t.comment_id
+set c.root_id = t.root_id,
+    c.depth   = t.depth
+where c.root_id is null;
@@ -5,6 +5,7 @@
 使用Hugging Face API进行情感分析
 """
 
+import argparse
 import pandas as pd
 import jieba
 from wordcloud import WordCloud
@@ -13,10 +14,14 @@ from collections import Counter
 import re
 import json
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import requests
 import time
 
+from tools.keyword_matcher import KeywordMatch, KeywordMatcher
+from tools.text_frame import (StageTimer, count_values, counts_to_dict, non_null_texts, read_csv_columns,
+                              text_column)
+
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei'] 
 plt.rcParams['axes.unicode_minus'] = False
@@ -24,7 +29,13 @@ plt.rcParams['axes.unicode_minus'] = False
 class SimpleGossipAnalyzer:
     """简化版娱乐八卦分析器"""
     
+    # 分析用到的列，导出文件中的其他列不读取
+    NOTE_COLUMNS = ['note_id', 'title', 'desc', 'nickname', 'liked_count', 'comment_count', 'time']
+    COMMENT_COLUMNS = ['comment_id', 'note_id', 'content', 'nickname', 'like_count']
+    
     def __init__(self):
+        # 各阶段的耗时和处理行数，基准模式下输出
+        self.stage_timer = StageTimer()
         self.setup_keywords()
         self.load_data()
         
@@ -66,6 +77,24 @@ class SimpleGossipAnalyzer:
         self.all_keywords = []
         for category, words in self.gossip_keywords.items():
             self.all_keywords.extend(words)
+        
+        # 规则情感分析使用的情感词表
+        self.sentiment_words = {
+            'negative': [
+                '恶心', '讨厌', '垃圾', '差劲', '失望', '愤怒', '气愤', '无语',
+                '鄙视', '反感', '厌恶', '痛恨', '憎恨', '不爽', '郁闷', '烦躁',
+                '塌房', '翻车', '黑料', '丑闻', '争议', '抄袭', '造假', '诈骗',
+                '太差', '很烂', '恶心', '作呕', '烦人', '恶心人', '令人作呕'
+            ],
+            'positive': [
+                '好', '棒', '赞', '喜欢', '爱', '支持', '加油', '优秀', '厉害',
+                '完美', '太好了', '很棒', '很好', '不错', '满意', '开心', '高兴',
+                '感动', '温暖', '美好', '精彩', '震撼', '惊艳', '治愈'
+            ],
+        }
+        
+        # 八卦关键词和情感词编译为一个自动机，每条文本只需扫描一次
+        self.keyword_matcher = KeywordMatcher({**self.gossip_keywords, **self.sentiment_words})
             
         print(f"构建娱乐八卦关键词表: {len(self.all_keywords)} 个关键词")
         
@@ -77,27 +106,23 @@ class SimpleGossipAnalyzer:
         """加载数据"""
         try:
             # 加载帖子数据
-            self.notes_df = pd.read_csv('data/xhs_notes.csv')
+            with self.stage_timer.stage('加载帖子') as stage:
+                self.notes_df = read_csv_columns('data/xhs_notes.csv', self.NOTE_COLUMNS, text_columns=['title', 'desc'])
+                stage['rows'] = len(self.notes_df)
             print(f"加载帖子数据: {len(self.notes_df)} 条")
             
             # 加载评论数据
-            self.comments_df = pd.read_csv('data/xhs_comments.csv')
+            with self.stage_timer.stage('加载评论') as stage:
+                self.comments_df = read_csv_columns('data/xhs_comments.csv', self.COMMENT_COLUMNS, text_columns=['content'])
+                stage['rows'] = len(self.comments_df)
             print(f"加载评论数据: {len(self.comments_df)} 条")
             
-            # 合并所有文本内容
-            self.all_texts = []
-            
-            # 添加帖子标题和描述
-            for _, row in self.notes_df.iterrows():
-                if pd.notna(row['title']):
-                    self.all_texts.append(str(row['title']))
-                if pd.notna(row['desc']):
-                    self.all_texts.append(str(row['desc']))
-            
-            # 添加评论内容  
-            for _, row in self.comments_df.iterrows():
-                if pd.notna(row['content']):
-                    self.all_texts.append(str(row['content']))
+            # 合并所有文本内容：帖子标题和描述（按帖子顺序交替）、评论内容，去掉空值
+            with self.stage_timer.stage('合并文本', len(self.notes_df) + len(self.comments_df)):
+                self.all_texts = pd.concat([
+                    non_null_texts(self.notes_df, ['title', 'desc']),
+                    non_null_texts(self.comments_df, ['content']),
+                ], ignore_index=True).tolist()
                     
             print(f"总文本数量: {len(self.all_texts)}")
             
@@ -175,17 +200,18 @@ class SimpleGossipAnalyzer:
             
         return word_freq
     
-    def keyword_matching(self, text: str) -> Tuple[bool, List[str], str]:
+    def keyword_matching(self, text: str, match: Optional[KeywordMatch] = None) -> Tuple[bool, List[str], str]:
         """关键词匹配检测"""
+        match = match or self.keyword_matcher.match(text)
         matched_keywords = []
         matched_category = ""
         
-        for category, keywords in self.gossip_keywords.items():
-            for keyword in keywords:
-                if keyword in text:
-                    matched_keywords.append(keyword)
-                    if not matched_category:
-                        matched_category = category
+        for category in self.gossip_keywords:
+            keywords = match.by_label.get(category)
+            if keywords:
+                matched_keywords.extend(keywords)
+                if not matched_category:
+                    matched_category = category
         
         is_gossip = len(matched_keywords) > 0
         return is_gossip, matched_keywords, matched_category
@@ -226,23 +252,11 @@ class SimpleGossipAnalyzer:
             print(f"API调用失败，使用规则方法: {e}")
             return self.rule_based_sentiment(text)
     
-    def rule_based_sentiment(self, text: str) -> str:
+    def rule_based_sentiment(self, text: str, match: Optional[KeywordMatch] = None) -> str:
         """基于规则的情感分析（备用方法）"""
-        negative_words = [
-            '恶心', '讨厌', '垃圾', '差劲', '失望', '愤怒', '气愤', '无语',
-            '鄙视', '反感', '厌恶', '痛恨', '憎恨', '不爽', '郁闷', '烦躁',
-            '塌房', '翻车', '黑料', '丑闻', '争议', '抄袭', '造假', '诈骗',
-            '太差', '很烂', '恶心', '作呕', '烦人', '恶心人', '令人作呕'
-        ]
-        
-        positive_words = [
-            '好', '棒', '赞', '喜欢', '爱', '支持', '加油', '优秀', '厉害',
-            '完美', '太好了', '很棒', '很好', '不错', '满意', '开心', '高兴',
-            '感动', '温暖', '美好', '精彩', '震撼', '惊艳', '治愈'
-        ]
-        
-        negative_count = sum(1 for word in negative_words if word in text)
-        positive_count = sum(1 for word in positive_words if word in text)
+        match = match or self.keyword_matcher.match(text)
+        negative_count = match.count('negative')
+        positive_count = match.count('positive')
         
         if negative_count > positive_count:
             return 'NEGATIVE'
@@ -251,69 +265,74 @@ class SimpleGossipAnalyzer:
         else:
             return 'NEUTRAL'
     
-    def detect_negative_gossip(self):
-        """检测负面八卦舆情"""
+    def match_texts(self, texts: pd.Series) -> pd.DataFrame:
+        """
+        整列做关键词匹配和规则情感分析，每条文本只扫描一次
+        Args:
+            texts: 文本列
+
+        Returns: 与 texts 索引对齐的 is_gossip、keywords、category、sentiment 列
+        """
+        rows = []
+        for text in texts:
+            match = self.keyword_matcher.match(text)
+            is_gossip, keywords, category = self.keyword_matching(text, match)
+            rows.append((is_gossip, keywords, category, self.rule_based_sentiment(text, match)))
+        return pd.DataFrame(rows, index=texts.index, columns=['is_gossip', 'keywords', 'category', 'sentiment'])
+    
+    def detect_negative_gossip(self, save: bool = True):
+        """
+        检测负面八卦舆情
+        Args:
+            save: 是否保存检测结果，基准模式下不保存
+
+        Returns: 检测结果，negative_posts 和 negative_comments 为 DataFrame
+        """
         print("\\n=== 负面舆情检测 ===")
         
-        negative_posts = []
-        negative_comments = []
-        
-        # 检测帖子
+        # 检测帖子（情感分析使用规则方法，避免API限制）
         print("正在分析帖子...")
-        for idx, row in self.notes_df.iterrows():
-            title = str(row['title']) if pd.notna(row['title']) else ""
-            desc = str(row['desc']) if pd.notna(row['desc']) else ""
+        notes = self.notes_df
+        with self.stage_timer.stage('帖子关键词匹配和情感分析', len(notes)):
+            title = text_column(notes, 'title')
+            desc = text_column(notes, 'desc')
             full_text = title + " " + desc
-            
-            # 关键词匹配
-            is_gossip, keywords, category = self.keyword_matching(full_text)
-            
-            if is_gossip:
-                # 情感分析（使用规则方法，避免API限制）
-                sentiment = self.rule_based_sentiment(full_text)
-                
-                if sentiment == 'NEGATIVE':
-                    negative_posts.append({
-                        'note_id': row['note_id'],
-                        'title': title,
-                        'desc': desc,
-                        'nickname': row['nickname'],
-                        'liked_count': row['liked_count'],
-                        'comment_count': row['comment_count'],
-                        'keywords': keywords,
-                        'category': category,
-                        'sentiment': sentiment,
-                        'content': full_text[:200] + "..." if len(full_text) > 200 else full_text
-                    })
-        
-        # 检测评论
+            matched = self.match_texts(full_text)
+        
+        with self.stage_timer.stage('组装负面帖子', len(notes)):
+            is_negative = matched['is_gossip'] & (matched['sentiment'] == 'NEGATIVE')
+            negative_text = full_text[is_negative]
+            negative_posts = notes.loc[is_negative].reindex(
+                columns=['note_id', 'nickname', 'liked_count', 'comment_count']
+            ).assign(
+                title=title[is_negative],
+                desc=desc[is_negative],
+                keywords=matched.loc[is_negative, 'keywords'],
+                category=matched.loc[is_negative, 'category'],
+                sentiment=matched.loc[is_negative, 'sentiment'],
+                content=negative_text.where(negative_text.str.len() <= 200, negative_text.str[:200] + "..."),
+            )[['note_id', 'title', 'desc', 'nickname', 'liked_count', 'comment_count',
+               'keywords', 'category', 'sentiment', 'content']]
+        
+        # 检测评论，过滤太短的评论
         print("正在分析评论...")
-        for idx, row in self.comments_df.iterrows():
-            content = str(row['content']) if pd.notna(row['content']) else ""
-            
-            if len(content) < 5:  # 过滤太短的评论
-                continue
-                
-            # 关键词匹配
-            is_gossip, keywords, category = self.keyword_matching(content)
-            
-            if is_gossip:
-                # 情感分析
-                sentiment = self.rule_based_sentiment(content)
-                
-                if sentiment == 'NEGATIVE':
-                    negative_comments.append({
-                        'comment_id': row['comment_id'],
-                        'note_id': row['note_id'],
-                        'content': content,
-                        'nickname': row['nickname'],
-                        'like_count': row['like_count'],
-                        'keywords': keywords,
-                        'category': category,
-                        'sentiment': sentiment
-                    })
+        comments = self.comments_df
+        with self.stage_timer.stage('评论关键词匹配和情感分析', len(comments)):
+            content = text_column(comments, 'content')
+            content = content[content.str.len() >= 5]
+            matched = self.match_texts(content)
+        
+        with self.stage_timer.stage('组装负面评论', len(comments)):
+            negative_index = matched.index[matched['is_gossip'] & (matched['sentiment'] == 'NEGATIVE')]
+            negative_comments = comments.loc[negative_index].reindex(
+                columns=['comment_id', 'note_id', 'nickname', 'like_count']
+            ).assign(
+                content=content[negative_index],
+                keywords=matched.loc[negative_index, 'keywords'],
+                category=matched.loc[negative_index, 'category'],
+                sentiment=matched.loc[negative_index, 'sentiment'],
+            )[['comment_id', 'note_id', 'content', 'nickname', 'like_count', 'keywords', 'category', 'sentiment']]
         
-        # 保存检测结果
         results = {
             'detection_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'total_posts': len(self.notes_df),
@@ -324,8 +343,14 @@ class SimpleGossipAnalyzer:
             'negative_comments': negative_comments
         }
         
-        with open('data/negative_gossip_detection.json', 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        # 保存检测结果
+        if save:
+            with open('data/negative_gossip_detection.json', 'w', encoding='utf-8') as f:
+                json.dump({
+                    **results,
+                    'negative_posts': negative_posts.to_dict('records'),
+                    'negative_comments': negative_comments.to_dict('records'),
+                }, f, ensure_ascii=False, indent=2)
         
         print(f"检测完成！")
         print(f"总帖子数: {len(self.notes_df)}")
@@ -339,23 +364,20 @@ class SimpleGossipAnalyzer:
         """生成统计分析"""
         print("\\n=== 统计分析 ===")
         
-        # 分类统计
-        post_categories = [item['category'] for item in results['negative_posts']]
-        comment_categories = [item['category'] for item in results['negative_comments']]
-        all_categories = post_categories + comment_categories
+        negative_items = pd.concat([
+            results['negative_posts'][['category', 'keywords']],
+            results['negative_comments'][['category', 'keywords']],
+        ], ignore_index=True)
         
-        category_counts = Counter(all_categories)
+        # 分类统计
+        category_counts = count_values(negative_items['category'])
         
         # 关键词统计
-        all_keywords = []
-        for item in results['negative_posts'] + results['negative_comments']:
-            all_keywords.extend(item['keywords'])
-        
-        keyword_counts = Counter(all_keywords)
+        keyword_counts = count_values(negative_items['keywords'])
         
         stats = {
-            'category_distribution': dict(category_counts),
-            'keyword_frequency': dict(keyword_counts.most_common(20)),
+            'category_distribution': counts_to_dict(category_counts),
+            'keyword_frequency': counts_to_dict(keyword_counts, top=20),
             'negative_ratio': {
                 'posts': len(results['negative_posts']) / len(self.notes_df) * 100,
                 'comments': len(results['negative_comments']) / len(self.comments_df) * 100
@@ -364,7 +386,7 @@ class SimpleGossipAnalyzer:
         
         # 输出统计结果
         print("负面内容分类统计:")
-        for category, count in category_counts.most_common():
+        for category, count in category_counts.items():
             category_name = {
                 'celebrity': '明星相关',
                 'relationship': '感情八卦',
@@ -375,7 +397,7 @@ class SimpleGossipAnalyzer:
             print(f"  {category_name}: {count}")
         
         print("\\n高频负面关键词 Top 10:")
-        for keyword, count in keyword_counts.most_common(10):
+        for keyword, count in keyword_counts.head(10).items():
             print(f"  {keyword}: {count}")
         
         print(f"\\n负面比例:")
@@ -496,9 +518,9 @@ class SimpleGossipAnalyzer:
             print(f"✓ 评论负面率: {stats['negative_ratio']['comments']:.2f}%")
             
             # 展示典型案例
-            if results['negative_posts']:
+            if not results['negative_posts'].empty:
                 print("\\n=== 典型负面帖子 ===")
-                for i, post in enumerate(results['negative_posts'][:3], 1):
+                for i, post in enumerate(results['negative_posts'].head(3).to_dict('records'), 1):
                     print(f"{i}. {post['title']}")
                     print(f"   关键词: {', '.join(post['keywords'][:3])}")
                     print(f"   用户: {post['nickname']}")
@@ -511,7 +533,17 @@ class SimpleGossipAnalyzer:
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="简化版娱乐八卦负面舆情检测")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="基准模式：只加载数据和检测负面舆情，不保存结果，输出各阶段每秒处理的行数")
+    args = parser.parse_args()
+    
     analyzer = SimpleGossipAnalyzer()
+    if args.benchmark:
+        analyzer.detect_negative_gossip(save=False)
+        print("\\n=== 各阶段处理速度 ===")
+        print(analyzer.stage_timer.summary().to_string(index=False))
+        return
     analyzer.run_complete_analysis()
 
 if __name__ == "__main__":
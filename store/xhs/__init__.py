@@ -4,7 +4,8 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 17:34
 # @Desc    :
-from typing import List
+from collections import OrderedDict
+from typing import List, Tuple, Union
 
 import config
 from var import source_keyword_var
@@ -18,14 +19,15 @@ class XhsStoreFactory:
     STORES = {
         "csv": XhsCsvStoreImplement,
         "db": XhsDbStoreImplement,
-        "json": XhsJsonStoreImplement
+        "json": XhsJsonStoreImplement,
+        "jsonl": XhsJsonlStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ...")
         return store_class()
 
 
@@ -120,6 +122,41 @@ async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
         await update_xhs_note_comment(note_id, comment_item)
 
 
+# 最近保存的评论层级，回复二级评论的评论据此计算层级，超过上限后淘汰最早的记录
+_COMMENT_DEPTH_CACHE_SIZE = 100000
+_comment_depths: "OrderedDict[str, int]" = OrderedDict()
+
+
+def get_comment_tree_path(comment_item: Dict) -> Tuple[Union[str, int], str, int]:
+    """
+    计算评论在评论树中的位置，保存评论时一并写入，查询整棵评论树时不再需要按 parent_comment_id 自关联
+    一级评论的 root_id 为自身、depth 为 0；二级评论的 root_id 为所属的一级评论（爬取时记录在 root_comment_id 中），
+    直接回复一级评论的 depth 为 1，回复其他二级评论的 depth 为被回复评论的 depth + 1
+    Args:
+        comment_item: 评论
+
+    Returns: (parent_comment_id, root_id, depth)
+
+    """
+    comment_id = comment_item.get("id")
+    target_comment_id = (comment_item.get("target_comment") or {}).get("id")
+    root_id = comment_item.get("root_comment_id") or target_comment_id
+    if not root_id:
+        return 0, comment_id, 0
+
+    parent_comment_id = target_comment_id or root_id
+    if parent_comment_id == root_id:
+        depth = 1
+    else:
+        # 被回复的评论不在本次运行保存的记录中时，至少是回复了一条二级评论
+        depth = _comment_depths.get(parent_comment_id, 1) + 1
+        _comment_depths[comment_id] = depth
+        _comment_depths.move_to_end(comment_id)
+        if len(_comment_depths) > _COMMENT_DEPTH_CACHE_SIZE:
+            _comment_depths.popitem(last=False)
+    return parent_comment_id, root_id, depth
+
+
 async def update_xhs_note_comment(note_id: str, comment_item: Dict):
     """
     更新小红书笔记评论
@@ -133,7 +170,7 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
     user_info = comment_item.get("user_info", {})
     comment_id = comment_item.get("id")
     comment_pictures = [item.get("url_default", "") for item in comment_item.get("pictures", [])]
-    target_comment = comment_item.get("target_comment", {})
+    parent_comment_id, root_id, depth = get_comment_tree_path(comment_item)
     local_db_item = {
         "comment_id": comment_id, # 评论id
         "create_time": comment_item.get("create_time"), # 评论时间
@@ -145,7 +182,9 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
         "avatar": user_info.get("image"), # 用户头像
         "sub_comment_count": comment_item.get("sub_comment_count", 0), # 子评论数
         "pictures": ",".join(comment_pictures), # 评论图片
-        "parent_comment_id": target_comment.get("id", 0), # 父评论id
+        "parent_comment_id": parent_comment_id, # 父评论id
+        "root_id": root_id, # 所属一级评论id
+        "depth": depth, # 评论层级，一级评论为0
         "last_modify_ts": utils.get_current_timestamp(), # 最后更新时间戳（MediaCrawler程序生成的，主要用途在db存储的时候记录一条记录最新更新时间）
         "like_count": comment_item.get("like_count", 0),
     }
@@ -202,17 +241,32 @@ async def save_creator(user_id: str, creator: Dict):
     await XhsStoreFactory.create_store().store_creator(local_db_item)
 
 
-async def update_xhs_note_image(note_id, pic_content, extension_file_name):
+async def sync_store():
+    """
+    爬取过程中写出存储实现中缓冲的数据，保存断点记录前调用
+    Returns:
+
+    """
+    await XhsStoreFactory.create_store().sync()
+
+
+async def flush_store():
+    """
+    爬虫结束时写出存储实现中缓冲的数据
+    Returns:
+
+    """
+    await XhsStoreFactory.create_store().flush()
+
+
+def get_xhs_note_media_file_path(note_id: str, extension_file_name: str) -> str:
     """
-    更新小红书笔
+    获取小红书笔记图片/视频的保存路径，供流式下载直接写入磁盘
     Args:
         note_id:
-        pic_content:
         extension_file_name:
 
     Returns:
 
     """
-
-    await XiaoHongShuImage().store_image(
-        {"notice_id": note_id, "pic_content": pic_content, "extension_file_name": extension_file_name})
+    return XiaoHongShuImage().get_save_file_path(note_id, extension_file_name)
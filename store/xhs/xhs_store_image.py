@@ -40,6 +40,19 @@ class XiaoHongShuImage(AbstractStoreImage):
         """
         return f"{self.image_store_path}/{notice_id}/{extension_file_name}"
 
+    def get_save_file_path(self, notice_id: str, extension_file_name: str) -> str:
+        """
+        make sure the notice image dir exists and return the save file path, used by streaming download
+        Args:
+            notice_id: notice id
+            extension_file_name: image file name
+
+        Returns:
+
+        """
+        pathlib.Path(self.image_store_path + "/" + notice_id).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(notice_id, extension_file_name)
+
     async def save_image(self, notice_id: str, pic_content: str, extension_file_name="jpg"):
         """
         save image to local
@@ -5,20 +5,43 @@
 # @Time    : 2024/1/14 16:58
 # @Desc    : 小红书存储实现类
 import asyncio
-import csv
 import json
 import os
 import pathlib
-from typing import Dict
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import aiofiles
 
 import config
 from base.base_crawler import AbstractStore
 from tools import utils, words
+from tools.csv_sink import AsyncCsvSink
 from var import crawler_type_var
 
 
+async def export_jsonl_to_json(jsonl_file_name: str, json_file_name: str) -> List[Dict]:
+    """
+    将 JSON Lines 文件整理为 json 存储使用的数组格式（indent=4），目标文件已存在时会被覆盖
+    Args:
+        jsonl_file_name: 源 .jsonl 文件
+        json_file_name: 目标 .json 文件
+
+    Returns: 导出的记录列表
+
+    """
+    items: List[Dict] = []
+    async with aiofiles.open(jsonl_file_name, 'r', encoding='utf-8') as file:
+        async for line in file:
+            line = line.strip()
+            if line:
+                items.append(json.loads(line))
+    pathlib.Path(json_file_name).parent.mkdir(parents=True, exist_ok=True)
+    async with aiofiles.open(json_file_name, 'w', encoding='utf-8') as file:
+        await file.write(json.dumps(items, ensure_ascii=False, indent=4))
+    return items
+
+
 def calculate_number_of_files(file_store_path: str) -> int:
     """计算数据保存文件的前部分排序数字，支持每次运行代码不写到同一个文件中
     Args:
@@ -36,6 +59,7 @@ def calculate_number_of_files(file_store_path: str) -> int:
 
 class XhsCsvStoreImplement(AbstractStore):
     csv_store_path: str = "data/xhs"
+    csv_sink: AsyncCsvSink = AsyncCsvSink()
     file_count:int=calculate_number_of_files(csv_store_path)
 
     def make_save_file_name(self, store_type: str) -> str:
@@ -51,7 +75,7 @@ class XhsCsvStoreImplement(AbstractStore):
 
     async def save_data_to_csv(self, save_item: Dict, store_type: str):
         """
-        Below is a simple way to save it in CSV format.
+        Buffer one row, the csv sink writes rows in batches through a kept-open file handle.
         Args:
             save_item:  save content dict info
             store_type: Save type contains content and comments（contents | comments）
@@ -59,14 +83,8 @@ class XhsCsvStoreImplement(AbstractStore):
         Returns: no returns
 
         """
-        pathlib.Path(self.csv_store_path).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(store_type=store_type)
-        async with aiofiles.open(save_file_name, mode='a+', encoding="utf-8-sig", newline="") as f:
-            f.fileno()
-            writer = csv.writer(f)
-            if await f.tell() == 0:
-                await writer.writerow(save_item.keys())
-            await writer.writerow(save_item.values())
+        await self.csv_sink.write_row(save_file_name, save_item)
 
     async def store_content(self, content_item: Dict):
         """
@@ -101,8 +119,142 @@ class XhsCsvStoreImplement(AbstractStore):
         """
         await self.save_data_to_csv(save_item=creator, store_type="creator")
 
+    async def sync(self):
+        """
+        写入缓冲的行，文件句柄保持打开
+        Returns:
+
+        """
+        await self.csv_sink.flush()
+
+    async def flush(self):
+        """
+        写入缓冲的剩余行并关闭 csv 文件句柄
+        Returns:
+
+        """
+        await self.csv_sink.close()
+
+
+class XhsDbBatchWriter:
+    """
+    数据库批量写入器：按存储类型缓冲记录（同一主键只保留最新一条），
+    达到条数阈值或时间阈值时以多行 INSERT ... ON DUPLICATE KEY UPDATE 写入
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.batch_size = batch_size or config.DB_BATCH_SIZE
+        self.flush_interval = flush_interval or config.DB_BATCH_FLUSH_INTERVAL
+        self._buffers: Dict[str, Dict[str, Dict]] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_flush_at = time.monotonic()
+
+    @staticmethod
+    def get_upsert_func(store_type: str) -> Callable[[List[Dict]], Awaitable[int]]:
+        from .xhs_store_sql import (batch_upsert_comments,
+                                    batch_upsert_contents,
+                                    batch_upsert_creators)
+        return {
+            "contents": batch_upsert_contents,
+            "comments": batch_upsert_comments,
+            "creator": batch_upsert_creators,
+        }[store_type]
+
+    @property
+    def pending_count(self) -> int:
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    async def add(self, store_type: str, key: str, item: Dict):
+        """
+        缓冲一条记录，缓冲区达到阈值时立即写入
+        Args:
+            store_type: contents | comments | creator
+            key: 记录的唯一键（note_id | comment_id | user_id）
+            item: 记录
+
+        Returns:
+
+        """
+        item.setdefault("add_ts", utils.get_current_timestamp())
+        self._buffers.setdefault(store_type, {})[key] = item
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+        if (
+            len(self._buffers[store_type]) >= self.batch_size
+            or time.monotonic() - self._last_flush_at >= self.flush_interval
+        ):
+            await self.flush()
+
+    async def flush(self):
+        """
+        将缓冲区的所有记录写入数据库
+        Returns:
+
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            self._last_flush_at = time.monotonic()
+            buffers, self._buffers = self._buffers, {}
+            pending = list(buffers.items())
+            for index, (store_type, buffer) in enumerate(pending):
+                if not buffer:
+                    continue
+                items = list(buffer.values())
+                try:
+                    rows = await self.get_upsert_func(store_type)(items)
+                except Exception as e:
+                    utils.logger.error(
+                        f"[XhsDbBatchWriter.flush] upsert {len(items)} {store_type} items error: {e}"
+                    )
+                    # 写入失败的和尚未写入的记录放回缓冲区，下次写入时重试
+                    self._requeue(pending[index:])
+                    raise
+                utils.logger.info(
+                    f"[XhsDbBatchWriter.flush] upsert {len(items)} {store_type} items, affected rows: {rows}"
+                )
+
+    def _requeue(self, buffers: List[Tuple[str, Dict[str, Dict]]]):
+        """
+        把未写入的记录放回缓冲区，写入期间新加入的同一主键记录更新，保留新记录
+        Args:
+            buffers: [(store_type, {key: item})]
+
+        Returns:
+
+        """
+        for store_type, buffer in buffers:
+            merged = dict(buffer)
+            merged.update(self._buffers.get(store_type, {}))
+            self._buffers[store_type] = merged
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if time.monotonic() - self._last_flush_at < self.flush_interval:
+                continue
+            try:
+                # shield: close() 取消定时任务时不能打断正在进行的写入
+                await asyncio.shield(self.flush())
+            except Exception:
+                # 错误已在 flush 中记录，定时任务继续运行
+                pass
+
+    async def close(self):
+        """
+        停止定时写入并写入剩余数据
+        Returns:
+
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
 
 class XhsDbStoreImplement(AbstractStore):
+    batch_writer = XhsDbBatchWriter()
+
     async def store_content(self, content_item: Dict):
         """
         Xiaohongshu content DB storage implementation
@@ -112,16 +264,7 @@ class XhsDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .xhs_store_sql import (add_new_content,
-                                    query_content_by_content_id,
-                                    update_content_by_content_id)
-        note_id = content_item.get("note_id")
-        note_detail: Dict = await query_content_by_content_id(content_id=note_id)
-        if not note_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_content(content_item)
-        else:
-            await update_content_by_content_id(note_id, content_item=content_item)
+        await self.batch_writer.add("contents", content_item.get("note_id"), content_item)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -132,16 +275,7 @@ class XhsDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .xhs_store_sql import (add_new_comment,
-                                    query_comment_by_comment_id,
-                                    update_comment_by_comment_id)
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_comment(comment_item)
-        else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+        await self.batch_writer.add("comments", comment_item.get("comment_id"), comment_item)
 
     async def store_creator(self, creator: Dict):
         """
@@ -152,15 +286,23 @@ class XhsDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .xhs_store_sql import (add_new_creator, query_creator_by_user_id,
-                                    update_creator_by_user_id)
-        user_id = creator.get("user_id")
-        user_detail: Dict = await query_creator_by_user_id(user_id)
-        if not user_detail:
-            creator["add_ts"] = utils.get_current_timestamp()
-            await add_new_creator(creator)
-        else:
-            await update_creator_by_user_id(user_id, creator)
+        await self.batch_writer.add("creator", creator.get("user_id"), creator)
+
+    async def sync(self):
+        """
+        Write the buffered items to DB, the periodic flush keeps running
+        Returns:
+
+        """
+        await self.batch_writer.flush()
+
+    async def flush(self):
+        """
+        Write the buffered items to DB
+        Returns:
+
+        """
+        await self.batch_writer.close()
 
 
 class XhsJsonStoreImplement(AbstractStore):
@@ -209,11 +351,27 @@ class XhsJsonStoreImplement(AbstractStore):
             async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
                 await file.write(json.dumps(save_data, ensure_ascii=False, indent=4))
 
-            if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
-                try:
-                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
-                except:
-                    pass
+        await self.update_word_frequency(save_item, store_type, words_file_name_prefix)
+
+    async def update_word_frequency(self, save_item: Dict, store_type: str, words_file_name_prefix: str):
+        """
+        Segment only the new comment and add it to the accumulated word frequency
+        Args:
+            save_item: save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+            words_file_name_prefix: word frequency and word cloud file prefix
+
+        Returns:
+
+        """
+        if store_type != "comments" or not (config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD):
+            return
+        try:
+            await self.WordCloud.update_word_frequency(save_item.get("content") or "", words_file_name_prefix)
+        except Exception as e:
+            # 分词失败不影响评论的保存
+            utils.logger.error(f"[XhsJsonStoreImplement.update_word_frequency] update word frequency error: {e}")
+
     async def store_content(self, content_item: Dict):
         """
         content JSON storage implementation
@@ -246,3 +404,131 @@ class XhsJsonStoreImplement(AbstractStore):
 
         """
         await self.save_data_to_json(creator, "creator")
+
+    async def flush(self):
+        """
+        Write the accumulated word frequency and word cloud
+        Returns:
+
+        """
+        if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
+            try:
+                await self.WordCloud.flush()
+            except Exception as e:
+                # 分词、字体或绘图失败不影响爬虫结束时的其他清理工作
+                utils.logger.error(f"[XhsJsonStoreImplement.flush] write word frequency and word cloud error: {e}")
+
+
+class XhsJsonlStoreImplement(XhsJsonStoreImplement):
+    """
+    追加写入的 JSON Lines 存储：每条记录只追加一行，文件句柄在爬取期间保持打开，
+    单条记录的写入开销不随文件大小增长。爬虫结束时可整理导出为 json 存储的数组格式，并写出词云
+    """
+    jsonl_store_path: str = "data/xhs/jsonl"
+    # jsonl 文件名 -> 打开的文件句柄
+    file_handles: Dict[str, Any] = {}
+    # jsonl 文件名 -> 打开和写入文件的锁，aiofiles 在线程中执行写入，并发写同一句柄时行内容可能交错
+    file_locks: Dict[str, asyncio.Lock] = {}
+    # jsonl 文件名 -> (导出的 json 文件名, 词云文件前缀)
+    export_targets: Dict[str, Tuple[str, str]] = {}
+
+    def make_jsonl_file_name(self, store_type: str) -> str:
+        """
+        make save file name by store type
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: eg: data/xhs/jsonl/search_comments_2024-01-14.jsonl
+
+        """
+        return f"{self.jsonl_store_path}/{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}.jsonl"
+
+    async def save_data_to_jsonl(self, save_item: Dict, store_type: str):
+        """
+        Append one item as a line to the JSON Lines file.
+        Args:
+            save_item: save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        save_file_name = self.make_jsonl_file_name(store_type=store_type)
+        async with self.file_locks.setdefault(save_file_name, asyncio.Lock()):
+            file = self.file_handles.get(save_file_name)
+            if file is None:
+                pathlib.Path(self.jsonl_store_path).mkdir(parents=True, exist_ok=True)
+                pathlib.Path(self.words_store_path).mkdir(parents=True, exist_ok=True)
+                file = await aiofiles.open(save_file_name, 'a', encoding='utf-8')
+                self.file_handles[save_file_name] = file
+                self.export_targets[save_file_name] = self.make_save_file_name(store_type=store_type)
+            await file.write(json.dumps(save_item, ensure_ascii=False) + "\n")
+        await self.update_word_frequency(save_item, store_type, self.export_targets[save_file_name][1])
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSON Lines storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(content_item, "contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSON Lines storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(comment_item, "comments")
+
+    async def store_creator(self, creator: Dict):
+        """
+        Xiaohongshu creator JSON Lines storage implementation
+        Args:
+            creator: creator dict
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(creator, "creator")
+
+    async def sync(self):
+        """
+        把文件句柄中缓冲的内容写入文件，文件句柄保持打开
+        Returns:
+
+        """
+        for file_name, file_lock in list(self.file_locks.items()):
+            async with file_lock:
+                file = self.file_handles.get(file_name)
+                if file is not None:
+                    await file.flush()
+
+    async def flush(self):
+        """
+        关闭所有文件句柄，按配置将本次写入的 jsonl 文件导出为 json 数组格式
+        Returns:
+
+        """
+        async with self.lock:
+            closed_file_names = []
+            for file_name, file_lock in list(self.file_locks.items()):
+                async with file_lock:
+                    file = self.file_handles.pop(file_name, None)
+                    if file is not None:
+                        await file.close()
+                        closed_file_names.append(file_name)
+            if config.JSONL_EXPORT_JSON_ON_FINISH:
+                for jsonl_file_name in closed_file_names:
+                    json_file_name, _ = self.export_targets[jsonl_file_name]
+                    items = await export_jsonl_to_json(jsonl_file_name, json_file_name)
+                    utils.logger.info(
+                        f"[XhsJsonlStoreImplement.flush] export {len(items)} items from {jsonl_file_name} to {json_file_name}"
+                    )
+        await super().flush()
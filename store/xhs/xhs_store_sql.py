@@ -147,4 +147,45 @@ async def update_creator_by_user_id(user_id: str, creator_item: Dict) -> int:
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
     effect_row: int = await async_db_conn.update_table("xhs_creator", creator_item, "user_id", user_id)
-    return effect_row
\ No newline at end of file
+    return effect_row
+
+async def batch_upsert_contents(content_items: List[Dict]) -> int:
+    """
+    批量新增或更新内容记录，依赖 xhs_note.note_id 上的唯一索引
+    Args:
+        content_items:
+
+    Returns:
+
+    """
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    effect_row: int = await async_db_conn.items_to_table_on_duplicate("xhs_note", content_items)
+    return effect_row
+
+
+async def batch_upsert_comments(comment_items: List[Dict]) -> int:
+    """
+    批量新增或更新评论记录，依赖 xhs_note_comment.comment_id 上的唯一索引
+    Args:
+        comment_items:
+
+    Returns:
+
+    """
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    effect_row: int = await async_db_conn.items_to_table_on_duplicate("xhs_note_comment", comment_items)
+    return effect_row
+
+
+async def batch_upsert_creators(creator_items: List[Dict]) -> int:
+    """
+    批量新增或更新创作者记录，依赖 xhs_creator.user_id 上的唯一索引
+    Args:
+        creator_items:
+
+    Returns:
+
+    """
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    effect_row: int = await async_db_conn.items_to_table_on_duplicate("xhs_creator", creator_items)
+    return effect_row
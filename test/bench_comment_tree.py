@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 评论树构建的基准，对比旧的按层递归 + 每层 dict.copy() 的实现，合成数据为若干笔记共计 N 条评论
+#            用法: python -m test.bench_comment_tree [评论总数，默认 1000000]
+import random
+import sys
+import time
+from collections import defaultdict
+
+from tools.comment_tree import CommentTree
+
+
+def legacy_build_comment_tree(comments):
+    comments_by_parent = defaultdict(list)
+    for comment in comments:
+        comments_by_parent[comment["parent_comment_id"]].append(comment)
+
+    def build_tree_recursive(parent_id=None):
+        tree = []
+        for comment in comments_by_parent[parent_id]:
+            comment_node = comment.copy()
+            comment_node["replies"] = build_tree_recursive(comment["comment_id"])
+            comment_node["reply_count"] = len(comment_node["replies"])
+            tree.append(comment_node)
+        return tree
+
+    return build_tree_recursive()
+
+
+def make_note_comments(note_index: int, count: int, rng: random.Random):
+    """一级评论约占 30%，其余回复一级评论或已有的回复，回复越多的评论越容易被回复"""
+    comments = []
+    for i in range(count):
+        comment_id = f"{note_index}-{i}"
+        parent_id = None
+        if comments and rng.random() > 0.3:
+            parent_id = comments[int(len(comments) * rng.random() ** 0.5)]["comment_id"]
+        comments.append({
+            "comment_id": comment_id,
+            "parent_comment_id": parent_id,
+            "content": "评论内容" * 4,
+            "nickname": f"user{i % 1000}",
+            "like_count": str(i % 50),
+            "create_time": 1700000000000 + i,
+        })
+    return comments
+
+
+def timed(func, *args):
+    started_at = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started_at
+
+
+def main(total: int):
+    rng = random.Random(0)
+    notes = [make_note_comments(i, 100000, rng) for i in range(max(1, total // 100000))]
+    print(f"{len(notes)} notes, {sum(len(comments) for comments in notes)} comments")
+
+    legacy, build, convert = 0.0, 0.0, 0.0
+    for comments in notes:
+        legacy += timed(legacy_build_comment_tree, comments)[1]
+        tree, elapsed = timed(CommentTree.build, comments)
+        build += elapsed
+        convert += timed(lambda: tree.to_dicts("replies", extra=lambda node: {"reply_count": len(node.children)}))[1]
+    print(f"legacy recursive build: {legacy:.2f}s")
+    print(f"CommentTree.build (with depth and subtree counts): {build:.2f}s, speedup {legacy / build:.1f}x")
+    print(f"CommentTree.build + to_dicts: {build + convert:.2f}s, speedup {legacy / (build + convert):.1f}x")
+
+    chain = [{"comment_id": "c0", "parent_comment_id": None}]
+    chain += [{"comment_id": f"c{i}", "parent_comment_id": f"c{i - 1}"} for i in range(1, 100000)]
+    try:
+        legacy_build_comment_tree(chain)
+        print("legacy on 100000-deep reply chain: ok")
+    except RecursionError:
+        print("legacy on 100000-deep reply chain: RecursionError")
+    tree, elapsed = timed(CommentTree.build, chain)
+    print(f"CommentTree on 100000-deep reply chain: {elapsed:.2f}s, max depth {tree.max_depth}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 笔记详情页 __INITIAL_STATE__ 解析的微基准，对比旧的整页解析+逐层 json.dumps/loads 转换 key 的实现
+#            用法: python -m test.bench_xhs_note_html [fixture.html ...]
+import json
+import pathlib
+import re
+import sys
+import timeit
+
+from media_platform.xhs.help import parse_note_detail_from_html
+
+FIXTURES_DIR = pathlib.Path(__file__).parent / "fixtures"
+
+
+def legacy_parse_note_detail_from_html(html: str, note_id: str):
+    def camel_to_underscore(key):
+        return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
+
+    def transform_json_keys(json_data):
+        data_dict = json.loads(json_data)
+        dict_new = {}
+        for key, value in data_dict.items():
+            new_key = camel_to_underscore(key)
+            if not value:
+                dict_new[new_key] = value
+            elif isinstance(value, dict):
+                dict_new[new_key] = transform_json_keys(json.dumps(value))
+            elif isinstance(value, list):
+                dict_new[new_key] = [
+                    transform_json_keys(json.dumps(item)) if (item and isinstance(item, dict)) else item
+                    for item in value
+                ]
+            else:
+                dict_new[new_key] = value
+        return dict_new
+
+    state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[0].replace("undefined", '""')
+    if state != "{}":
+        return transform_json_keys(state)["note"]["note_detail_map"][note_id]["note"]
+    return {}
+
+
+def find_note_id(html: str) -> str:
+    return re.search(r'"noteDetailMap":\{"(\w+)"', html).group(1)
+
+
+def main(paths):
+    paths = [pathlib.Path(p) for p in paths] or sorted(FIXTURES_DIR.glob("xhs_note_*.html"))
+    for path in paths:
+        html = path.read_text(encoding="utf-8")
+        note_id = find_note_id(html)
+        number = 200
+        legacy = timeit.timeit(lambda: legacy_parse_note_detail_from_html(html, note_id), number=number)
+        fast = timeit.timeit(lambda: parse_note_detail_from_html(html, note_id), number=number)
+        print(
+            f"{path.name}: {len(html)} bytes, legacy {legacy / number * 1000:.3f} ms, "
+            f"fast {fast / number * 1000:.3f} ms, speedup {legacy / fast:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
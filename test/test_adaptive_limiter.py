@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from tools.adaptive_limiter import AdaptiveConcurrencyLimiter
+
+
+class BlockError(Exception):
+    pass
+
+
+class FetchError(Exception):
+    pass
+
+
+class TestAdaptiveConcurrencyLimiter(IsolatedAsyncioTestCase):
+
+    def create_limiter(self, **kwargs):
+        params = dict(
+            initial_limit=2, min_limit=1, max_limit=8, latency_threshold=1.0, cooldown=60,
+            error_burst=2, error_window=10, severe_error_types=(BlockError,), error_types=(FetchError,),
+        )
+        params.update(kwargs)
+        return AdaptiveConcurrencyLimiter(**params)
+
+    async def test_limit_in_flight(self):
+        limiter = self.create_limiter()
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[request() for _ in range(6)])
+        self.assertLessEqual(peak, 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_increase_on_success(self):
+        limiter = self.create_limiter()
+        for _ in range(20):
+            async with limiter.slot():
+                pass
+        self.assertGreater(limiter.stats["limit"], 2)
+
+    async def test_backoff_and_cooldown_on_severe_error(self):
+        limiter = self.create_limiter(initial_limit=8)
+        with self.assertRaises(BlockError):
+            async with limiter.slot():
+                raise BlockError()
+        self.assertEqual(limiter.stats["limit"], 4)
+        for _ in range(20):
+            async with limiter.slot():
+                pass
+        self.assertEqual(limiter.stats["limit"], 4)
+
+    async def test_backoff_on_error_burst(self):
+        limiter = self.create_limiter(initial_limit=8)
+        for _ in range(2):
+            with self.assertRaises(FetchError):
+                async with limiter.slot():
+                    raise FetchError()
+        self.assertEqual(limiter.stats["limit"], 4)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from tools.checkpoint import CrawlCheckpoint
+
+
+class TestCrawlCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "checkpoint", "search.db")
+        self.checkpoint = CrawlCheckpoint(self.db_path)
+
+    def tearDown(self):
+        self.checkpoint.close()
+        self.tmp_dir.cleanup()
+
+    def reopen(self):
+        self.checkpoint.close()
+        self.checkpoint = CrawlCheckpoint(self.db_path)
+
+    def test_save_and_get(self):
+        self.assertIsNone(self.checkpoint.get("note_comments", "n1"))
+        self.checkpoint.save("note_comments", "n1", cursor="c2", count=20)
+        record = self.checkpoint.get("note_comments", "n1")
+        self.assertEqual((record.cursor, record.count, record.done), ("c2", 20, False))
+        self.checkpoint.save("note_comments", "n1", cursor="", count=35, done=True)
+        self.assertTrue(self.checkpoint.is_done("note_comments", "n1"))
+
+    def test_resume_after_reopen(self):
+        self.checkpoint.save("creator_note", "u1:n1", extra={"xsec_token": "t1"})
+        self.checkpoint.save("creator_note", "u1:n2", extra={"xsec_token": "t2"})
+        self.checkpoint.save("creator_note", "u2:n3")
+        self.checkpoint.commit(self.checkpoint.pending_rows())
+        self.reopen()
+        records = self.checkpoint.list("creator_note", "u1:")
+        self.assertEqual([record.key for record in records], ["u1:n1", "u1:n2"])
+        self.assertEqual(records[1].extra["xsec_token"], "t2")
+
+    def test_clear(self):
+        self.checkpoint.save("search_page", "八卦:1", done=True)
+        self.checkpoint.clear()
+        self.assertFalse(self.checkpoint.is_done("search_page", "八卦:1"))
+
+    def test_uncommitted_records_are_not_persisted(self):
+        self.checkpoint.save("search_page", "八卦:1", done=True)
+        self.assertTrue(self.checkpoint.is_done("search_page", "八卦:1"))
+        self.reopen()
+        self.assertFalse(self.checkpoint.is_done("search_page", "八卦:1"))
+
+    def test_commit_keeps_records_saved_after_snapshot(self):
+        self.checkpoint.save("note_comments", "n1", cursor="c1", count=10)
+        rows = self.checkpoint.pending_rows()
+        # 存储写出数据期间，评论又翻了一页
+        self.checkpoint.save("note_comments", "n1", cursor="c2", count=20)
+        self.checkpoint.commit(rows)
+        self.assertEqual(self.checkpoint.get("note_comments", "n1").cursor, "c2")
+        self.reopen()
+        self.assertEqual(self.checkpoint.get("note_comments", "n1").cursor, "c1")
+
+    def test_list_includes_uncommitted_records(self):
+        self.checkpoint.save("creator_note", "u1:n1")
+        self.checkpoint.commit(self.checkpoint.pending_rows())
+        self.checkpoint.save("creator_note", "u1:n2")
+        self.checkpoint.save("creator_note", "u1:n1", extra={"xsec_token": "t1"})
+        records = self.checkpoint.list("creator_note", "u1:")
+        self.assertEqual([record.key for record in records], ["u1:n2", "u1:n1"])
+        self.assertEqual(records[1].extra, {"xsec_token": "t1"})
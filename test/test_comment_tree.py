@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import sys
+import unittest
+
+from tools.comment_tree import CommentTree
+
+
+class TestCommentTree(unittest.TestCase):
+
+    def setUp(self):
+        self.comments = [
+            {"comment_id": "r1", "parent_comment_id": "0", "like_count": "3"},
+            {"comment_id": "r2", "parent_comment_id": None, "like_count": "1"},
+            {"comment_id": "a", "parent_comment_id": "r1", "like_count": "2"},
+            {"comment_id": "b", "parent_comment_id": "a", "like_count": ""},
+            {"comment_id": "c", "parent_comment_id": "r1", "like_count": "5"},
+            {"comment_id": "orphan", "parent_comment_id": "missing", "like_count": "1"},
+        ]
+
+    def test_build(self):
+        tree = CommentTree.build(self.comments)
+        self.assertEqual([node.comment_id for node in tree.roots], ["r1", "r2", "orphan"])
+        self.assertEqual([node.comment_id for node in tree.walk()], ["r1", "a", "b", "c", "r2", "orphan"])
+        r1 = tree.nodes["r1"]
+        self.assertEqual((r1.subtree_size, r1.reply_count, r1.subtree_likes), (4, 3, 10))
+        self.assertEqual(tree.nodes["b"].depth, 2)
+        self.assertEqual(tree.level_counts(), {0: 3, 1: 2, 2: 1})
+        self.assertEqual(tree.max_depth, 2)
+        self.assertEqual([node.comment_id for node in tree.walk(max_depth=1)], ["r1", "r2", "orphan"])
+
+    def test_to_dicts(self):
+        tree = CommentTree.build(self.comments)
+        result = tree.to_dicts("replies", extra=lambda node: {"reply_count": len(node.children)})
+        self.assertEqual([item["comment_id"] for item in result[0]["replies"]], ["a", "c"])
+        self.assertEqual(result[0]["reply_count"], 2)
+        self.assertEqual(result[0]["replies"][0]["replies"][0]["comment_id"], "b")
+        self.assertNotIn("replies", self.comments[0])
+
+    def test_deep_reply_chain(self):
+        depth = sys.getrecursionlimit() * 2
+        comments = [{"comment_id": "c0", "parent_comment_id": None}]
+        comments += [{"comment_id": f"c{i}", "parent_comment_id": f"c{i - 1}"} for i in range(1, depth)]
+        tree = CommentTree.build(comments)
+        self.assertEqual(tree.nodes["c0"].subtree_size, depth)
+        self.assertEqual(tree.max_depth, depth - 1)
+        self.assertEqual(len(tree.to_dicts()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
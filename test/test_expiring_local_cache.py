@@ -6,35 +6,55 @@
 # @Time    : 2024/6/2 10:35
 # @Desc    :
 
-import time
+import asyncio
 import unittest
+from unittest import IsolatedAsyncioTestCase
 
 from cache.local_cache import ExpiringLocalCache
 
 
-class TestExpiringLocalCache(unittest.TestCase):
+class TestExpiringLocalCache(IsolatedAsyncioTestCase):
 
     def setUp(self):
         self.cache = ExpiringLocalCache(cron_interval=10)
 
-    def test_set_and_get(self):
-        self.cache.set('key', 'value', 10)
-        self.assertEqual(self.cache.get('key'), 'value')
-
-    def test_expired_key(self):
-        self.cache.set('key', 'value', 1)
-        time.sleep(2)  # wait for the key to expire
-        self.assertIsNone(self.cache.get('key'))
-
-    def test_clear(self):
-        # 设置两个键值对，过期时间为11秒
-        self.cache.set('key', 'value', 11)
-        # 睡眠12秒，让cache类的定时任务执行一次
-        time.sleep(12)
-        self.assertIsNone(self.cache.get('key'))
-
-    def tearDown(self):
-        del self.cache
+    async def test_set_and_get(self):
+        await self.cache.set('key', 'value', 10)
+        self.assertEqual(await self.cache.get('key'), 'value')
+
+    async def test_expired_key(self):
+        await self.cache.set('key', 'value', 1)
+        await asyncio.sleep(2)  # wait for the key to expire
+        self.assertIsNone(await self.cache.get('key'))
+
+    async def test_clear(self):
+        cache = ExpiringLocalCache(cron_interval=1)
+        # 设置键值对，过期时间为1秒
+        await cache.set('key', 'value', 1)
+        # 睡眠2.5秒，让cache类的定时任务在key过期后至少执行一次，不需要再次读取就被清理
+        await asyncio.sleep(2.5)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats['expirations'], 1)
+        await cache.close()
+
+    async def test_lru_eviction(self):
+        cache = ExpiringLocalCache(cron_interval=10, max_size=2)
+        await cache.set('key1', 'value1')
+        await cache.set('key2', 'value2')
+        await cache.get('key1')  # key1 最近被访问，淘汰 key2
+        await cache.set('key3', 'value3')
+        self.assertEqual(await cache.keys('key*'), ['key1', 'key3'])
+        self.assertEqual(cache.stats['evictions'], 1)
+        await cache.close()
+
+    async def test_stats(self):
+        await self.cache.set('key', 'value')
+        await self.cache.get('key')
+        await self.cache.get('missing')
+        self.assertEqual((self.cache.stats['hits'], self.cache.stats['misses']), (1, 1))
+
+    async def asyncTearDown(self):
+        await self.cache.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import random
+import unittest
+
+from tools.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.lexicons = {
+            "celebrity": ["明星", "艺人", "明星效应"],
+            "scandal": ["实锤", "锤", "塌房", "出轨"],
+            "negative": ["塌房", "恶心", "塌房", ""],
+            "empty": [],
+        }
+        self.matcher = KeywordMatcher(self.lexicons)
+
+    def test_overlapping_keywords(self):
+        self.assertEqual(self.matcher.find("明星效应被实锤了"), {"明星", "明星效应", "实锤", "锤"})
+        self.assertEqual(self.matcher.find("没有关键词"), set())
+        self.assertEqual(self.matcher.find(""), set())
+
+    def test_match(self):
+        match = self.matcher.match("实锤！艺人塌房，太恶心，明星")
+        self.assertEqual(match.keywords, ("明星", "艺人", "实锤", "锤", "塌房", "恶心"))
+        self.assertEqual(match.labels, ("celebrity", "scandal", "negative"))
+        self.assertEqual(match.by_label["celebrity"], ("明星", "艺人"))
+        self.assertEqual(match.by_label["negative"], ("塌房", "恶心"))
+        # 词表中重复定义的词按重复次数计数，与逐个关键词 `in` 判断的结果一致
+        self.assertEqual(match.count("negative"), 3)
+        self.assertEqual(match.count("empty"), 0)
+        self.assertIs(match, self.matcher.match("明星艺人实锤塌房恶心"))
+
+    def test_same_as_naive_matching(self):
+        rng = random.Random(0)
+        alphabet = "明星艺人效应实锤塌房出轨恶心了的"
+        for _ in range(500):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            match = self.matcher.match(text)
+            for label, words in self.lexicons.items():
+                self.assertEqual(match.count(label), sum(1 for word in words if word and word in text))
+                expected = [word for word in dict.fromkeys(words) if word and word in text]
+                self.assertEqual(list(match.by_label.get(label, ())), expected)
+
+    def test_empty_lexicons(self):
+        matcher = KeywordMatcher({})
+        self.assertEqual(matcher.find("明星"), set())
+        self.assertEqual(matcher.match("明星").keywords, ())
+
+
+if __name__ == '__main__':
+    unittest.main()
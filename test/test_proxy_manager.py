@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from proxy.providers.local_stub_proxy import LocalStubProxy
+from proxy.proxy_manager import ProxyManager
+from proxy.types import IpInfoModel
+
+
+class TestProxyManager(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.invalid_ips = {"127.0.0.3"}
+
+        async def validator(proxy: IpInfoModel) -> bool:
+            return proxy.ip not in self.invalid_ips
+
+        self.provider = LocalStubProxy(
+            addresses=["127.0.0.1:8001", "127.0.0.2:8002", "127.0.0.3:8003", "127.0.0.4:8004"], ttl=600
+        )
+        self.manager = ProxyManager(self.provider, pool_size=3, validate_interval=3600, validator=validator)
+        await self.manager.start()
+
+    async def asyncTearDown(self):
+        await self.manager.close()
+
+    async def test_invalid_proxy_is_dropped(self):
+        self.assertNotIn("127.0.0.3:8003", self.manager.states)
+        self.assertEqual(len(self.manager.states), 2)
+
+    async def test_pick_by_score(self):
+        fast = self.manager.states["127.0.0.1:8001"].proxy
+        slow = self.manager.states["127.0.0.2:8002"].proxy
+        self.manager.report(fast, success=True, latency=0.1)
+        self.manager.report(slow, success=False)
+        self.assertIs(await self.manager.get_proxy(), fast)
+
+    async def test_rotate_on_block(self):
+        proxy = await self.manager.get_proxy()
+        new_proxy = await self.manager.rotate(proxy)
+        self.assertNotEqual((proxy.ip, proxy.port), (new_proxy.ip, new_proxy.port))
+
+    async def test_rotate_keeps_background_refill(self):
+        proxy = await self.manager.get_proxy()
+        await self.manager.rotate(proxy)
+        self.assertEqual(len(self.manager._background_tasks), 1)
+        await asyncio.gather(*self.manager._background_tasks)
+        await asyncio.sleep(0)
+        self.assertEqual(self.manager._background_tasks, set())
+        self.assertIn("127.0.0.4:8004", self.manager.states)
+
+    async def test_expiring_proxy_is_replaced(self):
+        self.manager.states["127.0.0.1:8001"].expire_at = 0
+        await self.manager.refill()
+        self.assertIn("127.0.0.4:8004", self.manager.states)
+        self.assertEqual(len(self.manager._usable_states()), 3)
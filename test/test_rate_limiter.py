@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from tools.rate_limiter import AsyncRateLimiter, TokenBucket
+
+
+class TestTokenBucket(IsolatedAsyncioTestCase):
+    async def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        self.assertLess(time.monotonic() - start, 0.03)
+        await bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    async def test_wait_does_not_block_event_loop(self):
+        limiter = AsyncRateLimiter(rates={"comments": 10})
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(
+            ticker(), *[limiter.wait("comments") for _ in range(3)]
+        )
+        self.assertEqual(len(ticks), 5)
+        self.assertLess(ticks[-1] - ticks[0], 0.15)
+
+
+class TestAsyncRateLimiter(IsolatedAsyncioTestCase):
+    async def test_endpoints_are_independent(self):
+        limiter = AsyncRateLimiter(rates={"search": 1, "comments": 1})
+        start = time.monotonic()
+        await limiter.wait("search")
+        await limiter.wait("comments")
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    async def test_unknown_endpoint_only_jitter(self):
+        limiter = AsyncRateLimiter(rates={"search": 0}, jitter=0.02)
+        self.assertIsNone(limiter.get_bucket("search"))
+        waited = await limiter.wait("note_detail")
+        self.assertLessEqual(waited, 0.02)
@@ -6,36 +6,41 @@
 # @Time    : 2024/6/2 19:54
 # @Desc    :
 
-import time
+import asyncio
 import unittest
+from unittest import IsolatedAsyncioTestCase
 
 from cache.redis_cache import RedisCache
 
 
-class TestRedisCache(unittest.TestCase):
+class TestRedisCache(IsolatedAsyncioTestCase):
 
-    def setUp(self):
+    async def asyncSetUp(self):
         self.redis_cache = RedisCache()
 
-    def test_set_and_get(self):
-        self.redis_cache.set('key', 'value', 10)
-        self.assertEqual(self.redis_cache.get('key'), 'value')
+    async def test_set_and_get(self):
+        await self.redis_cache.set('key', 'value', 10)
+        self.assertEqual(await self.redis_cache.get('key'), 'value')
 
-    def test_expired_key(self):
-        self.redis_cache.set('key', 'value', 1)
-        time.sleep(2)  # wait for the key to expire
-        self.assertIsNone(self.redis_cache.get('key'))
+    async def test_expired_key(self):
+        await self.redis_cache.set('key', 'value', 1)
+        await asyncio.sleep(2)  # wait for the key to expire
+        self.assertIsNone(await self.redis_cache.get('key'))
 
-    def test_keys(self):
-        self.redis_cache.set('key1', 'value1', 10)
-        self.redis_cache.set('key2', 'value2', 10)
-        keys = self.redis_cache.keys('*')
+    async def test_keys(self):
+        await self.redis_cache.set('key1', 'value1', 10)
+        await self.redis_cache.set('key2', 'value2', 10)
+        keys = await self.redis_cache.keys('*')
         self.assertIn('key1', keys)
         self.assertIn('key2', keys)
 
-    def tearDown(self):
-        # self.redis_cache._redis_client.flushdb()  # 清空redis数据库
-        pass
+    async def test_mset_and_mget(self):
+        await self.redis_cache.mset({'mkey1': 'value1', 'mkey2': 'value2'}, 10)
+        self.assertEqual(await self.redis_cache.mget(['mkey1', 'mkey2', 'mkey3']), ['value1', 'value2', None])
+
+    async def asyncTearDown(self):
+        # await self.redis_cache.redis_client.flushdb()  # 清空redis数据库
+        await self.redis_cache.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from tools.response_cache import DiskResponseCache, ResponseCacheMiss
+
+
+class TestDiskResponseCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_get_set(self):
+        cache = DiskResponseCache(self.tmp_dir.name, ttl=60)
+        url = "https://www.xiaohongshu.com/explore/n1"
+        self.assertIsNone(await cache.get(url, "cookie"))
+        await cache.set(url, "<html>笔记</html>", "cookie")
+        self.assertEqual(await cache.get(url, "cookie"), "<html>笔记</html>")
+        self.assertIsNone(await cache.get(url, "anonymous"))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    async def test_ttl_and_replay(self):
+        cache = DiskResponseCache(self.tmp_dir.name, ttl=1)
+        url = "https://www.xiaohongshu.com/user/profile/u1"
+        await cache.set(url, "<html></html>")
+        time.sleep(1.1)
+        self.assertIsNone(await cache.get(url))
+
+        replay_cache = DiskResponseCache(self.tmp_dir.name, ttl=1, replay=True)
+        self.assertEqual(await replay_cache.get(url), "<html></html>")
+        with self.assertRaises(ResponseCacheMiss):
+            await replay_cache.get("https://www.xiaohongshu.com/user/profile/u2")
+
+
+    async def test_concurrent_set_same_key(self):
+        cache = DiskResponseCache(self.tmp_dir.name, ttl=60)
+        url = "https://www.xiaohongshu.com/explore/n1"
+        texts = [str(index) * 100000 for index in range(10)]
+        await asyncio.gather(*(cache.set(url, text) for text in texts))
+        self.assertIn(await cache.get(url), texts)
+        # 临时文件都已替换为缓存文件
+        cache_files = [name for _, _, names in os.walk(self.tmp_dir.name) for name in names]
+        self.assertEqual(len(cache_files), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import time
+import unittest
+
+from tools.seen_index import BloomFilter, SeenIndex
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negative(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"note:{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f"comment:{i}" in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+class TestSeenIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "seen_index.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_fresh_across_runs(self):
+        index = SeenIndex(self.db_path, recrawl_ttl=60)
+        index.mark("note", ["n1"])
+        self.assertTrue(index.is_fresh("note", "n1"))
+        self.assertFalse(index.is_fresh("note_comments", "n1"))
+        index.commit(index.pending_rows())
+        index.close()
+
+        index = SeenIndex(self.db_path, recrawl_ttl=60)
+        self.assertTrue(index.is_fresh("note", "n1"))
+        self.assertEqual(index.filter_stale("note", ["n1", "n2"]), {"n2"})
+        self.assertEqual(index.skipped_counts, {"note": 2})
+        index.close()
+
+    def test_expired(self):
+        index = SeenIndex(recrawl_ttl=0.05)
+        index.mark("comment", ["c1"])
+        time.sleep(0.1)
+        self.assertFalse(index.is_fresh("comment", "c1"))
+        index.close()
+
+    def test_comment_watermark(self):
+        index = SeenIndex(self.db_path)
+        self.assertIsNone(index.get_comment_watermark("n1"))
+        index.save_comment_watermark("n1", 1000, "c1")
+        index.save_comment_watermark("n1", 900, "c0")
+        self.assertEqual(index.get_comment_watermark("n1"), (1000, "c1"))
+        index.save_comment_watermark("n1", 2000, "c2")
+        self.assertEqual(index.get_comment_watermark("n1"), (2000, "c2"))
+        index.close()
+
+    def test_uncommitted_marks_are_not_persisted(self):
+        index = SeenIndex(self.db_path, recrawl_ttl=60)
+        index.mark("comment", ["c1"])
+        index.save_comment_watermark("n1", 1000, "c1")
+        rows = index.pending_rows()
+        # 存储写出数据期间又爬到的评论，要等下一次提交
+        index.mark("comment", ["c2"])
+        index.save_comment_watermark("n1", 2000, "c2")
+        index.commit(rows)
+        self.assertTrue(index.is_fresh("comment", "c2"))
+        self.assertEqual(index.get_comment_watermark("n1"), (2000, "c2"))
+        index.close()
+
+        index = SeenIndex(self.db_path, recrawl_ttl=60)
+        self.assertEqual(index.filter_stale("comment", ["c1", "c2"]), {"c2"})
+        self.assertEqual(index.get_comment_watermark("n1"), (1000, "c1"))
+        index.close()
+
+    def test_watermark_persisted_without_seen_index(self):
+        index = SeenIndex(watermark_db_path=self.db_path)
+        index.mark("note_comments", ["n1"])
+        index.save_comment_watermark("n1", 1000, "c1")
+        index.commit(index.pending_rows())
+        index.close()
+
+        # 去重记录只在本次运行内生效，增量爬取评论的水位跨运行保留
+        index = SeenIndex(watermark_db_path=self.db_path)
+        self.assertFalse(index.is_fresh("note_comments", "n1"))
+        self.assertEqual(index.get_comment_watermark("n1"), (1000, "c1"))
+        index.close()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+import pandas as pd
+
+from tools.text_frame import StageTimer, count_values, counts_to_dict, non_null_texts, read_csv_columns, text_column
+
+
+class TestTextFrame(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "notes.csv")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("note_id,title,desc,ip_location\n1,123,,a\n2,,d2,b\n3,t3,d3,c\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_csv_columns(self):
+        df = read_csv_columns(self.path, ["note_id", "title", "desc", "missing"], text_columns=["title", "desc"])
+        self.assertEqual(df.columns.tolist(), ["note_id", "title", "desc"])
+        self.assertEqual(df.index.tolist(), [0, 1, 2])
+        self.assertEqual(text_column(df, "title").tolist(), ["123", "", "t3"])
+        self.assertEqual(text_column(df, "missing").tolist(), ["", "", ""])
+        # 与逐行遍历、每行先标题后描述的顺序一致
+        self.assertEqual(non_null_texts(df, ["title", "desc"]).tolist(), ["123", "d2", "t3", "d3"])
+        self.assertEqual(non_null_texts(pd.DataFrame(), ["title"]).tolist(), [])
+
+    def test_count_values(self):
+        keywords = [["塌房", "瓜"], ["瓜"], [], ["塌房", "实锤"]]
+        counts = count_values(pd.Series(keywords, dtype=object))
+        expected = Counter(keyword for items in keywords for keyword in items).most_common()
+        self.assertEqual(list(counts.items()), expected)
+        self.assertEqual(counts_to_dict(counts, top=1), {"塌房": 2})
+        self.assertEqual(counts_to_dict(count_values(pd.Series(["a", "b", "b", None]))), {"b": 2, "a": 1})
+
+    def test_stage_timer(self):
+        timer = StageTimer()
+        with timer.stage("load") as stage:
+            stage["rows"] = 10
+        with timer.stage("empty"):
+            pass
+        summary = timer.summary()
+        self.assertEqual(summary["stage"].tolist(), ["load", "empty"])
+        self.assertEqual(summary["rows"].tolist(), [10, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
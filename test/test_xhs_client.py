@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import httpx
+
+from media_platform.xhs.client import XiaoHongShuClient
+
+
+class BrokenHttpClient:
+    """关闭时抛出异常的连接池"""
+
+    async def aclose(self):
+        raise RuntimeError("connection reset while closing")
+
+
+class TestClientClose(unittest.IsolatedAsyncioTestCase):
+
+    async def test_shared_client_closed_when_retired_client_fails(self):
+        client = XiaoHongShuClient(headers={}, playwright_page=None, cookie_dict={})
+        http_client = httpx.AsyncClient()
+        client._http_client = http_client
+        client._retired_http_clients.append(BrokenHttpClient())
+
+        with self.assertRaises(RuntimeError):
+            await client.close()
+        self.assertTrue(http_client.is_closed)
+        self.assertIsNone(client._http_client)
+        self.assertEqual(client._retired_http_clients, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
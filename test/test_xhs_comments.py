@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import unittest
+from typing import Dict
+
+import config
+from media_platform.xhs.client import XiaoHongShuClient
+from media_platform.xhs.help import get_newest_first_level_comment, is_first_level_comment
+
+
+class FakeCommentsClient(XiaoHongShuClient):
+    """一页一级评论，每条附带最新的二级评论（与评论接口一样，附带的二级评论没有 target_comment）"""
+
+    def __init__(self, page: Dict):
+        super().__init__(headers={}, playwright_page=None, cookie_dict={})
+        self.page = page
+
+    async def get_note_comments(self, note_id: str, xsec_token: str, cursor: str = "") -> Dict:
+        return self.page
+
+
+class TestCommentWatermark(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.page = {
+            "has_more": False,
+            "cursor": "",
+            "comments": [
+                {
+                    "id": "c1", "note_id": "n1", "create_time": 1000, "sub_comment_count": "2",
+                    "sub_comment_has_more": False,
+                    "sub_comments": [
+                        {"id": "s1", "note_id": "n1", "create_time": 3000},
+                        {"id": "s2", "note_id": "n1", "create_time": 4000, "target_comment": {"id": "s1"}},
+                    ],
+                },
+                {"id": "c2", "note_id": "n1", "create_time": 2000, "sub_comment_count": "0", "sub_comments": []},
+            ],
+        }
+        self.enable_sub_comments = config.ENABLE_GET_SUB_COMMENTS
+        config.ENABLE_GET_SUB_COMMENTS = True
+
+    def tearDown(self):
+        config.ENABLE_GET_SUB_COMMENTS = self.enable_sub_comments
+
+    def test_is_first_level_comment(self):
+        self.assertTrue(is_first_level_comment({"id": "c1"}))
+        self.assertTrue(is_first_level_comment({"id": "c1", "target_comment": {}}))
+        self.assertFalse(is_first_level_comment({"id": "s1", "root_comment_id": "c1"}))
+        self.assertFalse(is_first_level_comment({"id": "s2", "target_comment": {"id": "s1"}}))
+
+    async def test_watermark_ignores_newer_replies(self):
+        client = FakeCommentsClient(self.page)
+        comments = await client.get_note_all_comments("n1", xsec_token="", max_count=100)
+        self.assertEqual([comment["id"] for comment in comments], ["c1", "c2", "s1", "s2"])
+        # 附带的二级评论 s1 没有 target_comment，但比所有一级评论都新，不能作为增量爬取的位置
+        self.assertEqual(get_newest_first_level_comment(comments)["id"], "c2")
+        self.assertIsNone(get_newest_first_level_comment(comments[2:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
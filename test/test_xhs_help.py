@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import pathlib
+import unittest
+
+from media_platform.xhs.help import camel_to_underscore, parse_note_detail_from_html
+
+FIXTURE = pathlib.Path(__file__).parent / "fixtures" / "xhs_note_detail.html"
+NOTE_ID = "66fad51c000000001b0224b8"
+
+
+class TestParseNoteDetailFromHtml(unittest.TestCase):
+
+    def setUp(self):
+        self.html = FIXTURE.read_text(encoding="utf-8")
+
+    def test_camel_to_underscore(self):
+        self.assertEqual(camel_to_underscore("noteDetailMap"), "note_detail_map")
+        self.assertEqual(camel_to_underscore("urlDefault"), "url_default")
+        self.assertEqual(camel_to_underscore("title"), "title")
+
+    def test_parse_note_detail(self):
+        note = parse_note_detail_from_html(self.html, NOTE_ID)
+        self.assertEqual(note["note_id"], NOTE_ID)
+        self.assertEqual(note["interact_info"]["liked_count"], "1024")
+        self.assertEqual(note["image_list"][0]["info_list"][1]["image_scene"], "WB_DFT")
+        self.assertEqual(note["image_list"][0]["file_id"], "")
+        self.assertEqual(note["at_user_list"], [""])
+
+    def test_keep_undefined_in_string(self):
+        html = self.html.replace("周末探店 咖啡", "周末探店 undefined 咖啡")
+        self.assertEqual(parse_note_detail_from_html(html, NOTE_ID)["title"], "周末探店 undefined 咖啡")
+
+    def test_parse_without_note_detail_map_slice(self):
+        html = self.html.replace('"noteDetailMap":', '"noteDetailMap" :')
+        self.assertEqual(parse_note_detail_from_html(html, NOTE_ID)["note_id"], NOTE_ID)
+
+    def test_empty_state(self):
+        html = "<script>window.__INITIAL_STATE__={}</script>"
+        self.assertEqual(parse_note_detail_from_html(html, NOTE_ID), {})
+
+    def test_missing_note(self):
+        with self.assertRaises(KeyError):
+            parse_note_detail_from_html(self.html, "not_exist")
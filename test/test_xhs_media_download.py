@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from typing import List
+
+import httpx
+
+from media_platform.xhs.client import XiaoHongShuClient
+
+
+class RangeServer:
+    """模拟支持 Range 请求的媒体服务器，记录每次请求的 Range 头"""
+
+    def __init__(self, content: bytes, support_range: bool = True):
+        self.content = content
+        self.support_range = support_range
+        self.ranges: List[str] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        range_header = request.headers.get("Range", "")
+        self.ranges.append(range_header)
+        if not range_header or not self.support_range:
+            return httpx.Response(200, content=self.content)
+        start = int(range_header[len("bytes="):-1])
+        if start >= len(self.content):
+            return httpx.Response(416, headers={"Content-Range": f"bytes */{len(self.content)}"})
+        return httpx.Response(206, content=self.content[start:])
+
+
+class TestDownloadNoteMedia(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "0.jpg")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_client(self, server: RangeServer) -> XiaoHongShuClient:
+        client = XiaoHongShuClient(headers={}, playwright_page=None, cookie_dict={})
+        client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(server.handle))
+        return client
+
+    def write_local(self, content: bytes):
+        with open(self.file_path, "wb") as f:
+            f.write(content)
+
+    def read_local(self) -> bytes:
+        with open(self.file_path, "rb") as f:
+            return f.read()
+
+    async def download(self, server: RangeServer) -> bool:
+        client = self.make_client(server)
+        try:
+            return await client.download_note_media("https://sns-img.example.com/0", self.file_path)
+        finally:
+            await client._http_client.aclose()
+
+    async def test_complete_file_is_skipped(self):
+        server = RangeServer(b"0123456789")
+        self.write_local(b"0123456789")
+        self.assertTrue(await self.download(server))
+        self.assertEqual(server.ranges, ["bytes=10-"])
+        self.assertEqual(self.read_local(), b"0123456789")
+
+    async def test_truncated_file_is_resumed(self):
+        server = RangeServer(b"0123456789")
+        self.write_local(b"01234")
+        self.assertTrue(await self.download(server))
+        self.assertEqual(server.ranges, ["bytes=5-"])
+        self.assertEqual(self.read_local(), b"0123456789")
+        self.assertFalse(os.path.exists(f"{self.file_path}.part"))
+
+    async def test_replaced_file_is_downloaded_again(self):
+        # 服务端的文件被替换成更小的文件，本地的旧文件不能被当作完整文件跳过
+        server = RangeServer(b"abc")
+        self.write_local(b"0123456789")
+        self.assertTrue(await self.download(server))
+        self.assertEqual(server.ranges, ["bytes=10-", ""])
+        self.assertEqual(self.read_local(), b"abc")
+
+    async def test_without_range_support_compares_content_length(self):
+        server = RangeServer(b"0123456789", support_range=False)
+        self.write_local(b"0123456789")
+        self.assertTrue(await self.download(server))
+        self.assertEqual(self.read_local(), b"0123456789")
+
+        self.write_local(b"01234")
+        self.assertTrue(await self.download(server))
+        self.assertEqual(self.read_local(), b"0123456789")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from typing import Dict, List
+
+import config
+from base.base_crawler import AbstractStore
+from media_platform.xhs.core import XiaoHongShuCrawler
+from store.xhs import XhsStoreFactory
+from tools.checkpoint import CrawlCheckpoint
+from tools.seen_index import SeenIndex
+
+
+class BufferedStore(AbstractStore):
+    """缓冲记录，sync 时写出，可以模拟写出失败"""
+    buffered: List[Dict] = []
+    written: List[Dict] = []
+    fail_sync = False
+
+    async def store_content(self, content_item: Dict):
+        BufferedStore.buffered.append(content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        BufferedStore.buffered.append(comment_item)
+
+    async def store_creator(self, creator: Dict):
+        BufferedStore.buffered.append(creator)
+
+    async def sync(self):
+        if BufferedStore.fail_sync:
+            raise ConnectionError("MySQL server has gone away")
+        BufferedStore.written.extend(BufferedStore.buffered)
+        BufferedStore.buffered.clear()
+
+    async def flush(self):
+        await self.sync()
+
+
+class TestCommitProgress(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "search.db")
+        self.seen_index_path = os.path.join(self.tmp_dir.name, "seen_index.db")
+        self.save_data_option = config.SAVE_DATA_OPTION
+        config.SAVE_DATA_OPTION = "buffered"
+        XhsStoreFactory.STORES["buffered"] = BufferedStore
+        BufferedStore.buffered, BufferedStore.written, BufferedStore.fail_sync = [], [], False
+        self.crawler = XiaoHongShuCrawler()
+        self.crawler.checkpoint = CrawlCheckpoint(self.db_path)
+        self.crawler.seen_index = SeenIndex(self.seen_index_path)
+
+    def tearDown(self):
+        self.crawler.checkpoint.close()
+        self.crawler.seen_index.close()
+        config.SAVE_DATA_OPTION = self.save_data_option
+        XhsStoreFactory.STORES.pop("buffered")
+        self.tmp_dir.cleanup()
+
+    def committed_done(self, scope: str, key: str) -> bool:
+        checkpoint = CrawlCheckpoint(self.db_path)
+        try:
+            return checkpoint.is_done(scope, key)
+        finally:
+            checkpoint.close()
+
+    def committed_seen(self, kind: str, item_id: str) -> bool:
+        seen_index = SeenIndex(self.seen_index_path)
+        try:
+            return seen_index.is_fresh(kind, item_id)
+        finally:
+            seen_index.close()
+
+    async def test_commit_after_store_sync(self):
+        await BufferedStore().store_content({"note_id": "n1"})
+        self.crawler.checkpoint.save("search_note", "八卦:n1", done=True)
+        self.assertFalse(self.committed_done("search_note", "八卦:n1"))
+
+        await self.crawler.commit_progress()
+        self.assertEqual(BufferedStore.written, [{"note_id": "n1"}])
+        self.assertTrue(self.committed_done("search_note", "八卦:n1"))
+
+    async def test_failed_sync_does_not_commit(self):
+        await BufferedStore().store_content({"note_id": "n1"})
+        self.crawler.checkpoint.save("search_note", "八卦:n1", done=True)
+        self.crawler.seen_index.mark("note", ["n1"])
+        BufferedStore.fail_sync = True
+        with self.assertRaises(ConnectionError):
+            await self.crawler.commit_progress()
+        # 数据还没有写出，进程中断后重新运行时不能跳过这篇笔记
+        self.assertFalse(self.committed_done("search_note", "八卦:n1"))
+        self.assertFalse(self.committed_seen("note", "n1"))
+        self.assertTrue(self.crawler.checkpoint.is_done("search_note", "八卦:n1"))
+        self.assertTrue(self.crawler.seen_index.is_fresh("note", "n1"))
+
+        BufferedStore.fail_sync = False
+        await self.crawler.flush_store_and_commit()
+        self.assertTrue(self.committed_done("search_note", "八卦:n1"))
+        self.assertTrue(self.committed_seen("note", "n1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import unittest
+from typing import Dict, List
+
+import config
+from store.xhs.xhs_store_impl import (XhsCsvStoreImplement, XhsDbBatchWriter, XhsJsonlStoreImplement,
+                                      XhsJsonStoreImplement)
+from tools.csv_sink import AsyncCsvSink
+from var import crawler_type_var
+
+
+class RecordingBatchWriter(XhsDbBatchWriter):
+    """不连接数据库，记录每次 upsert 的内容"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upserted: List[tuple] = []
+        # 需要模拟写入失败的存储类型 -> 剩余失败次数
+        self.failures: Dict[str, int] = {}
+        # 模拟写入失败前（等待数据库期间）新加入缓冲区的记录
+        self.added_during_upsert: List[tuple] = []
+
+    def get_upsert_func(self, store_type: str):
+        async def upsert(items: List[Dict]) -> int:
+            if self.failures.get(store_type):
+                self.failures[store_type] -= 1
+                for added_type, key, item in self.added_during_upsert:
+                    self._buffers.setdefault(added_type, {})[key] = item
+                raise ConnectionError("MySQL server has gone away")
+            self.upserted.append((store_type, [item["id"] for item in items]))
+            return len(items)
+
+        return upsert
+
+
+class TestXhsDbBatchWriter(unittest.IsolatedAsyncioTestCase):
+
+    async def test_add_flushes_at_batch_size(self):
+        writer = RecordingBatchWriter(batch_size=2, flush_interval=60)
+        await writer.add("contents", "n1", {"id": "n1"})
+        self.assertEqual(writer.upserted, [])
+        await writer.add("contents", "n1", {"id": "n1", "title": "new"})
+        self.assertEqual(writer.pending_count, 1)
+        await writer.add("contents", "n2", {"id": "n2"})
+        self.assertEqual(writer.upserted, [("contents", ["n1", "n2"])])
+        self.assertEqual(writer.pending_count, 0)
+        await writer.close()
+
+    async def test_close_writes_remaining(self):
+        writer = RecordingBatchWriter(batch_size=100, flush_interval=60)
+        await writer.add("contents", "n1", {"id": "n1"})
+        await writer.add("comments", "c1", {"id": "c1"})
+        await writer.close()
+        self.assertEqual(writer.upserted, [("contents", ["n1"]), ("comments", ["c1"])])
+        self.assertEqual(writer.pending_count, 0)
+
+    async def test_failed_upsert_is_retried(self):
+        writer = RecordingBatchWriter(batch_size=100, flush_interval=60)
+        writer.failures["contents"] = 1
+        writer.added_during_upsert = [("contents", "n1", {"id": "n1", "title": "new"})]
+        await writer.add("contents", "n1", {"id": "n1", "title": "old"})
+        await writer.add("contents", "n2", {"id": "n2"})
+        await writer.add("comments", "c1", {"id": "c1"})
+        with self.assertRaises(ConnectionError):
+            await writer.flush()
+        # 失败的 contents 和尚未写入的 comments 都留在缓冲区，写入期间更新的记录不会被旧记录覆盖
+        self.assertEqual(writer.upserted, [])
+        self.assertEqual(writer.pending_count, 3)
+        self.assertEqual(writer._buffers["contents"]["n1"]["title"], "new")
+
+        await writer.close()
+        self.assertEqual(writer.upserted, [("contents", ["n1", "n2"]), ("comments", ["c1"])])
+        self.assertEqual(writer.pending_count, 0)
+
+class TestXhsCsvStore(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        crawler_type_var.set("search")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_flush_writes_buffered_rows_and_closes_files(self):
+        store = XhsCsvStoreImplement()
+        store.csv_store_path = self.tmp_dir.name
+        store.csv_sink = AsyncCsvSink(batch_size=100, flush_interval=60)
+        await store.store_content({"note_id": "n1", "title": "t1"})
+        await store.store_content({"note_id": "n2", "title": "t2"})
+        file_name = store.make_save_file_name("contents")
+        self.assertFalse(os.path.exists(file_name))
+
+        await store.flush()
+        self.assertEqual(store.csv_sink._files, {})
+        with open(file_name, encoding="utf-8-sig", newline="") as f:
+            self.assertEqual(list(csv.reader(f)), [["note_id", "title"], ["n1", "t1"], ["n2", "t2"]])
+
+    async def test_idle_rows_are_flushed_periodically(self):
+        store = XhsCsvStoreImplement()
+        store.csv_store_path = self.tmp_dir.name
+        store.csv_sink = AsyncCsvSink(batch_size=100, flush_interval=0.05)
+        await store.store_content({"note_id": "n1", "title": "t1"})
+        # 之后没有新的行写入，缓冲的行也要按时间阈值写入文件
+        await asyncio.sleep(0.2)
+        with open(store.make_save_file_name("contents"), encoding="utf-8-sig", newline="") as f:
+            self.assertEqual(list(csv.reader(f)), [["note_id", "title"], ["n1", "t1"]])
+
+        await store.flush()
+        self.assertIsNone(store.csv_sink._flush_task)
+
+
+class BrokenWordCloud:
+    async def update_word_frequency(self, content: str, words_file_name_prefix: str):
+        raise ValueError("tokenizer error")
+
+    async def flush(self):
+        raise OSError("cannot open resource")
+
+
+class TestXhsJsonStore(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.options = config.ENABLE_GET_COMMENTS, config.ENABLE_GET_WORDCLOUD
+        config.ENABLE_GET_COMMENTS, config.ENABLE_GET_WORDCLOUD = True, True
+
+    def tearDown(self):
+        config.ENABLE_GET_COMMENTS, config.ENABLE_GET_WORDCLOUD = self.options
+
+    async def test_flush_logs_word_cloud_error(self):
+        store = XhsJsonStoreImplement()
+        store.WordCloud = BrokenWordCloud()
+        with self.assertLogs("MediaCrawler", level="ERROR"):
+            await store.flush()
+
+    async def test_update_word_frequency_logs_error(self):
+        store = XhsJsonStoreImplement()
+        store.WordCloud = BrokenWordCloud()
+        with self.assertLogs("MediaCrawler", level="ERROR") as logs:
+            await store.update_word_frequency({"content": "评论"}, "comments", "search_comments")
+        self.assertIn("tokenizer error", logs.output[0])
+
+
+class TestXhsJsonlStore(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        crawler_type_var.set("search")
+        self.options = config.ENABLE_GET_WORDCLOUD, config.JSONL_EXPORT_JSON_ON_FINISH
+        config.ENABLE_GET_WORDCLOUD, config.JSONL_EXPORT_JSON_ON_FINISH = False, True
+
+    def tearDown(self):
+        config.ENABLE_GET_WORDCLOUD, config.JSONL_EXPORT_JSON_ON_FINISH = self.options
+        self.tmp_dir.cleanup()
+
+    async def test_concurrent_writes_keep_lines_whole(self):
+        store = XhsJsonlStoreImplement()
+        store.jsonl_store_path = os.path.join(self.tmp_dir.name, "jsonl")
+        store.json_store_path = os.path.join(self.tmp_dir.name, "json")
+        store.words_store_path = os.path.join(self.tmp_dir.name, "words")
+        items = [{"note_id": str(index), "desc": str(index) * 20000} for index in range(50)]
+        await asyncio.gather(*(store.store_content(item) for item in items))
+        await store.flush()
+
+        with open(store.make_jsonl_file_name("contents"), encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertCountEqual([line["note_id"] for line in lines], [item["note_id"] for item in items])
+        self.assertTrue(all(line["desc"] == line["note_id"] * 20000 for line in lines))
+
+    async def test_sync_writes_buffered_lines(self):
+        store = XhsJsonlStoreImplement()
+        store.jsonl_store_path = os.path.join(self.tmp_dir.name, "jsonl")
+        store.json_store_path = os.path.join(self.tmp_dir.name, "json")
+        store.words_store_path = os.path.join(self.tmp_dir.name, "words")
+        await store.store_comment({"comment_id": "c1"})
+        await store.sync()
+        with open(store.make_jsonl_file_name("comments"), encoding="utf-8") as f:
+            self.assertEqual([json.loads(line) for line in f], [{"comment_id": "c1"}])
+        await store.flush()
+
+
+if __name__ == '__main__':
+    unittest.main()
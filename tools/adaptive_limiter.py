@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 自适应并发控制（AIMD），根据请求耗时和错误反馈动态调整整个爬虫同时进行的请求数
+import asyncio
+import collections
+import time
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple, Type
+
+from tools import utils
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    加性增、乘性减的并发限制：
+    1. 请求成功且耗时低于 latency_threshold 时，并发上限缓慢增加（每个成功请求增加 1/当前上限，约每轮 +1）
+    2. 请求耗时过高时小幅下调；短时间内出现多次普通错误（error_types）时按 backoff_factor 下调
+    3. 出现封禁/验证码错误（severe_error_types）时按 backoff_factor 下调，并在 cooldown 秒内不再增加
+    同一时刻发出的请求只会触发一次下调，避免一次拥塞把上限降到底
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        latency_threshold: float = 3.0,
+        backoff_factor: float = 0.5,
+        cooldown: float = 60.0,
+        error_burst: int = 3,
+        error_window: float = 30.0,
+        severe_error_types: Tuple[Type[BaseException], ...] = (),
+        error_types: Tuple[Type[BaseException], ...] = (),
+    ):
+        """
+        Args:
+            initial_limit: 初始并发数
+            min_limit: 并发数下限
+            max_limit: 并发数上限
+            latency_threshold: 请求耗时阈值（秒），超过视为拥塞
+            backoff_factor: 下调时乘以的系数
+            cooldown: 严重错误后暂停增加并发的时间（秒）
+            error_burst: error_window 秒内出现多少次普通错误时下调
+            error_window: 统计普通错误的时间窗口（秒）
+            severe_error_types: 严重错误类型，例如 IP 被封、出现验证码
+            error_types: 普通错误类型，例如接口返回失败
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_threshold = latency_threshold
+        self.backoff_factor = backoff_factor
+        self.cooldown = cooldown
+        self.error_burst = error_burst
+        self.error_window = error_window
+        self.severe_error_types = severe_error_types
+        self.error_types = error_types
+        self.in_flight = 0
+        self.backoff_count = 0
+        self._error_times: Deque[float] = collections.deque()
+        self._last_backoff_at = 0.0
+        self._cooldown_until = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        占用一个并发名额执行请求，根据请求的耗时和异常调整并发上限
+        用法: async with limiter.slot(): ...
+        """
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        started_at = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.on_error(e, started_at)
+            raise
+        else:
+            self.on_success(time.monotonic() - started_at, started_at)
+        finally:
+            async with condition:
+                self.in_flight -= 1
+                condition.notify_all()
+
+    def on_success(self, latency: float, started_at: float):
+        if latency > self.latency_threshold:
+            self._backoff(started_at, 0.9, f"latency {latency:.2f}s")
+            return
+        if time.monotonic() < self._cooldown_until or self.limit >= self.max_limit:
+            return
+        old_limit = int(self.limit)
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        if int(self.limit) > old_limit:
+            utils.logger.info(f"[AdaptiveConcurrencyLimiter] concurrency limit increased to {int(self.limit)}")
+
+    def on_error(self, error: Exception, started_at: float):
+        if isinstance(error, self.severe_error_types):
+            if self._backoff(started_at, self.backoff_factor, f"{type(error).__name__}: {error}"):
+                self._cooldown_until = time.monotonic() + self.cooldown
+        elif isinstance(error, self.error_types):
+            now = time.monotonic()
+            self._error_times.append(now)
+            while self._error_times and now - self._error_times[0] > self.error_window:
+                self._error_times.popleft()
+            if len(self._error_times) >= self.error_burst:
+                self._error_times.clear()
+                self._backoff(started_at, self.backoff_factor, f"{self.error_burst} errors in {self.error_window}s")
+
+    def _backoff(self, started_at: float, factor: float, reason: str) -> bool:
+        # 上一次下调之前发出的请求反映的是旧的并发水平，不重复下调
+        if started_at < self._last_backoff_at:
+            return False
+        self._last_backoff_at = time.monotonic()
+        self.backoff_count += 1
+        self.limit = max(self.min_limit, self.limit * factor)
+        utils.logger.warning(
+            f"[AdaptiveConcurrencyLimiter] concurrency limit decreased to {int(self.limit)}, reason: {reason}"
+        )
+        return True
+
+    @property
+    def stats(self) -> Dict:
+        return {"limit": int(self.limit), "in_flight": self.in_flight, "backoff_count": self.backoff_count}
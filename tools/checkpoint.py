@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 断点续爬记录，保存搜索页、创作者笔记游标、笔记评论游标及完成状态，爬虫中断后重新运行时从记录处继续
+import json
+import pathlib
+import sqlite3
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class CheckpointRecord(NamedTuple):
+    scope: str
+    key: str
+    cursor: str
+    count: int
+    done: bool
+    extra: Dict
+
+
+class CrawlCheckpoint:
+    """
+    基于 SQLite 的断点记录，每条记录由 (scope, key) 唯一确定，例如：
+    search_page: 关键词:页码 | creator_notes: 创作者ID | creator_note: 创作者ID:笔记ID | note_comments: 笔记ID
+    保存的记录先留在内存中（读取时可见），记录对应的数据可能还缓冲在存储中，
+    需要在存储写出这些数据之后调用 commit 提交，否则进程中断后数据丢失，重新运行时又会被断点记录跳过
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        """
+        Args:
+            db_path: SQLite 文件路径，":memory:" 表示只在本次运行内生效
+        """
+        self.db_path = db_path
+        if db_path != ":memory:":
+            pathlib.Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS crawl_checkpoint (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                cursor TEXT NOT NULL DEFAULT '',
+                count INTEGER NOT NULL DEFAULT 0,
+                done INTEGER NOT NULL DEFAULT 0,
+                extra TEXT NOT NULL DEFAULT '{}',
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (scope, key)
+            )
+            """
+        )
+        self._conn.commit()
+        # 尚未提交的记录 (scope, key) -> 行
+        self._pending: Dict[Tuple[str, str], Tuple] = {}
+
+    def get(self, scope: str, key: str) -> Optional[CheckpointRecord]:
+        row = self._pending.get((scope, key)) or self._conn.execute(
+            "SELECT scope, key, cursor, count, done, extra, updated_at FROM crawl_checkpoint WHERE scope = ? AND key = ?",
+            (scope, key),
+        ).fetchone()
+        return self._to_record(row) if row else None
+
+    def is_done(self, scope: str, key: str) -> bool:
+        record = self.get(scope, key)
+        return bool(record and record.done)
+
+    def save(self, scope: str, key: str, cursor: str = "", count: int = 0, done: bool = False,
+             extra: Optional[Dict] = None):
+        """
+        保存（覆盖）一条断点记录，调用 commit 后才会写入 SQLite
+        Args:
+            scope: 记录类型
+            key: 记录的唯一标识
+            cursor: 下次继续爬取的游标
+            count: 已经爬取的数量
+            done: 是否已经完成
+            extra: 其他需要恢复的数据，例如 xsec_token
+
+        Returns:
+
+        """
+        self._pending[(scope, key)] = (
+            scope, key, cursor or "", count, int(done), json.dumps(extra or {}, ensure_ascii=False), time.time()
+        )
+
+    def list(self, scope: str, key_prefix: str = "") -> List[CheckpointRecord]:
+        """按 key 前缀列出某类记录，按保存时间排序"""
+        rows = {
+            (row[0], row[1]): row
+            for row in self._conn.execute(
+                "SELECT scope, key, cursor, count, done, extra, updated_at FROM crawl_checkpoint "
+                "WHERE scope = ? AND substr(key, 1, ?) = ?",
+                (scope, len(key_prefix), key_prefix),
+            )
+        }
+        rows.update(
+            (pending_key, row) for pending_key, row in self._pending.items()
+            if pending_key[0] == scope and pending_key[1].startswith(key_prefix)
+        )
+        return [self._to_record(row) for row in sorted(rows.values(), key=lambda row: row[6])]
+
+    def pending_rows(self) -> Dict[Tuple[str, str], Tuple]:
+        """
+        取出尚未提交的记录的快照，先于存储写出数据取出，写出成功后传给 commit
+        Returns:
+
+        """
+        return dict(self._pending)
+
+    def commit(self, rows: Dict[Tuple[str, str], Tuple]):
+        """
+        提交记录，快照之后又被保存过的记录继续留在内存中，等待下一次提交
+        Args:
+            rows: pending_rows 取出的快照
+
+        Returns:
+
+        """
+        self._conn.executemany(
+            "REPLACE INTO crawl_checkpoint (scope, key, cursor, count, done, extra, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            list(rows.values()),
+        )
+        self._conn.commit()
+        for pending_key, row in rows.items():
+            if self._pending.get(pending_key) is row:
+                del self._pending[pending_key]
+
+    def clear(self):
+        """清空所有记录，一次完整的爬取结束后调用，下次运行重新开始"""
+        self._pending.clear()
+        self._conn.execute("DELETE FROM crawl_checkpoint")
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    @staticmethod
+    def _to_record(row) -> CheckpointRecord:
+        scope, key, cursor, count, done, extra, _ = row
+        return CheckpointRecord(scope, key, cursor, count, bool(done), json.loads(extra))
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 评论树，O(n) 非递归构建，一次遍历计算层级和子树汇总，回复链再深也不会触发递归深度限制
+import gc
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+@contextmanager
+def _gc_paused():
+    """
+    批量创建大量节点时暂停循环垃圾回收：对象数量持续增长会反复触发全代回收，几十万条评论时回收耗时超过构建本身
+    评论树不产生需要及时回收的循环引用，结束后恢复即可
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class CommentNode:
+    """评论树节点，data 直接引用原始评论，不做复制"""
+
+    __slots__ = ("comment_id", "parent_id", "data", "children", "depth", "subtree_size", "subtree_likes")
+
+    def __init__(self, comment_id: str, parent_id: Optional[str], data: Dict):
+        self.comment_id = comment_id
+        self.parent_id = parent_id
+        self.data = data
+        self.children: List["CommentNode"] = []
+        self.depth = 0
+        # 子树汇总，包含节点自身
+        self.subtree_size = 1
+        self.subtree_likes = 0
+
+    @property
+    def reply_count(self) -> int:
+        """所有层级的回复数"""
+        return self.subtree_size - 1
+
+
+class CommentTree:
+    """
+    由评论列表构建的评论森林，子评论保持输入顺序（一般按 create_time 排序后传入）
+    父评论不在列表中的回复（例如只爬到了二级评论）作为根节点保留，不会丢失
+    """
+
+    __slots__ = ("roots", "nodes", "_order")
+
+    def __init__(self, roots: List[CommentNode], nodes: Dict[str, CommentNode]):
+        self.roots = roots
+        self.nodes = nodes
+        # 按层级从上到下排列的节点，父节点一定排在子节点之前
+        self._order: List[CommentNode] = []
+
+    @classmethod
+    def build(cls, comments: Iterable[Dict], id_key: str = "comment_id", parent_key: str = "parent_comment_id",
+              like_key: str = "like_count") -> "CommentTree":
+        """
+        构建评论树
+        Args:
+            comments: 评论列表，每条评论是一个字典
+            id_key: 评论ID的字段名
+            parent_key: 父评论ID的字段名，None、空字符串、0 或 '0' 表示一级评论
+            like_key: 点赞数的字段名，用于计算子树点赞总数
+
+        Returns:
+
+        """
+        with _gc_paused():
+            nodes: Dict[str, CommentNode] = {}
+            for comment in comments:
+                comment_id = comment[id_key]
+                parent_id = comment.get(parent_key)
+                if not parent_id or parent_id == "0" or parent_id == comment_id:
+                    parent_id = None
+                node = CommentNode(comment_id, parent_id, comment)
+                likes = comment.get(like_key)
+                if likes:
+                    try:
+                        node.subtree_likes = int(likes)
+                    except (TypeError, ValueError):
+                        pass
+                nodes[comment_id] = node
+
+            roots: List[CommentNode] = []
+            get_node = nodes.get
+            for node in nodes.values():
+                parent = get_node(node.parent_id) if node.parent_id else None
+                if parent is None:
+                    roots.append(node)
+                else:
+                    parent.children.append(node)
+
+            tree = cls(roots, nodes)
+            tree._aggregate()
+        return tree
+
+    def _aggregate(self):
+        # 广度优先得到层级顺序，再逆序把子树汇总累加到父节点；成环的评论从根节点不可达，会被忽略
+        order = list(self.roots)
+        for node in order:
+            depth = node.depth + 1
+            for child in node.children:
+                child.depth = depth
+            order.extend(node.children)
+        for node in reversed(order):
+            for child in node.children:
+                node.subtree_size += child.subtree_size
+                node.subtree_likes += child.subtree_likes
+        self._order = order
+
+    def walk(self, max_depth: Optional[int] = None) -> Iterator[CommentNode]:
+        """
+        非递归先序遍历，按展示顺序（评论后紧跟它的回复）逐个返回节点
+        Args:
+            max_depth: 只遍历层级小于该值的节点，None 表示不限制
+
+        Returns:
+
+        """
+        stack = self.roots[::-1]
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.children and (max_depth is None or node.depth + 1 < max_depth):
+                stack.extend(reversed(node.children))
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def max_depth(self) -> int:
+        return self._order[-1].depth if self._order else 0
+
+    def level_counts(self) -> Dict[int, int]:
+        """各层级的评论数，一级评论为第 0 层"""
+        counts: Dict[int, int] = defaultdict(int)
+        for node in self._order:
+            counts[node.depth] += 1
+        return dict(counts)
+
+    def to_dicts(self, children_key: str = "replies",
+                 extra: Optional[Callable[[CommentNode], Dict]] = None) -> List[Dict]:
+        """
+        转换为嵌套字典，用于导出 JSON 或生成页面，每条评论只浅拷贝一次
+        Args:
+            children_key: 子评论列表的字段名
+            extra: 为每个节点追加的字段，例如 lambda node: {"reply_count": len(node.children)}
+
+        Returns:
+
+        """
+        converted: Dict[int, Dict] = {}
+        with _gc_paused():
+            for node in self._order:
+                item = dict(node.data)
+                if extra:
+                    item.update(extra(node))
+                converted[id(node)] = item
+            for node in self._order:
+                converted[id(node)][children_key] = [converted[id(child)] for child in node.children]
+        return [converted[id(node)] for node in self.roots]
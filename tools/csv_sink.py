@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# @Desc    : CSV 批量写入，每个输出文件只打开一次，行数据缓冲后批量写入
+import asyncio
+import csv
+import io
+import pathlib
+import time
+from typing import Any, Dict, List, Optional
+
+import aiofiles
+
+import config
+from tools import utils
+
+
+class AsyncCsvSink:
+    """
+    每个 CSV 文件保持一个打开的句柄，表头只在空文件时写一次，
+    行数据先缓冲，达到条数阈值时批量写入，有缓冲时后台任务每隔 flush_interval 秒写入一次，
+    爬虫结束时调用 close 写入剩余数据并关闭句柄
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.batch_size = batch_size or config.CSV_BATCH_SIZE
+        self.flush_interval = flush_interval or config.CSV_FLUSH_INTERVAL
+        self._files: Dict[str, Any] = {}
+        self._header_written: Dict[str, bool] = {}
+        self._rows: Dict[str, List[Dict]] = {}
+        self._pending_count = 0
+        self._last_flush_at = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def write_row(self, file_name: str, save_item: Dict):
+        """
+        缓冲一行数据，达到阈值时写入所有文件
+        Args:
+            file_name: csv 文件路径
+            save_item: 行数据，第一行的 key 作为表头
+
+        Returns:
+
+        """
+        self._rows.setdefault(file_name, []).append(save_item)
+        self._pending_count += 1
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+        if (
+            self._pending_count >= self.batch_size
+            or time.monotonic() - self._last_flush_at >= self.flush_interval
+        ):
+            await self.flush()
+
+    async def _open(self, file_name: str):
+        pathlib.Path(file_name).parent.mkdir(parents=True, exist_ok=True)
+        file = await aiofiles.open(file_name, mode='a', encoding="utf-8-sig", newline="")
+        self._files[file_name] = file
+        self._header_written[file_name] = await file.tell() != 0
+        return file
+
+    async def flush(self):
+        """
+        将缓冲的行写入对应文件并刷新到磁盘
+        Returns:
+
+        """
+        async with self._get_lock():
+            rows_by_file, self._rows = self._rows, {}
+            self._pending_count = 0
+            self._last_flush_at = time.monotonic()
+            for file_name, rows in rows_by_file.items():
+                if not rows:
+                    continue
+                file = self._files.get(file_name) or await self._open(file_name)
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                if not self._header_written[file_name]:
+                    writer.writerow(rows[0].keys())
+                    self._header_written[file_name] = True
+                writer.writerows(row.values() for row in rows)
+                await file.write(buffer.getvalue())
+                await file.flush()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if not self._pending_count or time.monotonic() - self._last_flush_at < self.flush_interval:
+                continue
+            try:
+                # shield: close() 取消定时任务时不能打断正在进行的写入
+                await asyncio.shield(self.flush())
+            except Exception as e:
+                # 记录错误后定时任务继续运行
+                utils.logger.error(f"[AsyncCsvSink._flush_periodically] flush csv rows error: {e}")
+
+    async def close(self):
+        """
+        停止定时写入，写入剩余数据并关闭所有文件句柄
+        Returns:
+
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        async with self._get_lock():
+            for file in self._files.values():
+                await file.close()
+            self._files.clear()
+            self._header_written.clear()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 多关键词匹配（Aho-Corasick 自动机），一次扫描文本即可找出所有词表中出现的关键词，
+#            用于舆情分析的关键词/情感词匹配，也可以在爬虫保存数据时给内容打标签
+import re
+from collections import deque
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Set, Tuple
+
+
+class KeywordMatch(NamedTuple):
+    """匹配结果，相同的命中组合会复用同一个结果对象，因此各字段都是只读的"""
+    # 命中的关键词，按词表定义顺序排列，每个词只出现一次
+    keywords: Tuple[str, ...]
+    # 命中的词表标签，按词表定义顺序排列
+    labels: Tuple[str, ...]
+    # 每个词表命中的关键词数（同一个词在词表中重复定义时按重复次数计）
+    counts: Mapping[str, int]
+    # 每个词表命中的关键词，按该词表中的定义顺序排列
+    by_label: Mapping[str, Tuple[str, ...]]
+
+    def count(self, label: str) -> int:
+        return self.counts.get(label, 0)
+
+
+class KeywordMatcher:
+    """
+    由多个词表构建的关键词自动机，构建一次后可重复使用（只读，可在多个协程间共享）
+    用法:
+        matcher = KeywordMatcher({"celebrity": ["明星", "艺人"], "negative": ["塌房", "翻车"]})
+        matcher.match("明星塌房了")  # KeywordMatch(keywords=('明星', '塌房'), labels=('celebrity', 'negative'), ...)
+    """
+
+    def __init__(self, lexicons: Dict[str, Iterable[str]]):
+        """
+        Args:
+            lexicons: 词表标签 -> 关键词列表，同一个关键词可以出现在多个词表中
+        """
+        self.labels: List[str] = list(lexicons)
+        # 关键词 -> 定义顺序，用于按词表顺序输出结果
+        self._word_order: Dict[str, int] = {}
+        # 关键词 -> {词表标签: [在该词表中首次出现的位置, 次数]}
+        self._word_labels: Dict[str, Dict[str, List[int]]] = {}
+        for label, words in lexicons.items():
+            for index, word in enumerate(words):
+                if not word:
+                    continue
+                self._word_order.setdefault(word, len(self._word_order))
+                word_labels = self._word_labels.setdefault(word, {})
+                word_labels.setdefault(label, [index, 0])[1] += 1
+        self._build()
+
+    def _build(self):
+        # 1. 字典树
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[str]] = [[]]
+        for word in self._word_order:
+            state = 0
+            for char in word:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(word)
+
+        # 2. 按层级计算失配指针，并把失配状态的输出合并进来，匹配时不需要再沿失配指针查找输出
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+                queue.append(next_state)
+
+        # 3. 展开为完整的状态转移表（只包含关键词中出现过的字符，其他字符一律回到初始状态），匹配时每个字符只查一次表
+        transitions: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in range(len(goto) - 1)]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            merged = dict(transitions[fail[state]])
+            merged.update(goto[state])
+            # 转回初始状态的字符不需要保存
+            transitions[state] = {char: target for char, target in merged.items() if target}
+            queue.extend(goto[state].values())
+
+        self._transitions = transitions
+        self._outputs = outputs
+        # 关键词之外的字符一定让自动机回到初始状态，先用正则（C 实现）切出只由关键词字符组成的片段，只在片段上运行自动机
+        alphabet = sorted({char for state in goto for char in state})
+        self._run_pattern = re.compile("[" + "".join(re.escape(char) for char in alphabet) + "]+") if alphabet else None
+        # 相同片段、相同的命中组合在大量文本中反复出现，缓存它们的结果
+        self._scan_run = lru_cache(maxsize=65536)(self._scan)
+        self._summarize = lru_cache(maxsize=65536)(self._summarize_keywords)
+
+    def _scan(self, run: str) -> Tuple[str, ...]:
+        found: Set[str] = set()
+        transitions = self._transitions
+        outputs = self._outputs
+        state = 0
+        for char in run:
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return tuple(found)
+
+    def find(self, text: str) -> Set[str]:
+        """
+        找出文本中出现的所有关键词（包括互相重叠的关键词，例如“实锤”和“锤”）
+        Args:
+            text: 文本
+
+        Returns:
+
+        """
+        found: Set[str] = set()
+        if not text or self._run_pattern is None:
+            return found
+        scan_run = self._scan_run
+        for run in self._run_pattern.findall(text):
+            found.update(scan_run(run))
+        return found
+
+    def match(self, text: str) -> KeywordMatch:
+        """
+        一次扫描得到命中的关键词、词表标签以及每个词表的命中数
+        Args:
+            text: 文本
+
+        Returns:
+
+        """
+        return self._summarize(frozenset(self.find(text)))
+
+    def _summarize_keywords(self, found: FrozenSet[str]) -> KeywordMatch:
+        keywords = tuple(sorted(found, key=self._word_order.__getitem__))
+        counts: Dict[str, int] = {}
+        positions: Dict[str, List[Tuple[int, str]]] = {}
+        for keyword in keywords:
+            for label, (index, times) in self._word_labels[keyword].items():
+                counts[label] = counts.get(label, 0) + times
+                positions.setdefault(label, []).append((index, keyword))
+        labels = tuple(label for label in self.labels if label in counts)
+        by_label = {label: tuple(keyword for _, keyword in sorted(positions[label])) for label in labels}
+        return KeywordMatch(keywords, labels, MappingProxyType(counts), MappingProxyType(by_label))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 图片/视频后台下载队列，限制并发，不阻塞笔记和评论的爬取
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from tools import utils
+
+
+class AsyncMediaDownloader:
+    """
+    有界队列 + 固定数量的下载协程：submit 只负责入队（队列满时等待，形成背压），
+    下载在后台进行，close 时等待队列中的任务全部完成
+    """
+
+    def __init__(self, download_func: Callable[[str, str], Awaitable[bool]], concurrency: int = 4,
+                 queue_size: int = 100):
+        """
+        Args:
+            download_func: 下载函数，参数为 (url, file_path)，返回是否成功
+            concurrency: 同时下载的数量
+            queue_size: 等待下载的任务数上限
+        """
+        self.download_func = download_func
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.succeeded_count = 0
+        self.failed_count = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def submit(self, url: str, file_path: str):
+        """
+        提交一个下载任务
+        Args:
+            url: 媒体地址
+            file_path: 保存路径
+
+        Returns:
+
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        await self._queue.put((url, file_path))
+
+    async def _worker(self):
+        while True:
+            item: Tuple[str, str] = await self._queue.get()
+            url, file_path = item
+            try:
+                if await self.download_func(url, file_path):
+                    self.succeeded_count += 1
+                    utils.logger.info(f"[AsyncMediaDownloader] save media {file_path} success ...")
+                else:
+                    self.failed_count += 1
+            except Exception as e:
+                self.failed_count += 1
+                utils.logger.error(f"[AsyncMediaDownloader] download {url} error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def close(self):
+        """
+        等待所有已提交的下载完成并停止下载协程
+        Returns:
+
+        """
+        if self._queue is None:
+            return
+        await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._queue = None
+        self._workers = []
+        utils.logger.info(
+            f"[AsyncMediaDownloader.close] media download finished, succeeded: {self.succeeded_count}, failed: {self.failed_count}"
+        )
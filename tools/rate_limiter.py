@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 异步请求节奏控制，按接口类型划分令牌桶，等待期间不阻塞事件循环
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """令牌桶，rate 为每秒补充的令牌数，capacity 为允许的突发请求数"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> float:
+        """
+        取出一个令牌，令牌不足时异步等待（先到先得）
+        Returns: 本次等待的秒数
+
+        """
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self._tokens -= 1
+        return waited
+
+
+class AsyncRateLimiter:
+    """按接口类型限速的调度器，每种接口一个令牌桶，拿到令牌后再附加随机抖动"""
+
+    def __init__(self, rates: Dict[str, float], jitter: float = 0.0, capacity: int = 1):
+        """
+        Args:
+            rates: 接口类型 -> 每秒允许的请求数，<=0 表示不限速
+            jitter: 拿到令牌后额外随机等待的上限（秒）
+            capacity: 每个令牌桶允许的突发请求数
+        """
+        self.jitter = jitter
+        self._buckets: Dict[str, TokenBucket] = {
+            endpoint: TokenBucket(rate, capacity) for endpoint, rate in rates.items() if rate and rate > 0
+        }
+
+    def get_bucket(self, endpoint: str) -> Optional[TokenBucket]:
+        return self._buckets.get(endpoint)
+
+    async def wait(self, endpoint: str) -> float:
+        """
+        请求某类接口前调用，未配置的接口类型只附加抖动
+        Args:
+            endpoint: 接口类型，例如 search | note_detail | comments | sub_comments | creator_notes
+
+        Returns: 本次总共等待的秒数
+
+        """
+        waited = 0.0
+        bucket = self._buckets.get(endpoint)
+        if bucket is not None:
+            waited += await bucket.acquire()
+        if self.jitter > 0:
+            delay = random.uniform(0, self.jitter)
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
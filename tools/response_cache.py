@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 磁盘HTTP响应缓存，按 URL + 相关请求头缓存网页内容（gzip 压缩），支持过期时间和无网络的回放模式
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import time
+from typing import Optional
+
+
+class ResponseCacheMiss(Exception):
+    """回放模式下请求的响应没有被缓存"""
+
+
+class DiskResponseCache:
+    """
+    每个响应保存为一个 gzip 压缩的 JSON 文件：{cache_dir}/{key前两位}/{key}.json.gz
+    1. 普通模式：缓存未过期时直接返回，否则请求后写入缓存
+    2. 回放模式（replay）：忽略过期时间，只从缓存读取，未缓存时抛出 ResponseCacheMiss，不发起任何网络请求
+    压缩和读写文件都放到线程中执行，不阻塞事件循环
+    """
+
+    def __init__(self, cache_dir: str, ttl: float = 86400, replay: bool = False):
+        """
+        Args:
+            cache_dir: 缓存目录
+            ttl: 缓存有效期，单位秒，<=0 表示永不过期
+            replay: 是否为回放模式
+        """
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.ttl = ttl
+        self.replay = replay
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(url: str, vary: str = "") -> str:
+        """
+        生成缓存 key
+        Args:
+            url: 请求地址（去掉 xsec_token 等每次都会变化的参数后的地址）
+            vary: 影响响应内容的请求头摘要，例如是否携带登录 cookie
+
+        Returns:
+
+        """
+        return hashlib.sha256(f"{url}\n{vary}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.cache_dir / key[:2] / f"{key}.json.gz"
+
+    def _read(self, path: pathlib.Path) -> Optional[dict]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: pathlib.Path, record: dict):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 同一 key 可能被并发写入，每次写入使用不同的临时文件，写完后原子替换
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+        try:
+            with open(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    async def get(self, url: str, vary: str = "") -> Optional[str]:
+        """
+        读取缓存的响应内容
+        Args:
+            url: 请求地址
+            vary: 相关请求头摘要
+
+        Returns: 响应内容，未命中时返回 None（回放模式下抛出 ResponseCacheMiss）
+
+        """
+        record = await asyncio.to_thread(self._read, self._path(self.make_key(url, vary)))
+        fresh = record is not None and (
+            self.replay or self.ttl <= 0 or time.time() - record.get("saved_at", 0) <= self.ttl
+        )
+        if fresh:
+            self.hits += 1
+            return record.get("text")
+        self.misses += 1
+        if self.replay:
+            raise ResponseCacheMiss(f"response of {url} is not recorded")
+        return None
+
+    async def set(self, url: str, text: str, vary: str = ""):
+        """
+        写入响应内容
+        Args:
+            url: 请求地址
+            text: 响应内容
+            vary: 相关请求头摘要
+
+        Returns:
+
+        """
+        record = {"url": url, "vary": vary, "saved_at": time.time(), "text": text}
+        await asyncio.to_thread(self._write, self._path(self.make_key(url, vary)), record)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 已爬取内容的去重与新鲜度索引，内存布隆过滤器 + SQLite 持久化，跨关键词、跨创作者、跨运行跳过近期爬过的笔记和评论
+import hashlib
+import math
+import pathlib
+import sqlite3
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class BloomFilter:
+    """布隆过滤器，判断不存在时一定不存在，判断存在时需要再查持久化存储确认"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SeenIndex:
+    """
+    记录每个笔记/评论最近一次爬取的时间，recrawl_ttl 秒内爬过的视为新鲜，不再重复请求
+    kind 区分记录类型：note: 笔记详情 | note_comments: 笔记的评论 | comment: 单条评论
+    爬取记录和评论水位先留在内存中（查询时可见），对应的数据写出到存储之后再调用 commit 提交，
+    否则进程中断后数据丢失，这些笔记和评论却会被当作已经爬过
+    """
+
+    def __init__(self, db_path: str = ":memory:", recrawl_ttl: float = 86400, bloom_capacity: int = 1000000,
+                 bloom_error_rate: float = 0.001, watermark_db_path: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLite 文件路径，":memory:" 表示只在本次运行内去重
+            recrawl_ttl: 重新爬取的间隔，单位秒
+            bloom_capacity: 布隆过滤器预计容纳的记录数
+            bloom_error_rate: 布隆过滤器的误判率
+            watermark_db_path: 评论水位的 SQLite 文件路径，None 表示与 db_path 相同；
+                增量爬取评论需要跨运行保存水位，去重记录只在本次运行内生效时单独指定
+        """
+        self.recrawl_ttl = recrawl_ttl
+        # 本次运行中判定为新鲜（被跳过）的记录数，按记录类型统计
+        self._fresh_counts: Dict[str, int] = Counter()
+        self._conn = self._connect(db_path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen_index (
+                kind TEXT NOT NULL,
+                id TEXT NOT NULL,
+                crawled_at REAL NOT NULL,
+                PRIMARY KEY (kind, id)
+            )
+            """
+        )
+        self._conn.commit()
+        if watermark_db_path is None or watermark_db_path == db_path:
+            self._watermark_conn = self._conn
+        else:
+            self._watermark_conn = self._connect(watermark_db_path)
+        self._watermark_conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS comment_watermark (
+                note_id TEXT NOT NULL PRIMARY KEY,
+                create_time INTEGER NOT NULL,
+                comment_id TEXT NOT NULL
+            )
+            """
+        )
+        self._watermark_conn.commit()
+        # 尚未提交的爬取记录 (kind, id) -> crawled_at 和评论水位 note_id -> (create_time, comment_id)
+        self._pending_seen: Dict[Tuple[str, str], float] = {}
+        self._pending_watermarks: Dict[str, Tuple[int, str]] = {}
+        self._bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+        # 过期的记录不放进布隆过滤器，查询时直接判定为需要重新爬取
+        for kind, item_id in self._conn.execute(
+            "SELECT kind, id FROM seen_index WHERE crawled_at >= ?", (time.time() - recrawl_ttl,)
+        ):
+            self._bloom.add(f"{kind}:{item_id}")
+
+    @staticmethod
+    def _connect(db_path: str) -> sqlite3.Connection:
+        if db_path != ":memory:":
+            pathlib.Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def is_fresh(self, kind: str, item_id: str) -> bool:
+        """
+        是否在 recrawl_ttl 内爬取过
+        Args:
+            kind: 记录类型
+            item_id: 笔记ID或评论ID
+
+        Returns:
+
+        """
+        if not item_id or f"{kind}:{item_id}" not in self._bloom:
+            return False
+        crawled_at = self._pending_seen.get((kind, item_id))
+        if crawled_at is None:
+            row = self._conn.execute(
+                "SELECT crawled_at FROM seen_index WHERE kind = ? AND id = ?", (kind, item_id)
+            ).fetchone()
+            crawled_at = row[0] if row else None
+        fresh = crawled_at is not None and crawled_at >= time.time() - self.recrawl_ttl
+        if fresh:
+            self._fresh_counts[kind] += 1
+        return fresh
+
+    def filter_stale(self, kind: str, item_ids: Iterable[str]) -> Set[str]:
+        """返回需要重新爬取（未爬过或已过期）的ID"""
+        return {item_id for item_id in item_ids if not self.is_fresh(kind, item_id)}
+
+    def mark(self, kind: str, item_ids: List[str]):
+        """
+        记录本次爬取完成的ID，调用 commit 后才会写入 SQLite
+        Args:
+            kind: 记录类型
+            item_ids: 笔记ID或评论ID列表
+
+        Returns:
+
+        """
+        now = time.time()
+        for item_id in item_ids:
+            if item_id:
+                self._bloom.add(f"{kind}:{item_id}")
+                self._pending_seen[(kind, item_id)] = now
+
+    def get_comment_watermark(self, note_id: str) -> Optional[Tuple[int, str]]:
+        """
+        获取笔记已保存的最新一级评论
+        Args:
+            note_id: 笔记ID
+
+        Returns: (create_time, comment_id)，没有记录时返回 None
+
+        """
+        if note_id in self._pending_watermarks:
+            return self._pending_watermarks[note_id]
+        row = self._watermark_conn.execute(
+            "SELECT create_time, comment_id FROM comment_watermark WHERE note_id = ?", (note_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def save_comment_watermark(self, note_id: str, create_time: int, comment_id: str):
+        """保存笔记的最新一级评论，只会向更新的评论推进，调用 commit 后才会写入 SQLite"""
+        watermark = self.get_comment_watermark(note_id)
+        if watermark is None or create_time > watermark[0]:
+            self._pending_watermarks[note_id] = (create_time, comment_id)
+
+    def pending_rows(self) -> Tuple[Dict[Tuple[str, str], float], Dict[str, Tuple[int, str]]]:
+        """
+        取出尚未提交的爬取记录和评论水位的快照，先于存储写出数据取出，写出成功后传给 commit
+        Returns: (爬取记录, 评论水位)
+
+        """
+        return dict(self._pending_seen), dict(self._pending_watermarks)
+
+    def commit(self, rows: Tuple[Dict[Tuple[str, str], float], Dict[str, Tuple[int, str]]]):
+        """
+        提交记录，快照之后又更新过的记录继续留在内存中，等待下一次提交
+        Args:
+            rows: pending_rows 取出的快照
+
+        Returns:
+
+        """
+        seen, watermarks = rows
+        self._conn.executemany(
+            "REPLACE INTO seen_index (kind, id, crawled_at) VALUES (?, ?, ?)",
+            [(kind, item_id, crawled_at) for (kind, item_id), crawled_at in seen.items()],
+        )
+        self._conn.commit()
+        self._watermark_conn.executemany(
+            "INSERT INTO comment_watermark (note_id, create_time, comment_id) VALUES (?, ?, ?) "
+            "ON CONFLICT(note_id) DO UPDATE SET create_time = excluded.create_time, comment_id = excluded.comment_id "
+            "WHERE excluded.create_time > comment_watermark.create_time",
+            [(note_id, create_time, comment_id) for note_id, (create_time, comment_id) in watermarks.items()],
+        )
+        self._watermark_conn.commit()
+        for key, crawled_at in seen.items():
+            if self._pending_seen.get(key) is crawled_at:
+                del self._pending_seen[key]
+        for note_id, watermark in watermarks.items():
+            if self._pending_watermarks.get(note_id) is watermark:
+                del self._pending_watermarks[note_id]
+
+    @property
+    def skipped_counts(self) -> Dict[str, int]:
+        """本次运行中因为近期爬取过而跳过的记录数，按记录类型统计"""
+        return dict(self._fresh_counts)
+
+    def close(self):
+        self._conn.close()
+        if self._watermark_conn is not self._conn:
+            self._watermark_conn.close()
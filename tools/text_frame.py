@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# @Desc    : 舆情分析的列式数据处理：按列读取导出的 CSV、整列处理文本、按 Counter 的顺序计数，以及按阶段统计处理速度
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+
+def read_csv_columns(path: str, columns: Optional[Sequence[str]] = None, text_columns: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    只读取分析用到的列，导出文件中其他的列不解析、不占用内存
+    Args:
+        path: 文件路径
+        columns: 只读取这些列（文件中不存在的列会被忽略），None 表示读取全部列
+        text_columns: 按字符串读取的列，避免纯数字的标题、评论被推断成数值
+
+    Returns:
+
+    """
+    wanted = set(columns) if columns is not None else None
+    return pd.read_csv(
+        path,
+        usecols=(lambda column: column in wanted) if wanted is not None else None,
+        dtype={column: str for column in text_columns},
+    )
+
+
+def text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """
+    整列转换为字符串，空值转换为空字符串；缺少该列时返回等长的空字符串列
+    Args:
+        df: 数据
+        column: 列名
+
+    Returns:
+
+    """
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[column].fillna("").astype(str)
+
+
+def non_null_texts(df: pd.DataFrame, columns: Sequence[str]) -> pd.Series:
+    """
+    按行展开多列中的非空文本，同一行内按 columns 的顺序，结果顺序与逐行、逐列遍历相同
+    Args:
+        df: 数据
+        columns: 文本列，不存在的列会被忽略
+
+    Returns:
+
+    """
+    present = [column for column in columns if column in df.columns]
+    if not present or df.empty:
+        return pd.Series([], dtype=object)
+    values = df[present].to_numpy(dtype=object).ravel()
+    return pd.Series(values[pd.notna(values)], dtype=object).astype(str)
+
+
+def count_values(values: pd.Series) -> pd.Series:
+    """
+    计数并按次数从高到低排序，次数相同时按首次出现的顺序，与 Counter.most_common 的顺序一致
+    列表类型的列（例如命中的关键词）会先展开
+    Args:
+        values: 待计数的列
+
+    Returns: index 为取值，值为次数
+
+    """
+    if values.dtype == object:
+        values = values.explode()
+    return values.dropna().value_counts(sort=False).sort_values(ascending=False, kind="stable")
+
+
+def counts_to_dict(counts: pd.Series, top: Optional[int] = None) -> Dict:
+    """count_values 的结果转换为可以直接 json.dump 的字典"""
+    if top is not None:
+        counts = counts.head(top)
+    return dict(zip(counts.index.tolist(), counts.tolist()))
+
+
+class StageTimer:
+    """按阶段记录耗时和处理的行数，用于基准模式输出每个阶段的处理速度（行/秒）"""
+
+    def __init__(self):
+        self.stages: List[Dict] = []
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0) -> Iterator[Dict]:
+        """
+        记录一个阶段，行数在阶段开始前未知时可以在阶段内修改 record["rows"]
+        Args:
+            name: 阶段名称
+            rows: 阶段处理的行数
+
+        Returns:
+
+        """
+        record = {"stage": name, "rows": rows, "seconds": 0.0}
+        started_at = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - started_at
+            self.stages.append(record)
+
+    def summary(self) -> pd.DataFrame:
+        """各阶段的行数、耗时和每秒处理行数"""
+        summary = pd.DataFrame(self.stages, columns=["stage", "rows", "seconds"])
+        seconds = summary["seconds"].where(summary["seconds"] > 0)
+        summary["rows_per_second"] = (summary["rows"] / seconds).round(1)
+        summary["seconds"] = summary["seconds"].round(4)
+        return summary
@@ -3,7 +3,10 @@
 import asyncio
 import json
 import logging
+import os
+import time
 from collections import Counter
+from typing import Dict, List, Set
 
 import aiofiles
 import jieba
@@ -24,15 +27,66 @@ class AsyncWordCloudGenerator:
         self.custom_words = config.CUSTOM_WORDS
         for word, group in self.custom_words.items():
             jieba.add_word(word)
+        # 增量词频：词云文件前缀 -> 累计词频
+        self.word_freqs: Dict[str, Counter] = {}
+        self._dirty_prefixes: Set[str] = set()
+        self._last_render_at: Dict[str, float] = {}
 
     def load_stop_words(self):
         with open(self.stop_words_file, 'r', encoding='utf-8') as f:
             return set(f.read().strip().split('\n'))
 
+    def segment(self, text: str) -> List[str]:
+        return [word for word in jieba.lcut(text) if word not in self.stop_words and len(word.strip()) > 0]
+
+    async def get_word_frequency(self, save_words_prefix: str) -> Counter:
+        """获取累计词频，首次使用时从已有的词频文件加载，保证同一天多次运行的词频连续"""
+        async with self.lock:
+            if save_words_prefix not in self.word_freqs:
+                word_freq = Counter()
+                freq_file = f"{save_words_prefix}_word_freq.json"
+                if os.path.exists(freq_file):
+                    async with aiofiles.open(freq_file, 'r', encoding='utf-8') as file:
+                        word_freq.update(json.loads(await file.read()))
+                self.word_freqs[save_words_prefix] = word_freq
+            return self.word_freqs[save_words_prefix]
+
+    async def update_word_frequency(self, text: str, save_words_prefix: str):
+        """
+        只对新增文本分词并累加到词频中，词频文件和词云图按 WORDCLOUD_RENDER_INTERVAL 节流写出，
+        为 0 时只在 flush（爬虫结束）时写出
+        """
+        word_freq = await self.get_word_frequency(save_words_prefix)
+        word_freq.update(self.segment(text))
+        self._dirty_prefixes.add(save_words_prefix)
+
+        render_interval = config.WORDCLOUD_RENDER_INTERVAL
+        if render_interval <= 0:
+            return
+        if time.monotonic() - self._last_render_at.get(save_words_prefix, 0) >= render_interval:
+            await self.save_word_frequency_and_cloud(save_words_prefix)
+
+    async def save_word_frequency_and_cloud(self, save_words_prefix: str):
+        self._dirty_prefixes.discard(save_words_prefix)
+        self._last_render_at[save_words_prefix] = time.monotonic()
+        word_freq = self.word_freqs.get(save_words_prefix, Counter())
+        freq_file = f"{save_words_prefix}_word_freq.json"
+        async with aiofiles.open(freq_file, 'w', encoding='utf-8') as file:
+            await file.write(json.dumps(word_freq, ensure_ascii=False, indent=4))
+
+        if plot_lock.locked():
+            utils.logger.info("Skipping word cloud generation as the lock is held.")
+            return
+        await self.generate_word_cloud(word_freq, save_words_prefix)
+
+    async def flush(self):
+        """写出所有还未写出的词频文件和词云图"""
+        for save_words_prefix in list(self._dirty_prefixes):
+            await self.save_word_frequency_and_cloud(save_words_prefix)
+
     async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
         all_text = ' '.join(item['content'] for item in data)
-        words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
-        word_freq = Counter(words)
+        word_freq = Counter(self.segment(all_text))
 
         # Save word frequency to file
         freq_file = f"{save_words_prefix}_word_freq.json"